@@ -0,0 +1,192 @@
+"""
+Biblioteca de caché en disco por contenido (SHA-256).
+
+Utilidades compartidas por los cachés del proyecto:
+- hash_archivo / hash_bytes: huella del contenido (no del nombre ni de la ruta),
+  para que un mismo archivo subido varias veces se reconozca.
+- guardar_pickle / cargar_pickle: escritura atómica y lectura tolerante a errores.
+- podar_cache: elimina las entradas más antiguas por edad y por tamaño total.
+- carpeta_privada / asegurar_carpeta_privada: carpetas de caché por usuario.
+
+Los cachés viven bajo el directorio temporal del sistema, que es compartido
+entre usuarios. Como cargar un pickle puede ejecutar código, cada caché usa
+una carpeta propia del usuario (permisos 0700, dueño verificado) y
+cargar_pickle / guardar_pickle se niegan a usar una carpeta que no lo sea.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import stat
+import tempfile
+import time
+
+TAMANO_BLOQUE = 1024 * 1024  # 1 MB por lectura al calcular el hash
+
+
+def carpeta_privada(nombre):
+    """
+    Ruta de una carpeta de caché del usuario actual bajo el directorio temporal.
+
+    En POSIX el nombre lleva el uid (<nombre>_<uid>) para que cada usuario
+    tenga la suya; en Windows el directorio temporal ya es por usuario.
+    No crea la carpeta (ver asegurar_carpeta_privada).
+    """
+    if hasattr(os, "getuid"):
+        nombre = f"{nombre}_{os.getuid()}"
+    return os.path.join(tempfile.gettempdir(), nombre)
+
+
+def asegurar_carpeta_privada(carpeta):
+    """
+    Crea la carpeta (permisos 0700) y verifica que sea privada del usuario:
+    un directorio real (no un enlace simbólico), del usuario actual y sin
+    permisos para el grupo ni para otros.
+
+    Returns:
+        bool: True si la carpeta se puede usar
+    """
+    try:
+        os.makedirs(carpeta, mode=0o700, exist_ok=True)
+        estado = os.lstat(carpeta)
+    except OSError as e:
+        print(f"No se pudo crear la carpeta de caché {carpeta}: {e}")
+        return False
+    if not stat.S_ISDIR(estado.st_mode):
+        print(f"Carpeta de caché insegura (no es un directorio), se ignora: {carpeta}")
+        return False
+    if not hasattr(os, "getuid"):
+        return True
+    if estado.st_uid != os.getuid():
+        print(f"Carpeta de caché insegura (pertenece a otro usuario), se ignora: {carpeta}")
+        return False
+    if estado.st_mode & 0o077:
+        # Es nuestra: basta con cerrar los permisos
+        try:
+            os.chmod(carpeta, 0o700)
+        except OSError as e:
+            print(f"No se pudieron restringir los permisos de {carpeta}: {e}")
+            return False
+    return True
+
+
+def hash_bytes(datos):
+    """SHA-256 (hex) de un bytes/bytearray/memoryview"""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def hash_archivo(ruta):
+    """SHA-256 (hex) del contenido de un archivo, leído por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def guardar_pickle(objeto, ruta):
+    """
+    Guarda objeto con pickle de forma atómica (archivo temporal + os.replace).
+
+    Returns:
+        bool: True si se guardó
+    """
+    carpeta = os.path.dirname(ruta)
+    if not asegurar_carpeta_privada(carpeta):
+        return False
+    try:
+        fd, ruta_tmp = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(objeto, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(ruta_tmp, ruta)
+        except BaseException:
+            if os.path.exists(ruta_tmp):
+                os.remove(ruta_tmp)
+            raise
+    except Exception as e:
+        print(f"No se pudo guardar en caché {ruta}: {e}")
+        return False
+    return True
+
+
+def cargar_pickle(ruta):
+    """Carga un pickle del caché; None si no existe, está dañado o la carpeta no es privada"""
+    if not os.path.exists(ruta):
+        return None
+    if not asegurar_carpeta_privada(os.path.dirname(ruta)):
+        return None
+    try:
+        with open(ruta, "rb") as f:
+            objeto = pickle.load(f)
+    except Exception as e:
+        print(f"Entrada de caché inválida, se ignora {ruta}: {e}")
+        return None
+    # Marcar como usada para que la poda por antigüedad la conserve
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+    return objeto
+
+
+def _tamano_entrada(ruta):
+    if os.path.isdir(ruta):
+        total = 0
+        for raiz, _, archivos in os.walk(ruta):
+            for nombre in archivos:
+                try:
+                    total += os.path.getsize(os.path.join(raiz, nombre))
+                except OSError:
+                    pass
+        return total
+    return os.path.getsize(ruta)
+
+
+def _eliminar_entrada(ruta):
+    if os.path.isdir(ruta):
+        shutil.rmtree(ruta, ignore_errors=True)
+    else:
+        os.remove(ruta)
+
+
+def podar_cache(carpeta, max_bytes=None, max_edad_segundos=None):
+    """
+    Elimina entradas (archivos o subcarpetas) del caché.
+
+    Primero borra las que no se usan hace más de max_edad_segundos y luego,
+    de la menos a la más recientemente usada, hasta quedar bajo max_bytes.
+
+    Returns:
+        int: cantidad de entradas eliminadas
+    """
+    if not os.path.isdir(carpeta):
+        return 0
+
+    entradas = []
+    for nombre in os.listdir(carpeta):
+        if nombre.endswith(".tmp"):
+            continue
+        ruta = os.path.join(carpeta, nombre)
+        try:
+            entradas.append((os.path.getmtime(ruta), _tamano_entrada(ruta), ruta))
+        except OSError:
+            continue
+    entradas.sort()
+
+    ahora = time.time()
+    total = sum(tamano for _, tamano, _ in entradas)
+    eliminadas = 0
+    for usado, tamano, ruta in entradas:
+        vencida = max_edad_segundos is not None and ahora - usado > max_edad_segundos
+        excede = max_bytes is not None and total > max_bytes
+        if not (vencida or excede):
+            continue
+        try:
+            _eliminar_entrada(ruta)
+        except OSError as e:
+            print(f"No se pudo eliminar del caché {ruta}: {e}")
+            continue
+        total -= tamano
+        eliminadas += 1
+    return eliminadas
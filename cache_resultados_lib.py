@@ -0,0 +1,179 @@
+"""
+Caché en disco de resultados de procesamiento (ej. la Limpieza del dashboard).
+
+Cada entrada es una carpeta con los archivos generados y un manifiesto JSON.
+La clave combina:
+- SHA-256 del archivo de entrada
+- SHA-256 de los archivos de configuración (validaciones y reglas de normalización)
+- versión del código (SHA-256 de los módulos que participan en el procesamiento)
+- parámetros que cambian la salida (ej. filas a saltar)
+
+Así un mismo archivo mensual subido varias veces se resuelve copiando los
+resultados previos, y cualquier cambio de configuración o de código invalida
+la entrada. Las entradas se podan por antigüedad y por tamaño total.
+
+El caché está en una carpeta privada del usuario (ver cache_lib) y solo se
+restauran archivos del manifiesto que sean nombres simples dentro de la
+carpeta de la entrada.
+"""
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+from cache_lib import (
+    asegurar_carpeta_privada, carpeta_privada, hash_archivo, hash_bytes, podar_cache,
+)
+from lectura_lib import huella_origen
+
+# --- CONFIGURACIÓN ---
+CARPETA_CACHE_RESULTADOS = carpeta_privada("rcv_cache_resultados")
+LIMITE_CACHE_RESULTADOS_MB = 1024
+EDAD_MAXIMA_CACHE_RESULTADOS_HORAS = 24
+
+# Módulos cuyo código define la salida de la limpieza
+MODULOS_PROCESAMIENTO = [
+    "procesar_general.py",
+    "plan_columnas_lib.py",
+    "normalizadores_lib.py",
+    "reglas_normalizacion_lib.py",
+    "fechas_lib.py",
+    "texto_lib.py",
+    "lectura_lib.py",
+    "escritura_lib.py",
+    "incremental_lib.py",
+]
+
+MANIFIESTO = "resultado.json"
+
+
+@lru_cache(maxsize=None)
+def version_codigo(modulos=tuple(MODULOS_PROCESAMIENTO)):
+    """SHA-256 del contenido de los módulos de procesamiento (cambia con cada edición)"""
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    partes = []
+    for modulo in modulos:
+        ruta = os.path.join(raiz, modulo)
+        partes.append(hash_archivo(ruta) if os.path.exists(ruta) else "-")
+    return hash_bytes("|".join(partes).encode("utf-8"))
+
+
+def calcular_clave(ruta_entrada, archivos_config=(), **parametros):
+    """
+    Calcula la clave del caché para un archivo de entrada.
+
+    Args:
+        ruta_entrada: Archivo a procesar (ruta o contenido en memoria, ver lectura_lib.abrir_origen)
+        archivos_config: Rutas de archivos de configuración que afectan la salida
+        **parametros: Otros parámetros que afectan la salida (ej. num_filas_a_saltar=1)
+
+    Returns:
+        str: clave hexadecimal
+    """
+    partes = [huella_origen(ruta_entrada), version_codigo()]
+    for ruta in archivos_config:
+        partes.append(hash_archivo(ruta) if os.path.exists(ruta) else "-")
+    partes.append(json.dumps(parametros, sort_keys=True, default=str))
+    return hash_bytes("|".join(partes).encode("utf-8"))
+
+
+def _archivo_de_entrada(carpeta, archivo):
+    """
+    Ruta de un archivo del manifiesto dentro de la carpeta de la entrada.
+
+    Raises:
+        ValueError: si no es un nombre de archivo simple (rutas absolutas, "..",
+            subcarpetas) o no es un archivo regular de la entrada
+    """
+    if (
+        not isinstance(archivo, str)
+        or archivo in ("", ".", "..")
+        or os.path.basename(archivo) != archivo
+        or (os.altsep and os.altsep in archivo)
+    ):
+        raise ValueError(f"Nombre de archivo inválido en el manifiesto: {archivo!r}")
+    ruta = os.path.join(carpeta, archivo)
+    if os.path.islink(ruta) or not os.path.isfile(ruta):
+        raise ValueError(f"El archivo del manifiesto no es un archivo de la entrada: {archivo!r}")
+    return ruta
+
+
+def restaurar_resultado(clave, destinos, carpeta_cache=CARPETA_CACHE_RESULTADOS):
+    """
+    Copia los archivos de una entrada del caché a las rutas de destino.
+
+    Args:
+        destinos: {nombre lógico: ruta destino}, con los mismos nombres usados al guardar
+
+    Returns:
+        dict {nombre lógico: ruta destino} de los archivos restaurados, o None si
+        la entrada no existe o está incompleta
+    """
+    carpeta = os.path.join(carpeta_cache, clave)
+    ruta_manifiesto = os.path.join(carpeta, MANIFIESTO)
+    if not os.path.exists(ruta_manifiesto) or not asegurar_carpeta_privada(carpeta_cache):
+        return None
+
+    try:
+        with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+        restaurados = {}
+        for nombre, archivo in manifiesto["archivos"].items():
+            if nombre not in destinos:
+                continue
+            ruta = _archivo_de_entrada(carpeta, archivo)
+            os.makedirs(os.path.dirname(destinos[nombre]) or ".", exist_ok=True)
+            shutil.copyfile(ruta, destinos[nombre])
+            restaurados[nombre] = destinos[nombre]
+    except Exception as e:
+        print(f"Entrada de caché inválida, se ignora {carpeta}: {e}")
+        return None
+
+    # Marcar como usada para que la poda por antigüedad la conserve
+    os.utime(carpeta)
+    return restaurados
+
+
+def guardar_resultado(clave, origenes, carpeta_cache=CARPETA_CACHE_RESULTADOS):
+    """
+    Guarda en el caché los archivos generados (los que existan).
+
+    Args:
+        origenes: {nombre lógico: ruta del archivo generado}
+
+    Returns:
+        bool: True si se guardó la entrada
+    """
+    carpeta = os.path.join(carpeta_cache, clave)
+    if os.path.exists(os.path.join(carpeta, MANIFIESTO)):
+        return True
+
+    if not asegurar_carpeta_privada(carpeta_cache):
+        return False
+
+    carpeta_tmp = None
+    try:
+        # Se arma en una carpeta temporal y se renombra: nunca queda una entrada a medias
+        carpeta_tmp = tempfile.mkdtemp(dir=carpeta_cache, suffix=".tmp")
+        archivos = {}
+        for nombre, ruta in origenes.items():
+            if ruta and os.path.exists(ruta):
+                archivo = f"{nombre}{os.path.splitext(ruta)[1]}"
+                shutil.copyfile(ruta, os.path.join(carpeta_tmp, archivo))
+                archivos[nombre] = archivo
+        with open(os.path.join(carpeta_tmp, MANIFIESTO), "w", encoding="utf-8") as f:
+            json.dump({"archivos": archivos}, f, ensure_ascii=False, indent=2)
+        os.replace(carpeta_tmp, carpeta)
+    except Exception as e:
+        print(f"No se pudo guardar el resultado en caché: {e}")
+        if carpeta_tmp:
+            shutil.rmtree(carpeta_tmp, ignore_errors=True)
+        return False
+
+    podar_cache(
+        carpeta_cache,
+        max_bytes=LIMITE_CACHE_RESULTADOS_MB * 1024 * 1024,
+        max_edad_segundos=EDAD_MAXIMA_CACHE_RESULTADOS_HORAS * 3600,
+    )
+    return True
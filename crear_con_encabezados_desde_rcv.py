@@ -1,8 +1,13 @@
 import json
 import os
+from functools import lru_cache
+
 import pandas as pd
 from openpyxl import load_workbook
 
+from escritura_lib import escribir_tabla
+from lectura_lib import abrir_origen, extension_origen, nombre_origen
+
 # --- CONFIGURACION ---
 BASE_DIR = "."
 ARCHIVO_ENCABEZADOS_JSON = "encabezados.json"
@@ -10,7 +15,7 @@ DATA_START_ROW = 4  # 1-based; datos empiezan en fila 4
 
 
 def detectar_engine(archivo):
-    ext = os.path.splitext(archivo)[1].lower()
+    ext = extension_origen(archivo)
     if ext == ".xlsb":
         return "pyxlsb"
     if ext in [".xlsx", ".xls"]:
@@ -31,80 +36,160 @@ def leer_encabezados_json(archivo):
     return data
 
 
-def procesar_archivo(ruta_archivo, encabezados, data_start_row=DATA_START_ROW):
+@lru_cache(maxsize=None)
+def infer_decimals(fmt):
+    """Decimales visibles según el formato numérico de la celda (memoizado por formato)"""
+    if not fmt or fmt == "General":
+        return None
+    # Quitar secciones y literales
+    fmt = fmt.split(";")[0]
+    fmt = fmt.replace('"', "")
+    if "." in fmt:
+        dec_part = fmt.split(".", 1)[1]
+        dec_part = "".join(ch for ch in dec_part if ch in "0#")
+        return len(dec_part)
+    return 0
+
+
+def _valor_celda(cell):
+    """Valor mostrado en Excel para una celda (respeta decimales del formato)"""
+    if cell.value is None:
+        return None
+    if cell.is_date:
+        return cell.value
+    if cell.data_type == "n":
+        dec = infer_decimals(cell.number_format)
+        if dec is None:
+            return cell.value
+        try:
+            return round(float(cell.value), dec)
+        except Exception:
+            return cell.value
+    return cell.value
+
+
+def _leer_filas_completo(ruta_archivo, data_start_row):
+    """Carga el libro completo en memoria (modo original)"""
+    wb = load_workbook(abrir_origen(ruta_archivo), data_only=True)
+    ws = wb.active
+    data_rows = []
+    max_col = ws.max_column
+    
+    # Detectar la última fila con datos basándose en la PRIMERA COLUMNA (consecutivo)
+    # Un registro válido = tiene consecutivo (primera columna)
+    max_row = ws.max_row
+    while max_row >= data_start_row:
+        # Revisar si la primera columna tiene un valor
+        cell = ws.cell(row=max_row, column=1)
+        if cell.value is not None:
+            break
+        max_row -= 1
+    
+    # Si no encontró datos, usar DATA_START_ROW como fallback
+    if max_row < data_start_row:
+        max_row = data_start_row
+    
+    print(
+        f"  Procesando: filas {data_start_row} a {max_row} "
+        f"({max_row - data_start_row + 1} registros)"
+    )
+    
+    # Iterar solo hasta la última fila con datos
+    for row in ws.iter_rows(
+        min_row=data_start_row, max_row=max_row, max_col=max_col
+    ):
+        data_rows.append([_valor_celda(cell) for cell in row])
+    
+    return data_rows
+
+
+def _leer_filas_streaming(ruta_archivo, data_start_row):
+    """
+    Lee el libro en modo read_only, fila por fila, sin materializar el libro completo.
+
+    Las filas sin consecutivo (primera columna vacía) quedan pendientes y solo se
+    agregan si aparece un registro posterior; así las miles de filas vacías con
+    formato al final de la hoja nunca se convierten ni se guardan en memoria.
+
+    La dimensión declarada en la hoja (<dimension ref=...>) no se usa: algunos
+    generadores la escriben mal y recortaría las filas sin aviso. Cada fila se
+    lee completa y al final todas se completan con None hasta la más ancha.
+    """
+    wb = load_workbook(abrir_origen(ruta_archivo), read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        ws.reset_dimensions()
+        ancho = 0
+        data_rows = []
+        pendientes = []
+        ultima_fila = data_start_row - 1
+
+        for num_fila, row in enumerate(
+            ws.iter_rows(min_row=data_start_row),
+            start=data_start_row,
+        ):
+            ancho = max(ancho, len(row))
+            if not row or row[0].value is None:
+                fila = [_valor_celda(cell) for cell in row]
+                # Filas totalmente vacías: basta con recordar su longitud
+                pendientes.append(fila if any(v is not None for v in fila) else len(fila))
+                continue
+
+            for pendiente in pendientes:
+                data_rows.append(
+                    [None] * pendiente if isinstance(pendiente, int) else pendiente
+                )
+            pendientes = []
+            data_rows.append([_valor_celda(cell) for cell in row])
+            ultima_fila = num_fila
+    finally:
+        wb.close()
+
+    # Si no encontró datos, usar DATA_START_ROW como fallback
+    if not data_rows:
+        ultima_fila = data_start_row
+        data_rows.append([])
+    for fila in data_rows:
+        fila.extend([None] * (max(ancho, 1) - len(fila)))
+
+    print(
+        f"  Procesando: filas {data_start_row} a {ultima_fila} "
+        f"({ultima_fila - data_start_row + 1} registros)"
+    )
+    return data_rows
+
+
+def procesar_archivo(
+    ruta_archivo, encabezados, data_start_row=DATA_START_ROW, streaming=True,
+    archivo_salida=None,
+):
+    """
+    Genera la copia '_copia.xlsx' con encabezados a partir del archivo RCV.
+
+    Args:
+        ruta_archivo: Ruta del archivo RCV o su contenido en memoria
+            (bytes/memoryview/UploadedFile), que se lee sin escribirlo a disco
+        streaming: Si es True (por defecto) los .xlsx se leen en modo read_only
+            fila por fila; si es False se carga el libro completo como antes.
+        archivo_salida: Ruta de la copia (None = '<archivo>_copia.xlsx' junto al original;
+            en memoria, en la carpeta actual con el nombre del buffer)
+    """
     engine = detectar_engine(ruta_archivo)
     if not engine:
-        print(f"Saltando (formato no soportado): {ruta_archivo}")
+        print(f"Saltando (formato no soportado): {nombre_origen(ruta_archivo)}")
         return
 
     # Leer datos desde fila 4 (skiprows=3), sin encabezados
     if engine == "openpyxl":
         # Usar openpyxl para conservar el valor mostrado en Excel (formato incluido)
-        def infer_decimals(fmt):
-            if not fmt or fmt == "General":
-                return None
-            # Quitar secciones y literales
-            fmt = fmt.split(";")[0]
-            fmt = fmt.replace('"', "")
-            if "." in fmt:
-                dec_part = fmt.split(".", 1)[1]
-                dec_part = "".join(ch for ch in dec_part if ch in "0#")
-                return len(dec_part)
-            return 0
-
-        wb = load_workbook(ruta_archivo, data_only=True)
-        ws = wb.active
-        data_rows = []
-        max_col = ws.max_column
-        
-        # Detectar la última fila con datos basándose en la PRIMERA COLUMNA (consecutivo)
-        # Un registro válido = tiene consecutivo (primera columna)
-        max_row = ws.max_row
-        while max_row >= data_start_row:
-            # Revisar si la primera columna tiene un valor
-            cell = ws.cell(row=max_row, column=1)
-            if cell.value is not None:
-                break
-            max_row -= 1
-        
-        # Si no encontró datos, usar DATA_START_ROW como fallback
-        if max_row < data_start_row:
-            max_row = data_start_row
-        
-        print(
-            f"  Procesando: filas {data_start_row} a {max_row} "
-            f"({max_row - data_start_row + 1} registros)"
-        )
-        
-        # Iterar solo hasta la última fila con datos
-        for row in ws.iter_rows(
-            min_row=data_start_row, max_row=max_row, max_col=max_col
-        ):
-            fila = []
-            for cell in row:
-                if cell.value is None:
-                    fila.append(None)
-                    continue
-                if cell.is_date:
-                    fila.append(cell.value)
-                    continue
-                if cell.data_type == "n":
-                    dec = infer_decimals(cell.number_format)
-                    if dec is None:
-                        fila.append(cell.value)
-                    else:
-                        try:
-                            fila.append(round(float(cell.value), dec))
-                        except Exception:
-                            fila.append(cell.value)
-                    continue
-                fila.append(cell.value)
-            data_rows.append(fila)
-        
+        if streaming:
+            data_rows = _leer_filas_streaming(ruta_archivo, data_start_row)
+        else:
+            data_rows = _leer_filas_completo(ruta_archivo, data_start_row)
         df = pd.DataFrame(data_rows)
     else:
         df = pd.read_excel(
-            ruta_archivo,
+            abrir_origen(ruta_archivo),
             header=None,
             skiprows=data_start_row - 1,
             engine=engine
@@ -117,7 +202,7 @@ def procesar_archivo(ruta_archivo, encabezados, data_start_row=DATA_START_ROW):
         columnas = encabezados
         df = df.iloc[:, : len(encabezados)]
         print(
-            f"Aviso: {os.path.basename(ruta_archivo)} tiene {len(df.columns)} columnas, "
+            f"Aviso: {os.path.basename(nombre_origen(ruta_archivo))} tiene {len(df.columns)} columnas, "
             f"encabezados base {len(encabezados)}. Se recortan columnas extra."
         )
 
@@ -135,9 +220,13 @@ def procesar_archivo(ruta_archivo, encabezados, data_start_row=DATA_START_ROW):
     print(f"    ✓ {num_registros} registros válidos (con consecutivo)")
 
     # Guardar como .xlsx con sufijo
-    base, _ = os.path.splitext(ruta_archivo)
-    salida = f"{base}_copia.xlsx"
-    df_salida.to_excel(salida, index=False)
+    if archivo_salida:
+        salida = archivo_salida
+    else:
+        base, _ = os.path.splitext(nombre_origen(ruta_archivo))
+        salida = f"{base}_copia.xlsx"
+    # La copia queda también en el caché de lectura para la Limpieza
+    escribir_tabla(df_salida, salida, sembrar_cache=True)
 
     print(f"OK - Generado: {salida}")
     return salida
@@ -147,22 +236,26 @@ def generar_con_encabezados(
     archivo_excel,
     encabezados_json_path=ARCHIVO_ENCABEZADOS_JSON,
     data_start_row=DATA_START_ROW,
+    streaming=True,
+    archivo_salida=None,
 ):
     encabezados = leer_encabezados_json(encabezados_json_path)
     if not encabezados:
         print("No se pudieron leer encabezados.")
         return None
-    return procesar_archivo(archivo_excel, encabezados, data_start_row=data_start_row)
+    return procesar_archivo(
+        archivo_excel,
+        encabezados,
+        data_start_row=data_start_row,
+        streaming=streaming,
+        archivo_salida=archivo_salida,
+    )
 
 
-
-def main():
-    encabezados = leer_encabezados_json(ARCHIVO_ENCABEZADOS_JSON)
-    if not encabezados:
-        print("No se pudieron leer encabezados.")
-        return
-
-    for root, dirs, files in os.walk(BASE_DIR):
+def buscar_archivos_rcv(base_dir=BASE_DIR):
+    """Rutas de los .xlsb bajo base_dir (sin carpetas de scripts/reportes ni temporales ~$)"""
+    rutas = []
+    for root, dirs, files in os.walk(base_dir):
         # Evitar procesar la carpeta scripts_auxiliares y reportes
         if os.path.basename(root).lower() in ["scripts_auxiliares", "reportes", "__pycache__", ".git"]:
             continue
@@ -172,8 +265,18 @@ def main():
                 continue
             if not nombre.lower().endswith(".xlsb"):
                 continue
-            ruta = os.path.join(root, nombre)
-            procesar_archivo(ruta, encabezados, data_start_row=DATA_START_ROW)
+            rutas.append(os.path.join(root, nombre))
+    return rutas
+
+
+def main():
+    encabezados = leer_encabezados_json(ARCHIVO_ENCABEZADOS_JSON)
+    if not encabezados:
+        print("No se pudieron leer encabezados.")
+        return
+
+    for ruta in buscar_archivos_rcv(BASE_DIR):
+        procesar_archivo(ruta, encabezados, data_start_row=DATA_START_ROW)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+"""
+Biblioteca de escritura de resultados (Excel / CSV).
+
+Modos de escritura (MODOS_ESCRITURA), elegibles en cada llamada:
+- "estandar": DataFrame.to_excel de pandas (openpyxl, encabezado con formato).
+- "rapido": escribe el .xlsx fila por fila en streaming (openpyxl write_only),
+  convirtiendo los valores por bloques de filas: memoria constante y sin el
+  costo de estilos de to_excel. El encabezado queda sin formato.
+- "csv": solo CSV (sep=';', utf-8-sig, como los reportes del proyecto); no se
+  genera el .xlsx.
+
+En ningún modo se arma una copia del DataFrame completo (df.values): los
+encabezados se asignan sobre una vista del mismo DataFrame.
+
+Para el procesamiento por bloques, EscritorPorBloques escribe la tabla de a
+un bloque de filas a la vez (modos "rapido" y "csv"). Ese escritor no siembra
+el caché de lectura: la entrada del caché es el DataFrame completo, justo lo
+que el procesamiento por bloques evita tener en memoria.
+
+Uso:
+    from escritura_lib import escribir_tabla
+    ruta = escribir_tabla(df, "Procesado_Final.xlsx", encabezados, modo="rapido")
+"""
+import math
+import os
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from lectura_lib import sembrar_cache_lectura
+
+MODO_ESTANDAR = "estandar"
+MODO_RAPIDO = "rapido"
+MODO_CSV = "csv"
+MODOS_ESCRITURA = (MODO_ESTANDAR, MODO_RAPIDO, MODO_CSV)
+
+FILAS_POR_BLOQUE = 5000
+
+# Siempre openpyxl, aunque haya otro motor instalado: las fechas centinela
+# (1800-01-01) son anteriores a 1900 y cada motor las serializa distinto;
+# con openpyxl se leen de vuelta igual que se escribieron.
+ENGINE_EXCEL = "openpyxl"
+
+
+def ruta_segun_modo(ruta, modo):
+    """Ruta que realmente se escribe: en modo csv se cambia la extensión a .csv"""
+    if modo == MODO_CSV:
+        return f"{os.path.splitext(ruta)[0]}.csv"
+    return ruta
+
+
+def _con_encabezados(df, encabezados):
+    if encabezados is None:
+        return df
+    # Copia superficial: comparte los datos, solo cambian las etiquetas
+    df = df.copy(deep=False)
+    df.columns = list(encabezados)
+    return df
+
+
+def escribir_tabla(df, ruta, encabezados=None, modo=MODO_ESTANDAR, sembrar_cache=False):
+    """
+    Escribe un DataFrame a Excel o CSV según el modo.
+
+    Args:
+        df: DataFrame a escribir
+        ruta: Ruta de salida (.xlsx); en modo csv se usa la misma con extensión .csv
+        encabezados: Nombres de columna a usar en la salida (None = los del df)
+        modo: Uno de MODOS_ESCRITURA
+        sembrar_cache: Guardar también el .xlsx en el caché de lectura
+            (lectura_lib.sembrar_cache_lectura), para archivos que otro paso
+            va a leer
+
+    Returns:
+        str: Ruta del archivo escrito
+    """
+    if modo not in MODOS_ESCRITURA:
+        raise ValueError(f"Modo de escritura desconocido: {modo} (opciones: {MODOS_ESCRITURA})")
+
+    df = _con_encabezados(df, encabezados)
+    ruta = ruta_segun_modo(ruta, modo)
+
+    if modo == MODO_CSV:
+        df.to_csv(ruta, index=False, encoding="utf-8-sig", sep=";")
+    elif modo == MODO_RAPIDO:
+        _escribir_xlsx_streaming(df, ruta)
+    else:
+        df.to_excel(ruta, index=False, engine=ENGINE_EXCEL)
+
+    if sembrar_cache and modo != MODO_CSV:
+        sembrar_cache_lectura(ruta, chain([_encabezado(df)], _filas_por_bloque(df)))
+    return ruta
+
+
+# --- ESCRITURA XLSX EN STREAMING ---
+
+def _valores_columna(col):
+    """
+    Lista de valores de una columna listos para la celda, como los deja to_excel:
+    nulos → celda vacía, infinitos → "inf"/"-inf", Timestamp → datetime,
+    escalares numpy → tipos de Python.
+    """
+    if pd.api.types.is_datetime64_any_dtype(col.dtype):
+        valores = col.astype(object).tolist()
+        return [None if v is pd.NaT else v.to_pydatetime() for v in valores]
+
+    if pd.api.types.is_float_dtype(col.dtype):
+        valores = col.tolist()
+        return [
+            None if v != v else (v if not math.isinf(v) else ("inf" if v > 0 else "-inf"))
+            for v in valores
+        ]
+
+    if pd.api.types.is_numeric_dtype(col.dtype) or pd.api.types.is_bool_dtype(col.dtype):
+        return col.tolist()
+
+    nulos = col.isna().to_numpy()
+    valores = col.tolist()
+    for i in np.flatnonzero(nulos):
+        valores[i] = None
+    for i, v in enumerate(valores):
+        if v is None or isinstance(v, (str, int)):
+            continue
+        if isinstance(v, pd.Timestamp):
+            valores[i] = v.to_pydatetime()
+        elif isinstance(v, np.generic):
+            valores[i] = v.item()
+        if isinstance(valores[i], float) and math.isinf(valores[i]):
+            valores[i] = "inf" if valores[i] > 0 else "-inf"
+    return valores
+
+
+def _filas_por_bloque(df):
+    """Genera las filas (tuplas) del df convirtiendo FILAS_POR_BLOQUE filas a la vez"""
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+        columnas = [_valores_columna(bloque.iloc[:, j]) for j in range(bloque.shape[1])]
+        yield from zip(*columnas)
+
+
+def _encabezado(df):
+    return [None if isinstance(c, float) and math.isnan(c) else c for c in df.columns]
+
+
+def _escribir_xlsx_streaming(df, ruta):
+    escritor = EscritorPorBloques(ruta, df.columns, modo=MODO_RAPIDO)
+    escritor.escribir(df)
+    escritor.cerrar()
+
+
+class EscritorPorBloques:
+    """
+    Escribe una tabla de a un bloque de filas a la vez, sin tenerla completa en memoria.
+
+    El modo "estandar" (to_excel) necesita el DataFrame completo, así que aquí
+    se escribe como "rapido" (mismos valores de celda, encabezado sin formato).
+
+    Uso:
+        escritor = EscritorPorBloques("salida.xlsx", encabezados, modo="rapido")
+        for bloque in bloques:
+            escritor.escribir(bloque)
+        ruta = escritor.cerrar()
+    """
+
+    def __init__(self, ruta, encabezados, modo=MODO_RAPIDO):
+        if modo not in MODOS_ESCRITURA:
+            raise ValueError(f"Modo de escritura desconocido: {modo} (opciones: {MODOS_ESCRITURA})")
+        self.modo = MODO_RAPIDO if modo == MODO_ESTANDAR else modo
+        self.ruta = ruta_segun_modo(ruta, self.modo)
+        self.encabezados = list(encabezados)
+        self._libro = None
+        self._hoja = None
+
+        if self.modo == MODO_CSV:
+            # Encabezado con BOM; los bloques se agregan a continuación
+            pd.DataFrame(columns=self.encabezados).to_csv(
+                self.ruta, index=False, encoding="utf-8-sig", sep=";"
+            )
+        else:
+            # write_only guarda las filas en un temporal a medida que se agregan
+            self._libro = Workbook(write_only=True)
+            self._hoja = self._libro.create_sheet("Sheet1")
+            self._hoja.append(_encabezado(pd.DataFrame(columns=self.encabezados)))
+
+    def escribir(self, df):
+        """Agrega las filas de df (mismas columnas que los encabezados)"""
+        df = _con_encabezados(df, self.encabezados)
+        if self.modo == MODO_CSV:
+            df.to_csv(self.ruta, mode="a", header=False, index=False, encoding="utf-8", sep=";")
+            return
+        for fila in _filas_por_bloque(df):
+            self._hoja.append(fila)
+
+    def cerrar(self):
+        """Termina el archivo y retorna su ruta"""
+        if self._libro is not None:
+            self._libro.save(self.ruta)
+            self._libro = None
+        return self.ruta
+
+    def descartar(self):
+        """Cierra el archivo y lo elimina (si el proceso se detiene a mitad)"""
+        # Guardar es la forma de cerrar el libro write_only y borrar su temporal
+        try:
+            self.cerrar()
+        except Exception as e:
+            print(f"No se pudo cerrar {self.ruta}: {e}")
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
@@ -4,9 +4,12 @@ Extrae la lógica de procesar_todas_fechas.py para uso en pipelines.
 
 IMPORTANTE: Los índices en INDICES_FECHAS son 0-based (índices pandas).
 """
-import pandas as pd
+import re
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 # Lista de índices de columnas de fechas a procesar (0-based)
 INDICES_FECHAS = [
     7, 23, 27, 29, 43, 45, 47, 49, 51, 53, 58, 59, 61, 64, 66, 68,
@@ -16,6 +19,32 @@ INDICES_FECHAS = [
 
 FECHAS_ESPECIALES = {"1800-01-01", "1845-01-01", "1845-01-02"}
 
+FECHA_SINDATO = "1800/01/01"
+FECHA_NO_APLICA = "1845/01/01"
+
+# Formas de texto que convertir_fecha acepta vía strptime, en el mismo orden.
+# Solo se vectorizan las variantes con día/mes de 2 dígitos; cualquier otra
+# forma aceptada por strptime (ej. "5/3/2024") cae al camino celda a celda.
+_FORMAS_TEXTO_FECHA = [
+    (r"^(?P<d>\d{2})/(?P<m>\d{2})/(?P<y>\d{4})$", "%d/%m/%Y"),
+    (r"^(?P<d>\d{2})-(?P<m>\d{2})-(?P<y>\d{4})$", "%d-%m-%Y"),
+    (r"^(?P<y>\d{4})/(?P<m>\d{2})/(?P<d>\d{2})$", "%Y/%m/%d"),
+    (r"^(?P<y>\d{4})-(?P<m>\d{2})-(?P<d>\d{2})$", "%Y-%m-%d"),
+    (
+        r"^(?P<y>\d{4})-(?P<m>\d{2})-(?P<d>\d{2}) (?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d$",
+        "%Y-%m-%d %H:%M:%S",
+    ),
+]
+_FORMAS_TEXTO_FECHA = [(re.compile(patron), fmt) for patron, fmt in _FORMAS_TEXTO_FECHA]
+
+# Un texto solo puede resolver a una fecha especial si contiene su año.
+# Los números nunca lo son: detectar_fecha_especial solo acepta seriales
+# 0 < n < 100000, que corresponden a fechas desde 1899-12-30 en adelante.
+_PATRON_ANIO_ESPECIAL = r"18(?:00|45)"
+_TIPOS_SIN_FECHA_ESPECIAL = (
+    type(None), int, float, bool, np.int64, np.float64, np.bool_,
+)
+
 
 def detectar_fecha_especial(valor):
     """Detecta si un valor es una fecha especial en cualquier formato y retorna su tipo"""
@@ -152,6 +181,196 @@ def convertir_fecha(valor):
         return "1800/01/01"
 
 
+def _formatear_datetimes(fechas):
+    """Formatea un array datetime64 como YYYY/MM/DD; NaT → None"""
+    fechas = np.asarray(fechas, dtype="datetime64[ns]")
+    salida = np.datetime_as_string(fechas, unit="D")
+    salida = np.char.replace(salida, "-", "/").astype(object)
+    salida[np.isnat(fechas)] = None
+    return salida
+
+
+def _convertir_seriales(numeros):
+    """Vectoriza la rama de número de serie Excel de convertir_fecha"""
+    fechas = pd.to_datetime(
+        np.asarray(numeros, dtype=float) - 2,
+        unit="D",
+        origin="1900-01-01",
+        errors="coerce",
+    )
+    salida = _formatear_datetimes(fechas)
+    salida[pd.isnull(salida)] = FECHA_SINDATO
+    return salida
+
+
+def _convertir_textos(textos):
+    """
+    Vectoriza la rama de texto de convertir_fecha para las formas de _FORMAS_TEXTO_FECHA.
+
+    Returns:
+        array object con YYYY/MM/DD o None donde el texto no tiene una forma
+        reconocida (se resuelve luego con convertir_fecha).
+    """
+    salida = np.full(len(textos), None, dtype=object)
+    pendientes = pd.Series(textos, dtype=object)
+
+    # Comodines: se evalúan antes que cualquier formato
+    comodin = pendientes.str.strip().str.upper()
+    salida[(comodin == "NORMAL").to_numpy()] = FECHA_SINDATO
+    salida[comodin.isin(("NO APLICA", "SI")).to_numpy()] = FECHA_NO_APLICA
+
+    for patron, fmt in _FORMAS_TEXTO_FECHA:
+        libres = pd.isnull(salida)
+        if not libres.any():
+            break
+        candidatos = pendientes[libres]
+        partes = candidatos.str.extract(patron)
+        coincide = partes["y"].notna()
+        if not coincide.any():
+            continue
+        partes = partes[coincide]
+        # strptime valida calendario (ej. 31/02); pandas aplica la misma regla
+        validas = pd.to_datetime(
+            candidatos[coincide], format=fmt, errors="coerce"
+        ).notna().to_numpy()
+        partes = partes[validas]
+        posiciones = np.flatnonzero(libres)[coincide.to_numpy()][validas]
+        salida[posiciones] = (partes["y"] + "/" + partes["m"] + "/" + partes["d"]).to_numpy()
+
+    return salida
+
+
+def convertir_fechas_columna(col):
+    """
+    Versión vectorizada de convertir_fecha para una columna completa.
+
+    Clasifica los valores por tipo/forma (nulos, Timestamp/datetime, números de
+    serie Excel, textos dd/mm/YYYY, YYYY-mm-dd..., comodines) y convierte cada
+    clase con una sola operación de pandas/NumPy. Lo que no encaja en ninguna
+    clase se resuelve con convertir_fecha, una vez por valor distinto.
+    El resultado es idéntico al de col.apply(convertir_fecha).
+
+    Returns:
+        array object con textos YYYY/MM/DD
+    """
+    valores = col.to_numpy()
+    n = len(valores)
+
+    if pd.api.types.is_datetime64_any_dtype(col.dtype) and getattr(col.dtype, "tz", None) is None:
+        salida = _formatear_datetimes(valores)
+        salida[pd.isnull(salida)] = FECHA_SINDATO
+        return salida
+
+    if pd.api.types.is_numeric_dtype(col.dtype) and not pd.api.types.is_bool_dtype(col.dtype):
+        salida = _convertir_seriales(valores)
+        salida[pd.isnull(valores)] = FECHA_SINDATO
+        return salida
+
+    salida = np.full(n, None, dtype=object)
+    valores = valores.astype(object)
+    nulos = pd.isnull(valores)
+    salida[nulos] = FECHA_SINDATO
+
+    tipos = pd.Series(valores, dtype=object).map(type)
+    es_texto = (tipos == str).to_numpy() & ~nulos
+    es_numero = tipos.isin((int, float, np.int64, np.float64)).to_numpy() & ~nulos
+    es_fecha = tipos.isin((pd.Timestamp, datetime)).to_numpy() & ~nulos
+
+    if es_numero.any():
+        salida[es_numero] = _convertir_seriales(valores[es_numero])
+
+    if es_fecha.any():
+        try:
+            fechas = pd.to_datetime(valores[es_fecha], errors="coerce")
+            if fechas.tz is None:
+                salida[es_fecha] = _formatear_datetimes(fechas)
+        except (ValueError, TypeError):
+            pass
+
+    if es_texto.any():
+        salida[es_texto] = _convertir_textos(valores[es_texto])
+
+    # Resto (textos libres, números como texto, fechas fuera de rango...): por valor único
+    restantes = pd.isnull(salida)
+    if restantes.any():
+        memo = {}
+        for pos in np.flatnonzero(restantes):
+            valor = valores[pos]
+            try:
+                clave = (type(valor), valor)
+                if clave not in memo:
+                    memo[clave] = convertir_fecha(valor)
+                salida[pos] = memo[clave]
+            except TypeError:
+                salida[pos] = convertir_fecha(valor)
+
+    return salida
+
+
+def candidatos_fecha_especial(col):
+    """
+    Máscara (numpy) de las celdas de una columna object que pueden ser fecha especial:
+    textos que contienen "1800"/"1845" y valores no nulos que no son texto ni
+    número (fechas y otros objetos). Un texto sin el año nunca es candidato.
+    """
+    tipos = col.map(type)
+    es_texto = (tipos == str).to_numpy()
+    candidatos = (
+        ~es_texto
+        & ~tipos.isin(_TIPOS_SIN_FECHA_ESPECIAL).to_numpy()
+        & col.notna().to_numpy()
+    )
+    if es_texto.any():
+        con_anio = col[es_texto].str.contains(_PATRON_ANIO_ESPECIAL, regex=True)
+        candidatos[np.flatnonzero(es_texto)[con_anio.to_numpy(dtype=bool)]] = True
+    return candidatos
+
+
+def limpiar_fechas_especiales_columna(col):
+    """
+    Equivalente a col.apply(limpiar_valor_no_fecha) con un pre-filtro barato.
+
+    Solo pasan por detectar_fecha_especial las celdas candidatas: textos que
+    contienen "1800"/"1845" y valores de tipo fecha u otros tipos no numéricos.
+    Columnas numéricas se devuelven sin tocar.
+
+    Returns:
+        La misma Series si no hay fechas especiales, o una nueva con los
+        reemplazos aplicados.
+    """
+    if pd.api.types.is_numeric_dtype(col.dtype):
+        return col
+
+    if pd.api.types.is_datetime64_dtype(col.dtype):
+        dias = col.dt.normalize()
+        sindato = (dias == pd.Timestamp("1800-01-01")).to_numpy()
+        no_aplica = dias.isin(
+            [pd.Timestamp("1845-01-01"), pd.Timestamp("1845-01-02")]
+        ).to_numpy()
+        if not (sindato.any() or no_aplica.any()):
+            return col
+        salida = col.to_numpy(dtype=object)
+        salida[sindato] = "SINDATO"
+        salida[no_aplica] = "NO APLICA"
+        return pd.Series(salida, index=col.index)
+
+    candidatos = candidatos_fecha_especial(col)
+    if not candidatos.any():
+        return col
+
+    valores = col.to_numpy(dtype=object)
+    salida = valores.copy()
+    cambios = False
+    for pos in np.flatnonzero(candidatos):
+        tipo_especial = detectar_fecha_especial(valores[pos])
+        if tipo_especial:
+            salida[pos] = tipo_especial
+            cambios = True
+    if not cambios:
+        return col
+    return pd.Series(salida, index=col.index)
+
+
 def procesar_fechas_df(df, columnas_fechas=None):
     """
     Procesa todas las fechas en un DataFrame.
@@ -176,12 +395,14 @@ def procesar_fechas_df(df, columnas_fechas=None):
         try:
             if es_columna_fecha:
                 # Convertir fechas al formato YYYY/MM/DD
-                col_procesada = df.iloc[:, indice].apply(convertir_fecha)
-                df[df.columns[indice]] = col_procesada.values
+                col_procesada = convertir_fechas_columna(df.iloc[:, indice])
+                df[df.columns[indice]] = col_procesada
             else:
                 # Limpiar fechas especiales en columnas que NO son de fechas
-                col_procesada = df.iloc[:, indice].apply(limpiar_valor_no_fecha)
-                df[df.columns[indice]] = col_procesada.values
+                col = df.iloc[:, indice]
+                col_procesada = limpiar_fechas_especiales_columna(col)
+                if col_procesada is not col:
+                    df[df.columns[indice]] = col_procesada.values
         except Exception as e:
             # Si falla, continuar sin modificar la columna
             pass
@@ -0,0 +1,164 @@
+"""
+Reprocesamiento incremental: solo las filas nuevas o modificadas pasan por el plan.
+
+Cada entrega mensual repite en su mayoría los pacientes del mes anterior. Cada
+fila se identifica por una huella (hash de su contenido, con el tipo de cada
+celda, incluida la identificación del paciente) y el resultado del plan por
+columna de cada huella se guarda en un almacén local. En la siguiente ejecución
+las filas con huella conocida toman el resultado guardado y solo el resto pasa
+por SINDATO, TRIM, normalización y fechas.
+
+La columna 0 (CONSECUTIVO) es el número de fila: no entra en la huella (una
+fila insertada renumera todas las siguientes) y su paso del plan se ejecuta
+siempre, también para las filas reutilizadas.
+
+Las transformaciones del plan dependen solo de los valores de la propia fila, así
+que el resultado es el mismo que procesando todo. La validación se ejecuta sobre
+el resultado completo (es rápida y así los números de fila corresponden al
+archivo actual).
+
+El almacén depende del código (cache_resultados_lib.version_codigo) y de las
+reglas de normalización: si cambia cualquiera de los dos se empieza uno nuevo.
+
+Uso:
+    from incremental_lib import ejecutar_plan_incremental
+    df, reutilizadas = ejecutar_plan_incremental(df, plan, reglas_json)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_lib import (
+    cargar_pickle, carpeta_privada, guardar_pickle, hash_archivo, hash_bytes, podar_cache,
+)
+from cache_resultados_lib import version_codigo
+from plan_columnas_lib import ejecutar_plan
+
+# --- CONFIGURACIÓN ---
+CARPETA_INCREMENTAL = carpeta_privada("rcv_incremental")
+# Filas que conserva el almacén: primero las de la última ejecución, luego las
+# anteriores (varios archivos del mismo mes comparten el almacén)
+MAX_FILAS_INCREMENTAL = 500000
+LIMITE_INCREMENTAL_MB = 2048
+# Debe cubrir al menos el tiempo entre dos entregas
+EDAD_MAXIMA_INCREMENTAL_DIAS = 62
+# Columna que numera las filas (CONSECUTIVO): fuera de la huella
+INDICE_CONSECUTIVO = 0
+
+
+def huellas_filas(df):
+    """
+    Huella (uint64) de cada fila a partir de sus valores y del tipo de cada celda,
+    sin la columna INDICE_CONSECUTIVO.
+
+    En las columnas object el hash de pandas usa el texto del valor, así que se
+    agrega el tipo: 1 y "1" no deben considerarse la misma fila.
+    """
+    df = df.drop(columns=df.columns[INDICE_CONSECUTIVO])
+    huellas = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    columnas_objeto = [j for j in range(df.shape[1]) if df.dtypes.iloc[j] == object]
+    if columnas_objeto:
+        tipos = pd.DataFrame(
+            {j: df.iloc[:, j].map(lambda v: type(v).__name__) for j in columnas_objeto}
+        )
+        huellas_tipos = pd.util.hash_pandas_object(tipos, index=False).to_numpy()
+        huellas = huellas * np.uint64(1000003) ^ huellas_tipos
+    return huellas
+
+
+def clave_almacen(reglas_json, num_columnas):
+    """Clave del almacén: versión del código + reglas de normalización + número de columnas"""
+    partes = [
+        version_codigo(),
+        hash_archivo(reglas_json) if os.path.exists(reglas_json) else "-",
+        str(num_columnas),
+    ]
+    return hash_bytes("|".join(partes).encode("utf-8"))
+
+
+def _ruta_almacen(clave, carpeta):
+    return os.path.join(carpeta, f"{clave}.pkl")
+
+
+def ejecutar_plan_incremental(df, plan, reglas_json, carpeta=CARPETA_INCREMENTAL, metricas=None):
+    """
+    Igual que ejecutar_plan, reutilizando el resultado guardado de las filas conocidas.
+
+    Args:
+        df: DataFrame leído (ya sin filas sin consecutivo)
+        plan: Plan compilado (compilar_plan)
+        reglas_json: Ruta de las reglas de normalización usadas para compilar el plan
+        metricas: Ver plan_columnas_lib.ejecutar_plan (solo se miden las filas nuevas)
+
+    Returns:
+        tuple: (DataFrame procesado con el mismo índice y columnas, filas reutilizadas)
+    """
+    clave = clave_almacen(reglas_json, len(df.columns))
+    ruta = _ruta_almacen(clave, carpeta)
+    almacen = cargar_pickle(ruta)
+
+    huellas = huellas_filas(df)
+    if almacen is not None:
+        conocidas = np.isin(huellas, almacen.index.to_numpy())
+    else:
+        conocidas = np.zeros(len(df), dtype=bool)
+
+    partes = []
+    nuevas = None
+    if not conocidas.all() or not len(df):
+        nuevas = ejecutar_plan(df.loc[~conocidas], plan, metricas=metricas)
+        partes.append(nuevas)
+    reutilizadas = int(conocidas.sum())
+    if reutilizadas:
+        guardadas = almacen.loc[huellas[conocidas]]
+        guardadas.index = df.index[conocidas]
+        guardadas.columns = df.columns
+        # El consecutivo no está en la huella: se procesa el valor de esta ejecución
+        consecutivo = ejecutar_plan(
+            df.loc[conocidas].iloc[:, [INDICE_CONSECUTIVO]],
+            plan[INDICE_CONSECUTIVO:INDICE_CONSECUTIVO + 1],
+            mostrar_resumen=False,
+            metricas=metricas,
+        )
+        guardadas.isetitem(INDICE_CONSECUTIVO, consecutivo.iloc[:, 0].to_numpy())
+        partes.append(guardadas)
+
+    if len(partes) == 1:
+        df_procesado = partes[0]
+    else:
+        df_procesado = pd.concat(partes).reindex(df.index)
+
+    _actualizar_almacen(ruta, carpeta, almacen, huellas, conocidas, nuevas)
+    return df_procesado, reutilizadas
+
+
+def _actualizar_almacen(ruta, carpeta, almacen, huellas, conocidas, nuevas):
+    """Agrega las filas nuevas, deja primero las de esta ejecución y recorta al máximo"""
+    if nuevas is not None and len(nuevas):
+        nuevas = nuevas.copy(deep=False)
+        nuevas.index = huellas[~conocidas]
+        nuevas.columns = range(len(nuevas.columns))
+        nuevas = nuevas[~nuevas.index.duplicated()]
+    else:
+        nuevas = None
+
+    if almacen is None:
+        if nuevas is None:
+            return
+        almacen = nuevas
+    else:
+        usadas = almacen.index.isin(huellas[conocidas])
+        partes = [almacen[usadas]]
+        if nuevas is not None:
+            partes.append(nuevas)
+        partes.append(almacen[~usadas])
+        almacen = pd.concat(partes)
+    almacen = almacen.iloc[:MAX_FILAS_INCREMENTAL]
+
+    if guardar_pickle(almacen, ruta):
+        podar_cache(
+            carpeta,
+            max_bytes=LIMITE_INCREMENTAL_MB * 1024 * 1024,
+            max_edad_segundos=EDAD_MAXIMA_INCREMENTAL_DIAS * 86400,
+        )
@@ -0,0 +1,602 @@
+"""
+Biblioteca de lectura de archivos Excel (.xlsx / .xlsb).
+
+Abre el libro UNA sola vez y devuelve encabezados + datos juntos, evitando
+que cada punto de entrada llame dos veces a pd.read_excel sobre el mismo
+archivo (una para la fila de encabezados y otra para los datos).
+
+Además guarda el resultado en un caché columnar (sidecar) identificado por el
+SHA-256 del contenido: si el mismo archivo se vuelve a leer (otra subida, otra
+pestaña, otra exportación) se carga el DataFrame ya parseado sin abrir el Excel.
+Los escritores también lo llenan (sembrar_cache_lectura): el archivo que genera
+un paso (ej. la copia o el limpio) ya está en el caché cuando lo lee el paso
+siguiente, así que en la cadena Copia → Limpieza → IPS cada Excel se parsea
+una sola vez.
+
+Para archivos que no caben en memoria, leer_libro_por_bloques entrega los
+datos como una secuencia de DataFrames de N filas con los mismos tipos que
+tendría la lectura completa (ver su docstring).
+
+El archivo puede ser una ruta o el contenido ya cargado en memoria (bytes,
+memoryview o un objeto tipo archivo como el UploadedFile de Streamlit): se lee
+directamente desde ese buffer, sin escribirlo antes a disco (ver abrir_origen).
+
+Uso:
+    from lectura_lib import leer_libro
+    encabezados, df = leer_libro("archivo.xlsx", filas_a_saltar=1)
+"""
+import datetime
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import zipfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils.datetime import from_excel, to_excel
+from pandas.io.parsers import TextParser
+
+from cache_lib import (
+    cargar_pickle, carpeta_privada, guardar_pickle, hash_archivo, hash_bytes, podar_cache,
+)
+
+# --- CACHÉ COLUMNAR ---
+CARPETA_CACHE_LECTURA = carpeta_privada("rcv_cache_lectura")
+LIMITE_CACHE_LECTURA_MB = 2048
+EDAD_MAXIMA_CACHE_LECTURA_HORAS = 72
+
+# --- LECTURA POR BLOQUES ---
+FILAS_POR_BLOQUE = 20000
+
+
+# --- ORIGEN DEL ARCHIVO: RUTA O BUFFER EN MEMORIA ---
+NOMBRE_EN_MEMORIA = "archivo_en_memoria"
+
+
+class _LectorMemoria(io.RawIOBase):
+    """Archivo de solo lectura sobre un memoryview: las lecturas no copian el buffer completo"""
+
+    def __init__(self, datos):
+        self._datos = memoryview(datos).cast("B")
+        self._posicion = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._posicion
+
+    def seek(self, posicion, desde=io.SEEK_SET):
+        if desde == io.SEEK_CUR:
+            posicion += self._posicion
+        elif desde == io.SEEK_END:
+            posicion += len(self._datos)
+        if posicion < 0:
+            raise ValueError(f"Posición inválida: {posicion}")
+        self._posicion = posicion
+        return posicion
+
+    def readinto(self, destino):
+        fragmento = self._datos[self._posicion:self._posicion + len(destino)]
+        leidos = len(fragmento)
+        destino[:leidos] = fragmento
+        self._posicion += leidos
+        return leidos
+
+
+def es_ruta(archivo):
+    return isinstance(archivo, (str, os.PathLike))
+
+
+def nombre_origen(archivo):
+    """Ruta del archivo, o el nombre del buffer (atributo name) si está en memoria"""
+    if es_ruta(archivo):
+        return os.fspath(archivo)
+    return getattr(archivo, "name", None) or NOMBRE_EN_MEMORIA
+
+
+def _buffer_origen(archivo):
+    """memoryview del contenido de un origen en memoria"""
+    if isinstance(archivo, (bytes, bytearray, memoryview)):
+        return memoryview(archivo)
+    if hasattr(archivo, "getbuffer"):
+        # BytesIO / UploadedFile: vista sobre su buffer interno, sin copiarlo
+        return archivo.getbuffer()
+    # Otro objeto tipo archivo (sin buffer accesible): se lee su contenido
+    if hasattr(archivo, "seek"):
+        archivo.seek(0)
+    return memoryview(archivo.read())
+
+
+def abrir_origen(archivo):
+    """
+    Fuente de lectura para pandas/openpyxl/pyxlsb.
+
+    Las rutas se devuelven tal cual. Para un origen en memoria se devuelve un
+    lector nuevo (posición 0) sobre su memoryview, así el mismo origen se
+    puede leer varias veces y desde varios hilos.
+    """
+    if es_ruta(archivo):
+        return archivo
+    return _LectorMemoria(_buffer_origen(archivo))
+
+
+def huella_origen(archivo):
+    """SHA-256 del contenido (ruta o buffer en memoria)"""
+    if es_ruta(archivo):
+        return hash_archivo(archivo)
+    vista = _buffer_origen(archivo)
+    try:
+        return hash_bytes(vista)
+    finally:
+        vista.release()
+
+
+def _extension_por_contenido(archivo):
+    """Extensión de un origen en memoria sin nombre, según las partes del ZIP"""
+    try:
+        with zipfile.ZipFile(abrir_origen(archivo)) as libro:
+            partes = set(libro.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return None
+    if "xl/workbook.bin" in partes:
+        return ".xlsb"
+    if "xl/workbook.xml" in partes:
+        return ".xlsx"
+    return None
+
+
+def extension_origen(archivo):
+    """Extensión del archivo (en minúsculas); en memoria, por el nombre o por el contenido"""
+    ext = os.path.splitext(nombre_origen(archivo))[1].lower()
+    if ext or es_ruta(archivo):
+        return ext
+    return _extension_por_contenido(archivo) or ""
+
+
+def detectar_engine(archivo):
+    """Detecta el engine necesario según la extensión del archivo"""
+    ext = extension_origen(archivo)
+    if ext == ".xlsb":
+        try:
+            import pyxlsb  # noqa: F401
+            return "pyxlsb"
+        except ImportError:
+            print("Falta pyxlsb. Instalar con: pip install pyxlsb")
+            return None
+    if ext == ".xlsx":
+        return "openpyxl"
+    return None
+
+
+@lru_cache(maxsize=None)
+def _version_lectura():
+    """SHA-256 (abreviado) de este módulo: cambia si cambia cómo se lee el Excel"""
+    return hash_archivo(os.path.abspath(__file__))[:12]
+
+
+def _ruta_sidecar(huella, filas_a_saltar, carpeta_cache):
+    # La versión de pandas y la del lector son parte de la clave: el DataFrame
+    # guardado depende de ambas
+    return os.path.join(
+        carpeta_cache,
+        f"{huella}_{filas_a_saltar}_pd{pd.__version__}_{_version_lectura()}.pkl",
+    )
+
+
+def leer_libro(archivo, filas_a_saltar=1, usar_cache=True, carpeta_cache=CARPETA_CACHE_LECTURA):
+    """
+    Lee encabezados (primera fila) y datos del archivo abriéndolo una sola vez.
+
+    Args:
+        archivo: Ruta del archivo Excel o su contenido en memoria (ver abrir_origen)
+        filas_a_saltar: Filas a omitir antes de los datos (por defecto 1 = encabezado)
+        usar_cache: Si es True busca/guarda el resultado en el caché por contenido
+        carpeta_cache: Carpeta del caché columnar
+
+    Returns:
+        tuple: (encabezados, df). Si falla la lectura de encabezados retorna
+        ([], None); si fallan los datos retorna (encabezados, None).
+    """
+    ruta_sidecar = None
+    if usar_cache and (not es_ruta(archivo) or os.path.exists(archivo)):
+        try:
+            ruta_sidecar = _ruta_sidecar(huella_origen(archivo), filas_a_saltar, carpeta_cache)
+        except OSError as e:
+            print(f"No se pudo calcular el hash de {nombre_origen(archivo)}: {e}")
+        else:
+            en_cache = cargar_pickle(ruta_sidecar)
+            if en_cache is not None:
+                print(f"  Leído desde caché columnar: {os.path.basename(nombre_origen(archivo))}")
+                return en_cache
+
+    encabezados, df = _leer_excel(archivo, filas_a_saltar)
+
+    if ruta_sidecar and df is not None:
+        if guardar_pickle((encabezados, df), ruta_sidecar):
+            podar_cache(
+                carpeta_cache,
+                max_bytes=LIMITE_CACHE_LECTURA_MB * 1024 * 1024,
+                max_edad_segundos=EDAD_MAXIMA_CACHE_LECTURA_HORAS * 3600,
+            )
+    return encabezados, df
+
+
+def _leer_excel(archivo, filas_a_saltar):
+    """Lectura del Excel sin caché (ver leer_libro)"""
+    engine = detectar_engine(archivo)
+    if not engine:
+        return [], None
+
+    try:
+        libro = pd.ExcelFile(abrir_origen(archivo), engine=engine)
+    except Exception as e:
+        print(f"Error al abrir archivo: {e}")
+        return [], None
+
+    with libro:
+        # El libro ya está cargado: ambas lecturas reutilizan el mismo objeto
+        try:
+            df_headers = libro.parse(0, header=None, skiprows=0, nrows=1)
+            encabezados = df_headers.iloc[0].tolist()
+        except Exception as e:
+            print(f"Error al leer encabezados: {e}")
+            return [], None
+
+        try:
+            df = libro.parse(0, header=None, skiprows=filas_a_saltar)
+        except Exception as e:
+            print(f"Error al leer datos: {e}")
+            return encabezados, None
+
+    return encabezados, df
+
+
+# --- LECTURA POR BLOQUES ---
+
+def _convertir_celda_openpyxl(celda):
+    """Igual que el lector openpyxl de pandas: vacío → "", error → NaN, 3.0 → 3"""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if celda.value is None:
+        return ""
+    if celda.data_type == TYPE_ERROR:
+        return np.nan
+    if celda.data_type == TYPE_NUMERIC:
+        entero = int(celda.value)
+        return entero if entero == celda.value else float(celda.value)
+    return celda.value
+
+
+def _filas_openpyxl(archivo):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(abrir_origen(archivo), read_only=True, data_only=True, keep_links=False)
+    try:
+        hoja = libro.worksheets[0]
+        hoja.reset_dimensions()
+        for fila in hoja.rows:
+            yield [_convertir_celda_openpyxl(celda) for celda in fila]
+    finally:
+        libro.close()
+
+
+def _convertir_celda_pyxlsb(celda):
+    """Igual que el lector pyxlsb de pandas"""
+    if celda.v is None:
+        return ""
+    if isinstance(celda.v, float):
+        entero = int(celda.v)
+        return entero if entero == celda.v else float(celda.v)
+    return celda.v
+
+
+def _filas_pyxlsb(archivo):
+    from pyxlsb import open_workbook
+
+    with open_workbook(abrir_origen(archivo)) as libro:
+        with libro.get_sheet(1) as hoja:
+            anterior = -1
+            # Modo sparse: las filas vacías no se entregan, se reponen aquí
+            for fila in hoja.rows(sparse=True):
+                numero = fila[0].r
+                for _ in range(numero - anterior - 1):
+                    yield []
+                anterior = numero
+                yield [_convertir_celda_pyxlsb(celda) for celda in fila]
+
+
+def _filas_libro(archivo, engine):
+    """Filas de la primera hoja como listas, sin las celdas vacías del final"""
+    filas = _filas_openpyxl(archivo) if engine == "openpyxl" else _filas_pyxlsb(archivo)
+    for fila in filas:
+        while fila and fila[-1] == "":
+            fila.pop()
+        yield fila
+
+
+def _parsear_filas(filas, ancho, tipos_objeto=()):
+    """Convierte filas a DataFrame con la misma inferencia de tipos de pd.read_excel"""
+    filas = [fila + [""] * (ancho - len(fila)) for fila in filas]
+    return TextParser(
+        filas,
+        header=None,
+        skip_blank_lines=False,
+        dtype={indice: object for indice in tipos_objeto} or None,
+    ).read()
+
+
+def _clase_tipo(serie):
+    """Clase de tipo de una columna de un bloque (None si está vacía)"""
+    if serie.isna().all():
+        return None
+    tipo = serie.dtype.kind
+    if tipo in "iu":
+        return "entero"
+    if tipo == "f":
+        return "decimal"
+    if tipo == "b":
+        return "booleano"
+    if tipo == "M":
+        return "fecha"
+    return "objeto"
+
+
+def _tipo_final(clases, hay_nulos):
+    """
+    Tipo que tendría la columna si se leyera completa, a partir de las clases
+    de tipo de cada bloque (misma regla de pd.read_excel: los booleanos son
+    numéricos, un nulo convierte enteros/booleanos a float64 y cualquier
+    mezcla con texto u otros objetos deja la columna como object).
+    """
+    if not clases:
+        return "float64"
+    if clases <= {"entero", "decimal", "booleano"}:
+        if "decimal" in clases or hay_nulos:
+            return "float64"
+        return "bool" if clases == {"booleano"} else "int64"
+    if clases == {"fecha"}:
+        return "datetime64[ns]"
+    return object
+
+
+def leer_libro_por_bloques(archivo, filas_a_saltar=1, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Lee el libro por bloques de filas sin cargar todos los datos en memoria.
+
+    Se hacen dos pasadas: la primera recorre el archivo una vez, guarda cada
+    bloque de filas crudas en un archivo temporal y registra los tipos que
+    pandas infiere en cada bloque; la segunda (el iterador retornado) carga
+    los bloques de a uno y les aplica el tipo que tendría cada columna en la
+    lectura completa. Así, pd.concat de los bloques es igual a leer_libro
+    (mismos valores, tipos e índice) aunque un bloque aislado se hubiera
+    inferido distinto (ej. códigos "007" que en otro bloque conviven con texto).
+
+    Args:
+        archivo: Ruta del archivo Excel o su contenido en memoria (ver abrir_origen)
+        filas_a_saltar: Filas a omitir antes de los datos (por defecto 1 = encabezado)
+        filas_por_bloque: Filas aproximadas por bloque (un bloque solo se corta
+            en una fila con datos, para descartar las filas vacías del final)
+
+    Returns:
+        tuple: (encabezados, bloques) donde bloques es un iterador de DataFrames
+        con índice continuo. Si falla la lectura de encabezados retorna
+        ([], None); si fallan los datos retorna (encabezados, None).
+    """
+    engine = detectar_engine(archivo)
+    if not engine:
+        return [], None
+
+    try:
+        filas = _filas_libro(archivo, engine)
+        primera = next(filas, None)
+    except Exception as e:
+        print(f"Error al abrir archivo: {e}")
+        return [], None
+    if not primera:
+        print("Error al leer encabezados: la primera fila está vacía")
+        return [], None
+    encabezados = _parsear_filas([primera], len(primera)).iloc[0].tolist()
+
+    try:
+        bloques = _bloques_desde_filas(primera, filas, filas_a_saltar, filas_por_bloque)
+    except Exception as e:
+        print(f"Error al leer datos: {e}")
+        return encabezados, None
+    return encabezados, bloques
+
+
+def _bloques_desde_filas(primera, filas, filas_a_saltar, filas_por_bloque):
+    """Las dos pasadas de leer_libro_por_bloques sobre filas ya convertidas (ver _filas_libro)"""
+    carpeta = tempfile.mkdtemp(prefix="rcv_bloques_")
+    try:
+        rutas, ancho, tipos = _guardar_bloques(
+            primera, filas, filas_a_saltar, filas_por_bloque, carpeta
+        )
+    except BaseException:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        raise
+    return _cargar_bloques(rutas, ancho, tipos, carpeta)
+
+
+def _guardar_bloques(primera, filas, filas_a_saltar, filas_por_bloque, carpeta):
+    """Primera pasada: bloques crudos a disco + tipo final de cada columna"""
+    rutas = []
+    ancho = 0  # pandas completa todas las filas (incluidas las saltadas) al ancho máximo
+    ancho_minimo = None
+    clases = {}
+    con_nulos = set()
+
+    def guardar(bloque):
+        nonlocal ancho, ancho_minimo
+        ruta = os.path.join(carpeta, f"bloque_{len(rutas):05d}.pkl")
+        with open(ruta, "wb") as f:
+            pickle.dump(bloque, f, protocol=pickle.HIGHEST_PROTOCOL)
+        rutas.append(ruta)
+
+        ancho_bloque = max(len(fila) for fila in bloque)
+        ancho = max(ancho, ancho_bloque)
+        ancho_minimo = ancho_bloque if ancho_minimo is None else min(ancho_minimo, ancho_bloque)
+        df = _parsear_filas(bloque, ancho_bloque)
+        for indice in range(ancho_bloque):
+            serie = df.iloc[:, indice]
+            clase = _clase_tipo(serie)
+            if clase:
+                clases.setdefault(indice, set()).add(clase)
+            if serie.isna().any():
+                con_nulos.add(indice)
+
+    bloque = []
+    numero = 0
+    for fila in _con_primera(primera, filas):
+        numero += 1
+        if numero <= filas_a_saltar:
+            ancho = max(ancho, len(fila))
+            continue
+        bloque.append(fila)
+        # Cortar solo en una fila con datos: las filas vacías pendientes pasan al
+        # siguiente bloque y, si son las últimas del archivo, se descartan
+        if len(bloque) >= filas_por_bloque and fila:
+            guardar(bloque)
+            bloque = []
+    while bloque and not bloque[-1]:
+        bloque.pop()
+    if bloque:
+        guardar(bloque)
+
+    # Donde un bloque es más angosto que el archivo, sus filas se completan con nulos
+    if ancho_minimo is not None:
+        con_nulos.update(range(ancho_minimo, ancho))
+
+    tipos = {
+        indice: _tipo_final(clases.get(indice, set()), indice in con_nulos)
+        for indice in range(ancho)
+    }
+    return rutas, ancho, tipos
+
+
+def _con_primera(primera, filas):
+    yield primera
+    yield from filas
+
+
+def _unificar_numeros(valores, memo):
+    """
+    En columnas object, pandas deja un único objeto por valor igual (dict interno):
+    1, 1.0 y True quedan como el primero que aparece en la columna. memo guarda
+    ese primero entre bloques (solo números y booleanos, los únicos que chocan).
+    """
+    for i, valor in enumerate(valores):
+        if valor.__class__ in _TIPOS_NUMERICOS and valor == valor:
+            primero = memo.setdefault(valor, valor)
+            if primero is not valor:
+                valores[i] = primero
+
+
+_TIPOS_NUMERICOS = (bool, int, float)
+
+
+def _cargar_bloques(rutas, ancho, tipos, carpeta):
+    """Segunda pasada: carga cada bloque y lo convierte a los tipos finales"""
+    tipos_objeto = [indice for indice, tipo in tipos.items() if tipo is object]
+    memos = {indice: {} for indice in tipos_objeto}
+    inicio = 0
+    try:
+        for ruta in rutas:
+            with open(ruta, "rb") as f:
+                bloque = pickle.load(f)
+            os.remove(ruta)
+
+            df = _parsear_filas(bloque, ancho, tipos_objeto)
+            for indice, tipo in tipos.items():
+                if tipo is object:
+                    _unificar_numeros(df[indice].to_numpy(), memos[indice])
+                elif df[indice].dtype != tipo:
+                    df[indice] = df[indice].astype(tipo)
+            df.index = pd.RangeIndex(inicio, inicio + len(df))
+            inicio += len(df)
+            yield df
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+# --- SIEMBRA DEL CACHÉ DESDE LOS ESCRITORES ---
+
+def _valor_leido(valor):
+    """
+    Valor que entrega el lector openpyxl de pandas para una celda escrita con
+    `valor` (ver escritura_lib._valores_columna): vacío → "", 3.0 → 3, fechas
+    redondeadas como las guarda Excel.
+    """
+    if valor is None:
+        return ""
+    if valor.__class__ in (str, int, bool):
+        if valor.__class__ is str and valor.startswith("="):
+            # openpyxl la escribe como fórmula: sin valor calculado se lee vacía
+            raise ValueError("celda con fórmula")
+        return valor
+    if valor.__class__ is float:
+        entero = int(valor) if valor == valor else None
+        return entero if entero == valor else valor
+    if isinstance(valor, datetime.datetime) or valor.__class__ is datetime.date:
+        return from_excel(to_excel(valor))
+    # Horas, duraciones, etc.: cada modo de escritura las guarda distinto
+    raise ValueError(f"tipo de celda sin equivalente conocido: {type(valor).__name__}")
+
+
+def _filas_leidas(filas_escritas):
+    """Filas escritas → filas como las entrega _filas_libro (sin celdas vacías al final)"""
+    for fila in filas_escritas:
+        fila = [_valor_leido(valor) for valor in fila]
+        while fila and fila[-1] == "":
+            fila.pop()
+        yield fila
+
+
+def sembrar_cache_lectura(
+    ruta, filas_escritas, filas_a_saltar=1, carpeta_cache=CARPETA_CACHE_LECTURA,
+    filas_por_bloque=FILAS_POR_BLOQUE,
+):
+    """
+    Guarda en el caché columnar lo que leer_libro obtendría de un .xlsx recién escrito.
+
+    Los escritores (escritura_lib) lo llaman con las filas de celdas que acaban
+    de escribir, encabezado incluido: así el paso siguiente de la cadena
+    (Copia → Limpieza → Validación / IPS) lee el archivo desde el caché en vez
+    de volver a parsear el Excel. Los valores pasan por la misma conversión de
+    celdas y la misma reconciliación de tipos que leer_libro_por_bloques, que
+    reproduce la lectura completa; si alguna celda no tiene equivalente seguro
+    (fórmulas, horas) no se siembra nada.
+
+    Returns:
+        bool: True si se guardó la entrada
+    """
+    try:
+        filas = _filas_leidas(filas_escritas)
+        primera = next(filas, None)
+        if not primera:
+            return False
+        encabezados = _parsear_filas([primera], len(primera)).iloc[0].tolist()
+        bloques = list(_bloques_desde_filas(primera, filas, filas_a_saltar, filas_por_bloque))
+        if not bloques:
+            return False
+        df = pd.concat(bloques) if len(bloques) > 1 else bloques[0]
+        ruta_sidecar = _ruta_sidecar(hash_archivo(ruta), filas_a_saltar, carpeta_cache)
+    except Exception as e:
+        print(f"No se sembró el caché de lectura de {os.path.basename(ruta)}: {e}")
+        return False
+
+    if not guardar_pickle((encabezados, df), ruta_sidecar):
+        return False
+    podar_cache(
+        carpeta_cache,
+        max_bytes=LIMITE_CACHE_LECTURA_MB * 1024 * 1024,
+        max_edad_segundos=EDAD_MAXIMA_CACHE_LECTURA_HORAS * 3600,
+    )
+    return True
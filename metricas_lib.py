@@ -0,0 +1,283 @@
+"""
+Métricas de ejecución del procesamiento general: tiempo, CPU y memoria por etapa.
+
+Registra, para cada etapa de una ejecución (lectura, plan por columna,
+validación, reportes, escritura):
+- segundos: tiempo transcurrido (reloj de pared)
+- cpu_segundos: tiempo de CPU del proceso (no incluye procesos hijos, ej. la
+  validación en paralelo)
+- rss_pico_mb: memoria residente máxima durante la etapa (muestreada cada
+  INTERVALO_MUESTREO_MEMORIA_S en un hilo aparte), y cuánto creció respecto
+  del inicio de la etapa (rss_pico_incremento_mb). Es la memoria del proceso:
+  en el dashboard incluye la de las otras sesiones del servidor
+- filas y filas_por_segundo
+
+y, dentro del plan por columna, el tiempo de cada paso (SINDATO, TRIM,
+rellenos, medicamentos, normalización, fechas), de cada columna y de cada
+normalizador. Una etapa que se repite (ej. por bloques) acumula sus tiempos.
+
+El total incluye rss_pico_proceso_mb: el máximo histórico del proceso (en el
+dashboard, el del servidor desde que arrancó).
+
+El costo es una lectura del reloj por paso y columna y una lectura de la
+memoria cada INTERVALO_MUESTREO_MEMORIA_S: siempre está activo.
+
+Uso:
+    metricas = Metricas(archivo="entrada.xlsx")
+    with metricas.etapa("lectura") as etapa:
+        df = ...
+        etapa["filas"] = len(df)
+    metricas.guardar("Procesamiento_General_metricas.json")
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SUFIJO_METRICAS = "_metricas.json"
+INTERVALO_MUESTREO_MEMORIA_S = 0.05
+
+
+def ruta_metricas(log_salida):
+    """Archivo de métricas junto al log: <log sin extensión>_metricas.json"""
+    return f"{os.path.splitext(log_salida)[0]}{SUFIJO_METRICAS}"
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso (MB); None si no se puede medir"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+
+
+def rss_pico_proceso_mb():
+    """Memoria residente máxima del proceso desde que arrancó (MB); None si no se puede medir"""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB; macOS, bytes
+        return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memoria = psutil.Process().memory_info()
+    return round(getattr(memoria, "peak_wset", memoria.rss) / (1024 * 1024), 1)
+
+
+class MuestreadorMemoria:
+    """Hilo que lee la memoria residente cada `intervalo` segundos y guarda el máximo"""
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO_MEMORIA_S):
+        self.intervalo = intervalo
+        self.inicial = rss_actual_mb()
+        self.pico = self.inicial
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        if self.inicial is None:
+            return
+        self._hilo = threading.Thread(target=self._muestrear, name="muestreador_memoria", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Detiene el muestreo; retorna (memoria al iniciar, máximo) en MB o (None, None)"""
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._registrar()
+        return self.inicial, self.pico
+
+    def _registrar(self):
+        actual = rss_actual_mb()
+        if actual is not None and actual > self.pico:
+            self.pico = actual
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            self._registrar()
+
+
+def _por_segundo(filas, segundos):
+    if not filas or not segundos:
+        return None
+    return round(filas / segundos, 1)
+
+
+class Metricas:
+    """Acumula las métricas de una ejecución (ver docstring del módulo)"""
+
+    def __init__(self, **datos):
+        self.datos = {
+            "inicio": datetime.now().isoformat(timespec="seconds"),
+            **datos,
+        }
+        self.etapas = {}
+        self.pasos = {}
+        self.columnas = {}
+        self.normalizadores = {}
+        self._inicio = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+
+    @contextmanager
+    def etapa(self, nombre, filas=None):
+        """
+        Mide el bloque como la etapa `nombre`.
+
+        Entrega un dict donde se puede indicar las filas procesadas si no se
+        conocían al empezar (etapa["filas"] = n).
+        """
+        extra = {"filas": filas}
+        memoria = MuestreadorMemoria()
+        memoria.iniciar()
+        inicio = time.perf_counter()
+        inicio_cpu = time.process_time()
+        try:
+            yield extra
+        finally:
+            segundos = time.perf_counter() - inicio
+            cpu_segundos = time.process_time() - inicio_cpu
+            rss_inicial, rss_pico = memoria.detener()
+            self._acumular_etapa(
+                nombre, segundos, cpu_segundos, rss_inicial, rss_pico, extra["filas"]
+            )
+
+    def medir_iteracion(self, nombre, iterable):
+        """Recorre iterable midiendo como etapa `nombre` solo el tiempo de obtener cada elemento"""
+        iterador = iter(iterable)
+        while True:
+            with self.etapa(nombre) as etapa:
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    return
+                etapa["filas"] = len(elemento) if hasattr(elemento, "__len__") else None
+            yield elemento
+
+    def _acumular_etapa(self, nombre, segundos, cpu_segundos, rss_inicial, rss_pico, filas):
+        registro = self.etapas.setdefault(
+            nombre,
+            {"segundos": 0.0, "cpu_segundos": 0.0, "filas": None,
+             "rss_pico_mb": None, "rss_pico_incremento_mb": None},
+        )
+        registro["segundos"] += segundos
+        registro["cpu_segundos"] += cpu_segundos
+        if filas is not None:
+            registro["filas"] = (registro["filas"] or 0) + filas
+        # Una etapa repetida (por bloques) guarda el máximo de sus repeticiones
+        if rss_pico is not None:
+            registro["rss_pico_mb"] = max(registro["rss_pico_mb"] or 0, rss_pico)
+            registro["rss_pico_incremento_mb"] = round(
+                max(registro["rss_pico_incremento_mb"] or 0.0, rss_pico - rss_inicial), 1
+            )
+
+    def agregar_paso(self, nombre_paso, indice, segundos, filas, normalizador=None):
+        """Registra un paso del plan aplicado a una columna (ver plan_columnas_lib.ejecutar_plan)"""
+        paso = self.pasos.setdefault(nombre_paso, {"segundos": 0.0, "columnas": 0, "filas": 0})
+        paso["segundos"] += segundos
+        paso["columnas"] += 1
+        paso["filas"] += filas
+
+        columna = self.columnas.setdefault(indice, {})
+        columna[nombre_paso] = columna.get(nombre_paso, 0.0) + segundos
+
+        if normalizador:
+            clave = (normalizador, indice)
+            self.normalizadores[clave] = self.normalizadores.get(clave, 0.0) + segundos
+
+    def como_dict(self):
+        """Métricas listas para JSON (tiempos redondeados a milisegundos)"""
+        etapas = [
+            {
+                "etapa": nombre,
+                "segundos": round(registro["segundos"], 3),
+                "cpu_segundos": round(registro["cpu_segundos"], 3),
+                "filas": registro["filas"],
+                "filas_por_segundo": _por_segundo(registro["filas"], registro["segundos"]),
+                "rss_pico_mb": registro["rss_pico_mb"],
+                "rss_pico_incremento_mb": registro["rss_pico_incremento_mb"],
+            }
+            for nombre, registro in self.etapas.items()
+        ]
+        pasos = [
+            {
+                "paso": nombre,
+                "segundos": round(paso["segundos"], 3),
+                "columnas": paso["columnas"],
+                "filas_por_segundo": _por_segundo(paso["filas"], paso["segundos"]),
+            }
+            for nombre, paso in self.pasos.items()
+        ]
+        columnas = sorted(
+            (
+                {
+                    "indice": indice,
+                    "segundos": round(sum(tiempos.values()), 3),
+                    "pasos": {paso: round(s, 3) for paso, s in tiempos.items()},
+                }
+                for indice, tiempos in self.columnas.items()
+            ),
+            key=lambda c: -c["segundos"],
+        )
+        normalizadores = sorted(
+            (
+                {"normalizador": nombre, "indice": indice, "segundos": round(segundos, 3)}
+                for (nombre, indice), segundos in self.normalizadores.items()
+            ),
+            key=lambda n: -n["segundos"],
+        )
+        return {
+            **self.datos,
+            "total": {
+                "segundos": round(time.perf_counter() - self._inicio, 3),
+                "cpu_segundos": round(time.process_time() - self._inicio_cpu, 3),
+                "rss_pico_proceso_mb": rss_pico_proceso_mb(),
+            },
+            "etapas": etapas,
+            "pasos_plan": pasos,
+            "columnas": columnas,
+            "normalizadores": normalizadores,
+        }
+
+    def resumen(self):
+        """Líneas de texto con el tiempo de cada etapa (para consola y log)"""
+        datos = self.como_dict()
+        lineas = []
+        for etapa in datos["etapas"]:
+            linea = f"{etapa['etapa']}: {etapa['segundos']:.2f} s"
+            if etapa["filas_por_segundo"]:
+                linea += f" ({etapa['filas_por_segundo']:.0f} filas/s)"
+            if etapa["rss_pico_mb"] is not None:
+                linea += f", pico {etapa['rss_pico_mb']:.0f} MB"
+            lineas.append(linea)
+        linea = f"total: {datos['total']['segundos']:.2f} s"
+        if datos["total"]["rss_pico_proceso_mb"] is not None:
+            linea += f", pico del proceso {datos['total']['rss_pico_proceso_mb']:.0f} MB"
+        lineas.append(linea)
+        return lineas
+
+    def guardar(self, ruta):
+        """Escribe las métricas en JSON; retorna la ruta o None si falla"""
+        try:
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(self.como_dict(), f, ensure_ascii=False, indent=2, default=str)
+        except OSError as e:
+            print(f"No se pudieron guardar las métricas en {ruta}: {e}")
+            return None
+        return ruta
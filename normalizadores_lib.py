@@ -8,22 +8,88 @@ Para referencia:
   - Columna K (11 en Excel) = índice 10
   - Columna M (13 en Excel) = índice 12
 """
+import os
 import pandas as pd
-import unicodedata
 import re
+import weakref
 import numpy as np
 
+from reglas_normalizacion_lib import cargar_reglas
+from texto_lib import plegar_texto
+
 
 def normalizar_texto(texto):
     """Quita tildes, pasa a minúsculas, elimina espacios extra"""
-    if not isinstance(texto, str):
-        return ""
-    texto = unicodedata.normalize("NFKD", texto)
-    texto = "".join([c for c in texto if not unicodedata.combining(c)])
-    texto = texto.lower()
-    texto = re.sub(r"\s+", " ", texto)
-    texto = texto.strip()
-    return texto
+    return plegar_texto(texto)
+
+
+# Resultados por función normalizadora: {(tipo, valor): resultado}.
+# Se comparte entre columnas que usan la misma función (ej. las 12 columnas
+# de "control realizado por"); se vacía al terminar cada procesamiento
+# (liberar_cache_normalizadores) o cuando la función deja de existir.
+_CACHE_NORMALIZADORES = weakref.WeakKeyDictionary()
+
+
+def liberar_cache_normalizadores():
+    """Vacía los resultados memorizados por _normalizar_valores_unicos"""
+    _CACHE_NORMALIZADORES.clear()
+
+
+def _normalizar_valores_unicos(col, func_normalizar):
+    """
+    Aplica func_normalizar una sola vez por valor distinto de la columna.
+
+    Los valores se agrupan por (valor, tipo) para no mezclar 1, 1.0 y True
+    (ni 0.0 y -0.0), que son iguales en Python pero producen textos distintos
+    con str().
+
+    Returns:
+        array object con el resultado para cada fila
+    """
+    valores = col.to_numpy(dtype=object)
+    if len(valores) == 0:
+        return valores
+
+    codigos_valor, _ = pd.factorize(valores)  # nulos → -1
+    tipos_fila = pd.Series(valores, dtype=object).map(type)
+    codigos_tipo, tipos = pd.factorize(tipos_fila)
+
+    # -0.0 == 0.0 para el hash: se le asigna un código de tipo propio
+    cero_negativo = np.zeros(len(valores), dtype=bool)
+    es_float = tipos_fila.isin((float, np.float64)).to_numpy()
+    if es_float.any():
+        flotantes = valores[es_float].astype(float)
+        cero_negativo[es_float] = (flotantes == 0) & np.signbit(flotantes)
+        codigos_tipo[cero_negativo] = len(tipos)
+
+    grupos, _ = pd.factorize(codigos_valor * (len(tipos) + 1) + codigos_tipo)
+    _, primeros = np.unique(grupos, return_index=True)
+
+    cache = _CACHE_NORMALIZADORES.setdefault(func_normalizar, {})
+    resultados = np.empty(len(primeros), dtype=object)
+    for grupo, pos in enumerate(primeros):
+        valor = valores[pos]
+        if codigos_valor[pos] == -1:
+            clave = (type(valor), None)
+        elif cero_negativo[pos]:
+            clave = (float, "-0.0")
+        else:
+            clave = (type(valor), valor)
+        try:
+            if clave not in cache:
+                cache[clave] = func_normalizar(valor)
+            resultados[grupo] = cache[clave]
+        except TypeError:
+            resultados[grupo] = func_normalizar(valor)
+
+    return resultados[grupos]
+
+
+def normalizar_serie(col, func_normalizar):
+    """Aplica func_normalizar a una columna (una vez por valor distinto)"""
+    return pd.Series(
+        _normalizar_valores_unicos(col, func_normalizar), index=col.index, name=col.name
+    )
 
 
 def _aplicar_normalizacion(df, indice, func_normalizar):
@@ -31,12 +97,12 @@ def _aplicar_normalizacion(df, indice, func_normalizar):
     if indice < 0 or indice >= len(df.columns):
         return df
     
-    # Aplicar normalización y convertir a valores numpy para asignación segura
-    col_normalizada = df.iloc[:, indice].apply(func_normalizar)
+    # Normalizar cada valor distinto una sola vez y mapear el resultado a las filas
+    col_normalizada = _normalizar_valores_unicos(df.iloc[:, indice], func_normalizar)
     
-    # Asignar usando .values para evitar problemas de dtype
+    # Asignar el array numpy para evitar problemas de dtype
     col_orig = df.columns[indice]
-    df[col_orig] = col_normalizada.values
+    df[col_orig] = col_normalizada
     
     return df
 
@@ -48,6 +114,46 @@ INDICES_SINDATO = [2, 19, 34, 39, 41, 60, 69, 77, 78, 79, 118, 121, 122, 124]
 INDICES_MEDICAMENTOS = [110, 111, 112, 113, 114, 115, 116]
 
 
+VARIANTES_SIN_DATO = ('SIN DATO', 'SIN DATOS', 'SIN_DATO', 'SINDATO')
+
+
+def _es_variante_sin_dato(valor):
+    """True si el texto es alguna variante de 'SIN DATO' (mayúsculas, espacios, guion bajo)"""
+    valor_upper = str(valor).strip().upper()
+    # Normalizar espacios múltiples
+    valor_upper = re.sub(r'\s+', ' ', valor_upper)
+    return valor_upper in VARIANTES_SIN_DATO
+
+
+def _mascara_textos_unicos(col, condicion):
+    """
+    Evalúa condicion(texto) una vez por texto distinto de la columna.
+
+    Returns:
+        (mascara por fila, hay_textos): la máscara es False para nulos y no-textos
+    """
+    codigos, unicos = pd.factorize(col.to_numpy(dtype=object))
+    es_texto = np.fromiter((isinstance(v, str) for v in unicos), dtype=bool, count=len(unicos))
+    cumple = np.fromiter(
+        (t and condicion(v) for v, t in zip(unicos, es_texto)), dtype=bool, count=len(unicos)
+    )
+    # Nulos (código -1) → última posición (False)
+    mascara = np.append(cumple, False)[codigos]
+    return mascara, bool(es_texto.any())
+
+
+def sin_dato_serie(col):
+    """Versión para una columna de normalizar_variantes_sin_dato (solo cambia textos)"""
+    if col.dtype != object:
+        return col
+    mascara, _ = _mascara_textos_unicos(col, _es_variante_sin_dato)
+    if not mascara.any():
+        return col
+    valores = col.to_numpy(dtype=object).copy()
+    valores[mascara] = 'SINDATO'
+    return pd.Series(valores, index=col.index, name=col.name)
+
+
 def normalizar_variantes_sin_dato(df):
     """
     PASO 1 (PRIMERO): Normaliza TODAS las variantes de 'SIN DATO' a 'SINDATO' en TODO el DataFrame.
@@ -62,27 +168,11 @@ def normalizar_variantes_sin_dato(df):
     Returns:
         DataFrame con todas las variantes de 'SIN DATO' convertidas a 'SINDATO'
     """
-    def convertir_sin_dato(valor):
-        if pd.isna(valor):
-            return valor
-        
-        valor_str = str(valor).strip()
-        valor_upper = valor_str.upper()
-        
-        # Normalizar espacios múltiples
-        valor_upper = re.sub(r'\s+', ' ', valor_upper)
-        
-        # Convertir todas las variantes de SIN DATO a SINDATO
-        if valor_upper in ('SIN DATO', 'SIN DATOS', 'SIN_DATO', 'SINDATO'):
-            return 'SINDATO'
-        
-        return valor
-    
     # Aplicar a todas las columnas
     df_procesado = df.copy()
     for col_idx in range(len(df_procesado.columns)):
         try:
-            df_procesado.iloc[:, col_idx] = df_procesado.iloc[:, col_idx].apply(convertir_sin_dato)
+            df_procesado.iloc[:, col_idx] = sin_dato_serie(df_procesado.iloc[:, col_idx])
         except Exception:
             pass
     
@@ -90,6 +180,19 @@ def normalizar_variantes_sin_dato(df):
     return df_procesado
 
 
+def rellenar_sindato_serie(col):
+    """Rellena con "SINDATO" los nulos y textos vacíos de una columna"""
+    # Rellenar NaN con SINDATO
+    col_rellena = col.fillna("SINDATO")
+    
+    # Rellenar cadenas vacías con SINDATO (solo si es de tipo object)
+    if col.dtype == 'object':
+        col_rellena = col_rellena.astype(str)
+        col_rellena = col_rellena.where(col_rellena.str.strip() != '', "SINDATO")
+    
+    return col_rellena
+
+
 def rellenar_sindato_columnas(df, indices_columnnas=None):
     """
     Rellena con "SINDATO" los valores vacíos en columnas de texto especificadas.
@@ -111,23 +214,7 @@ def rellenar_sindato_columnas(df, indices_columnnas=None):
             continue
         
         try:
-            col = df.iloc[:, indice]
-            
-            # Contar valores vacíos antes de rellenar
-            vacios_antes = col.isna().sum()
-            vacios_str = (col.astype(str).str.strip() == '').sum() if col.dtype == 'object' else 0
-            total_vacios = max(vacios_antes, vacios_str)
-            
-            # Rellenar NaN con SINDATO
-            col_rellena = col.fillna("SINDATO")
-            
-            # Rellenar cadenas vacías con SINDATO (solo si es de tipo object)
-            if col.dtype == 'object':
-                col_rellena = col_rellena.astype(str).apply(
-                    lambda x: "SINDATO" if x.strip() == '' else x
-                )
-            
-            df[df.columns[indice]] = col_rellena.values
+            df[df.columns[indice]] = rellenar_sindato_serie(df.iloc[:, indice]).values
             columnas_procesadas += 1
         except Exception:
             # Si falla, continuar con la siguiente columna
@@ -137,6 +224,47 @@ def rellenar_sindato_columnas(df, indices_columnnas=None):
     return df
 
 
+def rellenar_medicamentos_serie(col):
+    """
+    Rellena con "SINDATO" los vacíos y ceros de una columna de medicamentos.
+
+    Returns:
+        tuple: (columna procesada, cantidad de vacíos + ceros reemplazados)
+    """
+    # Contar valores vacíos
+    vacios = col.isna().sum()
+    
+    # Contar valores que son 0 en diferentes formatos
+    cero_mask = (
+        col.astype(str)
+        .str.strip()
+        .str.replace(',', '.')
+        .isin(['0', '0.0', '0.00', 'nan'])
+    )
+    ceros = cero_mask.sum()
+    
+    # Reemplazar espacios vacíos por NaN
+    col_procesada = col.replace(r'^\s*$', pd.NA, regex=True)
+    
+    # Reemplazar valores cero por NaN
+    col_procesada = col_procesada.replace({
+        0: pd.NA,
+        0.0: pd.NA,
+        '0': pd.NA,
+        '0.0': pd.NA,
+        '0.00': pd.NA,
+        '0,0': pd.NA,
+        '0,00': pd.NA,
+        'nan': pd.NA,
+        'NaN': pd.NA,
+        'NAN': pd.NA
+    })
+    
+    # Rellenar todos los NaN con SINDATO
+    col_procesada = col_procesada.fillna('SINDATO')
+    return col_procesada, vacios + ceros
+
+
 def rellenar_medicamentos_sindato(df, indices_medicamentos=None):
     """
     Rellena con "SINDATO" los valores vacíos Y valores "0" en columnas de medicamentos.
@@ -159,43 +287,10 @@ def rellenar_medicamentos_sindato(df, indices_medicamentos=None):
             continue
         
         try:
-            col = df.iloc[:, indice]
-            
-            # Contar valores vacíos
-            vacios = col.isna().sum()
-            
-            # Contar valores que son 0 en diferentes formatos
-            cero_mask = (
-                col.astype(str)
-                .str.strip()
-                .str.replace(',', '.')
-                .isin(['0', '0.0', '0.00', 'nan'])
-            )
-            ceros = cero_mask.sum()
-            
-            # Reemplazar espacios vacíos por NaN
-            col_procesada = col.replace(r'^\s*$', pd.NA, regex=True)
-            
-            # Reemplazar valores cero por NaN
-            col_procesada = col_procesada.replace({
-                0: pd.NA,
-                0.0: pd.NA,
-                '0': pd.NA,
-                '0.0': pd.NA,
-                '0.00': pd.NA,
-                '0,0': pd.NA,
-                '0,00': pd.NA,
-                'nan': pd.NA,
-                'NaN': pd.NA,
-                'NAN': pd.NA
-            })
-            
-            # Rellenar todos los NaN con SINDATO
-            col_procesada = col_procesada.fillna('SINDATO')
-            
+            col_procesada, reemplazos = rellenar_medicamentos_serie(df.iloc[:, indice])
             df[df.columns[indice]] = col_procesada.values
             columnas_procesadas += 1
-            total_reemplazos += vacios + ceros
+            total_reemplazos += reemplazos
         except Exception as e:
             # Si falla, continuar con la siguiente columna
             print(f"  ⚠ Error en columna {indice}: {e}")
@@ -206,277 +301,106 @@ def rellenar_medicamentos_sindato(df, indices_medicamentos=None):
 
 
 # --- NORMALIZADORES POR COLUMNA ---
+# Las reglas de cada normalizador están en normalizaciones_config.json y se
+# compilan con reglas_normalizacion_lib; las normalizar_columna_* las aplican
+# al DataFrame por nombre de normalizador.
+
+REGLAS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "normalizaciones_config.json")
+
+try:
+    NORMALIZADORES, NORMALIZADORES_POR_COLUMNA = cargar_reglas(REGLAS_JSON)
+except (OSError, ValueError) as e:
+    # El módulo se puede importar igual; procesar_general informa el error al procesar
+    print(e)
+    NORMALIZADORES, NORMALIZADORES_POR_COLUMNA = {}, {}
+
+
+def _aplicar_regla(df, indice, nombre_normalizador):
+    """Aplica el normalizador compilado nombre_normalizador (si existe) a la columna"""
+    func_normalizar = NORMALIZADORES.get(nombre_normalizador)
+    if func_normalizar is None:
+        return df
+    return _aplicar_normalizacion(df, indice, func_normalizar)
+
 
 def normalizar_columna_k(df, indice=10):
     """Columna K (11): SEXO - Normaliza FEMENINO/MASCULINO a formato title"""
-    def normalizar_sexo(valor):
-        val = str(valor).strip().upper()
-        if val == "FEMENINO":
-            return "Femenino"
-        if val == "MASCULINO":
-            return "Masculino"
-        return str(valor)
-    
-    return _aplicar_normalizacion(df, indice, normalizar_sexo)
+    return _aplicar_regla(df, indice, "sexo")
 
 
 def normalizar_columna_m(df, indice=12):
     """Columna M (13): PERTENENCIA ÉTNICA"""
-    def normalizar_etnia(valor):
-        t = normalizar_texto(str(valor))
-        if any(x in t for x in ["negro", "afro", "mulato"]):
-            return "Negro (a), Mulato, Afroamericano"
-        if "indigena" in t:
-            return "Indígena"
-        if "rom" in t or "gitano" in t:
-            return "ROM (Gitano)"
-        if "raizal" in t:
-            return "Raizal del Archipielago"
-        if "mestizo" in t:
-            return "Mestizo"
-        if "ninguna" in t or "ningunas" in t:
-            return "Ningunas de las Anteriores"
-        return "Ningunas de las Anteriores"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_etnia)
+    return _aplicar_regla(df, indice, "etnia")
 
 
 def normalizar_columna_n(df, indice=13):
     """Columna N (14): GRUPO POBLACIONAL"""
-    def normalizar_grupo(valor):
-        t = normalizar_texto(str(valor))
-        
-        if any(x in t for x in ["comunidades indigenas", "comunidad indigena"]):
-            return "Comunidades Indiginas"
-        if "discapacitados" in t:
-            return "Discapacitados"
-        if any(x in t for x in ["victima", "conflicto", "armado"]):
-            return "Victimas del Conflicto Armado"
-        if "desplazados" in t or "desmovilizados" in t:
-            return "Desmovilizados"
-        if "adulto mayor" in t:
-            return "Adulto Mayor"
-        if any(x in t for x in ["madre", "cabeza de hogar", "madres comunitarias"]):
-            return "Mujer Cabeza de Hogar"
-        if "icbf" in t or "infantil" in t:
-            return "Población Infantil a cargo del ICBF"
-        if "embarazada" in t:
-            return "Mujer Embarazada"
-        
-        return "Otro Grupo Poblacional"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_grupo)
+    return _aplicar_regla(df, indice, "grupo_poblacional")
 
 
 def normalizar_columna_o(df, indice=14):
     """Columna O (15): ETNIA"""
-    def normalizar_etnia_especifica(valor):
-        t = normalizar_texto(str(valor))
-        
-        if "wayuu" in t or "wayu" in t:
-            return "Wayuu"
-        if "arhuaco" in t or "ika" in t:
-            return "Arhuaco"
-        if "wiwa" in t:
-            return "Wiwa"
-        if "yukpa" in t or "yuko" in t:
-            return "Yukpa"
-        if "kogui" in t or "kogi" in t:
-            return "Kogui"
-        if "inga" in t:
-            return "Inga"
-        if "kankuamo" in t:
-            return "Kankuamo"
-        if "chimila" in t:
-            return "Chimila"
-        if "zenu" in t:
-            return "Zenu"
-        
-        return "Sin Etnia"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_etnia_especifica)
+    return _aplicar_regla(df, indice, "etnia_especifica")
 
 
 def normalizar_columna_s(df, indice=18):
     """Columna S (19): ZONA DE UBICACIÓN"""
-    def normalizar_zona(valor):
-        val = str(valor).strip().upper()
-        # Convertir abreviaciones y variantes
-        if val in ["URBANA", "U", "CP"]:  # CP = Cabecera o Pueblo (Urbana)
-            return "Urbana"
-        if val in ["RURAL", "R"]:
-            return "Rural"
-        return str(valor)
-    
-    return _aplicar_normalizacion(df, indice, normalizar_zona)
+    return _aplicar_regla(df, indice, "zona")
 
 
 def normalizar_columna_y(df, indice=24):
     """Columna Y (25): FUMA"""
-    def normalizar_si_no(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1"]:
-            return "Si"
-        if t in ["no", "n", "0"]:
-            return "No"
-        return "SINDATO"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_si_no)
+    return _aplicar_regla(df, indice, "si_no_sindato")
 
 
 def normalizar_columna_z(df, indice=25):
     """Columna Z (26): CONSUMO DE ALCOHOL"""
-    def normalizar_si_no(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1"]:
-            return "Si"
-        if t in ["no", "n", "0"]:
-            return "No"
-        return "SINDATO"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_si_no)
+    return _aplicar_regla(df, indice, "si_no_sindato")
 
 
 def normalizar_columna_aa(df, indice=26):
     """Columna AA (27): DX CONFIRMADO HTA"""
-    def normalizar_si_no(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1"]:
-            return "Si"
-        if t in ["no", "n", "0"]:
-            return "No"
-        return "No"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_si_no)
+    return _aplicar_regla(df, indice, "si_no")
 
 
 def normalizar_columna_ac(df, indice=28):
     """Columna AC (29): DX CONFIRMADO DM"""
-    def normalizar_si_no(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1"]:
-            return "Si"
-        if t in ["no", "n", "0"]:
-            return "No"
-        return "No"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_si_no)
+    return _aplicar_regla(df, indice, "si_no")
 
 
 def normalizar_columna_ae(df, indice=30):
     """Columna AE (31): TIPO DE DM"""
-    def normalizar_tipo_dm(valor):
-        t = normalizar_texto(str(valor))
-
-        if "tipo 1" in t and "insulino" in t:
-            return "Tipo 1 Insulinodependiente"
-        if "tipo 2" in t and ("no insulino" in t or "no insulinodep" in t or "no dependiente" in t):
-            return "Tipo 2 No Insulinodependiente"
-        if "tipo 2" in t and "insulino" in t:
-            return "Tipo 2 Insulinodependiente"
-        if "no aplica" in t:
-            return "No Aplica"
-
-        return "No Aplica"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_tipo_dm)
+    return _aplicar_regla(df, indice, "tipo_dm")
 
 
 def normalizar_columna_af(df, indice=31):
     """Columna AF (32): ETIOLOGÍA DE LA ERC"""
-    def normalizar_etiologia(valor):
-        t = normalizar_texto(str(valor))
-        
-        if "hta" in t or "dm" in t or "diabetes" in t or "hipertension" in t:
-            return "HTA o DM"
-        if "autoinmune" in t:
-            return "Autoinmune"
-        if "obstructiv" in t or "nefropatia obstructiva" in t:
-            return "Nefropatía Obstructiva"
-        if "poliquistic" in t:
-            return "Enfermedad Poliquistica"
-        if "no tiene" in t or "sin erc" in t:
-            return "No tiene ERC"
-        
-        return "Otras"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_etiologia)
+    return _aplicar_regla(df, indice, "etiologia_erc")
 
 
 def normalizar_columna_ay(df, indice=50):
     """Columna AY (51): PARCIAL DE ORINA"""
-    def normalizar_orina(valor):
-        t = normalizar_texto(str(valor))
-        
-        if "normal" in t:
-            return "Normal"
-        if "patologic" in t or "anormal" in t:
-            return "Patologico"
-        
-        return "SINDATO"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_orina)
+    return _aplicar_regla(df, indice, "parcial_orina")
 
 
 def normalizar_columna_bk(df, indice=62):
     """Columna BK (63): DM CONTROLADA"""
-    def normalizar_si_no(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1"]:
-            return "Si"
-        if t in ["no", "n", "0"]:
-            return "No"
-        return "No"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_si_no)
+    return _aplicar_regla(df, indice, "si_no")
 
 
 def normalizar_columna_reporte_ekg(df, indice=65):
     """Columna BN (66): REPORTE DE EKG"""
-    def normalizar_ekg(valor):
-        t = normalizar_texto(str(valor))
-        
-        if "normal" in t:
-            return "Normal"
-        if "anormal" in t or "patologic" in t:
-            return "Anormal"
-        
-        return "SINDATO"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_ekg)
+    return _aplicar_regla(df, indice, "reporte_ekg")
 
 
 def normalizar_columna_ecocardiograma(df, indice=67):
     """Columna BP (68): ECOCARDIOGRAMA"""
-    def normalizar_eco(valor):
-        # Si es 0 o vacío, convertir a SINDATO
-        if pd.isna(valor) or str(valor).strip() in ['', '0', '0.0']:
-            return "SINDATO"
-            
-        t = normalizar_texto(str(valor))
-        
-        if "normal" in t:
-            return "Normal"
-        if "anormal" in t or "patologic" in t or "alterado" in t:
-            return "Anormal"
-        
-        # Para textos descriptivos médicos, convertir a "Anormal" (contiene hallazgos)
-        return "Anormal"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_eco)
+    return _aplicar_regla(df, indice, "ecocardiograma")
 
 
 def normalizar_columna_dn(df, indice=109):
     """Columna DF (110): HTA CONTROLADA"""
-    def normalizar_si_no(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1"]:
-            return "Si"
-        if t in ["no", "n", "0"]:
-            return "No"
-        return "No"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_si_no)
+    return _aplicar_regla(df, indice, "si_no")
 
 
 def normalizar_columna_w(df, indice=22):
@@ -486,22 +410,15 @@ def normalizar_columna_w(df, indice=22):
     return df
 
 
-def normalizar_columnas_aq_as(df, indices=[42, 44]):
+INDICES_CLASIFICACION_RCV = [42, 44]  # 0-indexed
+
+INDICES_CONTROL_REALIZADO_POR = [81, 83, 85, 87, 89, 91, 93, 95, 97, 99, 101, 103]  # 0-indexed
+
+
+def normalizar_columnas_aq_as(df, indices=INDICES_CLASIFICACION_RCV):
     """Columnas AQ (43), AS (45) - CLASIFICACION RCV"""
-    def normalizar_rcv(valor):
-        t = normalizar_texto(str(valor))
-        
-        if "alto" in t:
-            return "Riesgo Alto"
-        if "bajo" in t:
-            return "Riesgo Bajo"
-        if "moderado" in t or "medio" in t:
-            return "Riesgo Moderado"
-        
-        return "No se Clasifico"
-    
     for indice in indices:
-        df = _aplicar_normalizacion(df, indice, normalizar_rcv)
+        df = _aplicar_regla(df, indice, "clasificacion_rcv")
     
     return df
 
@@ -511,49 +428,55 @@ def normalizar_columnas_control_realizado_por(df, indices=None):
     Normaliza columnas de CONTROL REALIZADO POR (82,84,86,88,90,92,94,96,98,100,102,104)
     """
     if indices is None:
-        indices = [81, 83, 85, 87, 89, 91, 93, 95, 97, 99, 101, 103]  # 0-indexed
-    
-    def normalizar_control(valor):
-        t = normalizar_texto(str(valor))
-        
-        if "enfermeria" in t and "medico" in t:
-            return "MEDICO Y ENFERMERIA"
-        if "medico" in t and "internista" in t:
-            return "MEDICO INTERNISTA"
-        if "medico" in t and "general" in t:
-            return "MEDICO GENERAL"
-        if "enfermeria" in t:
-            return "ENFERMERIA"
-        if "nutricionista" in t or "nutricion" in t:
-            return "NUTRICIONISTA"
-        if "psicolog" in t:
-            return "PSICOLOGIA"
-        if "no aplica" in t or "n/a" in t:
-            return "NO APLICA"
-        
-        return "SINDATO"
+        indices = INDICES_CONTROL_REALIZADO_POR
     
     for indice in indices:
-        df = _aplicar_normalizacion(df, indice, normalizar_control)
+        df = _aplicar_regla(df, indice, "control_realizado_por")
     
     return df
 
 
 def normalizar_adherencia_tratamiento(df, indice=117):
     """Columna DN (118): ADHERENCIA AL TRATAMIENTO FARMACOLOGICO"""
-    def normalizar_adherencia(valor):
-        t = normalizar_texto(str(valor))
-        if t in ["si", "s", "1", "adherente"]:
-            return "Si"
-        if t in ["no", "n", "0", "no adherente"]:
-            return "No"
-        return "SINDATO"
-    
-    return _aplicar_normalizacion(df, indice, normalizar_adherencia)
+    return _aplicar_regla(df, indice, "adherencia")
 
 
 # --- FUNCIÓN ORQUESTADORA ---
 
+def _safe_strip(x):
+    # Solo hacemos strip si el valor es string
+    if pd.isna(x):
+        return x
+    if isinstance(x, str):
+        return x.strip()
+    return x
+
+
+def _tiene_espacios_borde(texto):
+    return texto != texto.strip()
+
+
+def trim_serie(col):
+    """
+    Aplica TRIM (strip) a los textos de una columna.
+
+    Las columnas numéricas/fecha no cambian. En columnas object con textos solo se
+    recortan los textos distintos que lo necesitan; si no hay ningún texto se usa
+    apply, que además infiere el tipo (ej. object con solo números → float64)
+    igual que antes.
+    """
+    if col.dtype != object:
+        return col
+    mascara, hay_textos = _mascara_textos_unicos(col, _tiene_espacios_borde)
+    if not hay_textos:
+        return col.apply(_safe_strip)
+    if not mascara.any():
+        return col
+    valores = col.to_numpy(dtype=object).copy()
+    valores[mascara] = [texto.strip() for texto in valores[mascara]]
+    return pd.Series(valores, index=col.index, name=col.name)
+
+
 def aplicar_trim_general(df, indices_excluir=None):
     """
     Aplica TRIM (strip) a TODAS las columnas de tipo texto/objeto excepto las excluidas.
@@ -578,18 +501,7 @@ def aplicar_trim_general(df, indices_excluir=None):
             continue
         
         try:
-            col = df.iloc[:, indice]
-            # Aplicar TRIM a todas las columnas (pandas mantendrá el tipo original)
-            # Solo hacemos strip si el valor es string
-            def safe_strip(x):
-                if pd.isna(x):
-                    return x
-                if isinstance(x, str):
-                    return x.strip()
-                return x
-            
-            col_trimmed = col.apply(safe_strip)
-            df[df.columns[indice]] = col_trimmed.values
+            df[df.columns[indice]] = trim_serie(df.iloc[:, indice]).values
             columnas_procesadas += 1
         except Exception:
             # Si falla, continuar con la siguiente columna
@@ -627,5 +539,6 @@ def aplicar_todos_normalizadores(df):
     df = normalizar_columna_dn(df, 109)
     df = normalizar_adherencia_tratamiento(df, 117)
     
+    liberar_cache_normalizadores()
     print("✓ Normalizadores específicos aplicados")
     return df
@@ -0,0 +1,194 @@
+"""
+Perfilado opcional de una ejecución (cProfile + pilas muestreadas para flamegraph).
+
+Se activa con la variable de entorno RCV_PERFIL=1 (dashboard y scripts) o con
+`python procesar_general.py --perfil`. Por cada ejecución perfilada se escriben
+en CARPETA_PERFILES, con el nombre <etiqueta>_<fecha>_<hash del archivo>:
+- .pstats: perfil determinista de cProfile (abrir con pstats, snakeviz, etc.)
+- .collapsed.txt: pilas muestreadas cada INTERVALO_MUESTREO_MS en formato
+  "marco;marco;marco cantidad" (flamegraph.pl, speedscope, inferno)
+- .txt: las funciones con más tiempo acumulado, para una revisión rápida
+
+El hash (SHA-256 del contenido, primeros caracteres) identifica el archivo
+mensual aunque cambie de nombre. En las pilas, los marcos del plan por columna
+llevan la columna y el paso en curso (ej. "ejecutar_plan[col 45 Fechas]") y
+los de normalizar_serie el normalizador aplicado, para ver qué columna de fecha
+o qué normalizador concentra el tiempo.
+
+Solo se perfila el hilo que ejecuta el proceso: la validación en paralelo
+(procesos hijos) no aparece en el perfil. En el dashboard, si dos trabajos
+corren a la vez solo el primero se perfila. Con cProfile activo el proceso corre
+más lento; los tiempos sirven para comparar funciones entre sí.
+
+Uso:
+    with perfilar("limpieza", archivo_entrada):
+        ejecutar_procesamiento_general(archivo_entrada, ...)
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from lectura_lib import huella_origen
+
+# --- CONFIGURACIÓN ---
+VARIABLE_PERFIL = "RCV_PERFIL"
+CARPETA_PERFILES = os.environ.get("RCV_CARPETA_PERFILES", "Perfiles")
+INTERVALO_MUESTREO_MS = 5
+LARGO_HUELLA = 12
+FUNCIONES_RESUMEN = 40
+
+# Un solo perfil a la vez por proceso (ver perfilar)
+_PERFIL_EN_CURSO = threading.Lock()
+
+# Variables locales que se agregan al nombre del marco en las pilas muestreadas
+ANOTACIONES_MARCOS = {
+    "ejecutar_plan": lambda variables: (
+        f"col {variables['indice']} {variables['nombre_paso']}"
+        if "indice" in variables and "nombre_paso" in variables else None
+    ),
+    "normalizar_serie": lambda variables: getattr(
+        variables.get("func_normalizar"), "__name__", None
+    ),
+}
+
+
+def perfil_activo():
+    """True si RCV_PERFIL está definida con un valor distinto de vacío/0/false"""
+    return os.environ.get(VARIABLE_PERFIL, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def _nombre_marco(marco):
+    codigo = marco.f_code
+    modulo = os.path.splitext(os.path.basename(codigo.co_filename))[0]
+    nombre = f"{modulo}:{codigo.co_name}"
+    anotar = ANOTACIONES_MARCOS.get(codigo.co_name)
+    if anotar is not None:
+        try:
+            detalle = anotar(marco.f_locals)
+        except Exception:
+            detalle = None
+        if detalle:
+            nombre = f"{nombre}[{detalle}]"
+    # ";" separa marcos en el formato colapsado
+    return nombre.replace(";", ",")
+
+
+class MuestreadorPilas:
+    """Hilo que toma la pila de otro hilo cada `intervalo` segundos y cuenta las pilas iguales"""
+
+    def __init__(self, hilo_id, intervalo=INTERVALO_MUESTREO_MS / 1000):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="muestreador_perfil", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo_id)
+            pila = []
+            while marco is not None:
+                pila.append(_nombre_marco(marco))
+                marco = marco.f_back
+            if pila:
+                self.pilas[";".join(reversed(pila))] += 1
+
+    def guardar(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            for pila, cantidad in self.pilas.most_common():
+                f.write(f"{pila} {cantidad}\n")
+        return ruta
+
+
+def _huella(archivo):
+    if archivo is None:
+        return "sin_archivo"
+    try:
+        return huella_origen(archivo)[:LARGO_HUELLA]
+    except (OSError, TypeError, AttributeError) as e:
+        print(f"No se pudo calcular el hash para el perfil: {e}")
+        return "sin_huella"
+
+
+@contextmanager
+def perfilar(etiqueta, archivo_entrada=None, carpeta=CARPETA_PERFILES, activo=None):
+    """
+    Perfila el bloque si el perfilado está activo (activo=None → perfil_activo()).
+
+    Entrega un dict que al salir contiene las rutas generadas ("pstats",
+    "pilas", "resumen"); None si no se perfila. Solo un bloque por proceso se
+    perfila a la vez (cProfile no admite dos perfiles activos desde Python
+    3.12): si ya hay uno, el bloque corre sin perfil. Un fallo del perfilador
+    nunca hace fallar el bloque.
+    """
+    if activo is None:
+        activo = perfil_activo()
+    if not activo:
+        yield None
+        return
+    if not _PERFIL_EN_CURSO.acquire(blocking=False):
+        print(f"🔬 Ya hay un perfil en curso: '{etiqueta}' se ejecuta sin perfilar")
+        yield None
+        return
+
+    base = os.path.join(
+        carpeta,
+        f"{etiqueta}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{_huella(archivo_entrada)}",
+    )
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except Exception as e:
+        # Ej. ValueError en Python >= 3.12 si otra herramienta ya está perfilando
+        _PERFIL_EN_CURSO.release()
+        print(f"🔬 No se pudo iniciar el perfil ({e}): '{etiqueta}' se ejecuta sin perfilar")
+        yield None
+        return
+    muestreador = MuestreadorPilas(threading.get_ident())
+    muestreador.iniciar()
+
+    archivos = {}
+    try:
+        yield archivos
+    finally:
+        perfil.disable()
+        muestreador.detener()
+        _PERFIL_EN_CURSO.release()
+        try:
+            os.makedirs(carpeta, exist_ok=True)
+            archivos.update(_guardar_perfil(perfil, muestreador, base))
+            print(f"🔬 Perfil guardado: {archivos['pstats']}")
+            print(f"🔬 Pilas para flamegraph: {archivos['pilas']}")
+        except Exception as e:
+            print(f"🔬 No se pudo guardar el perfil {base}: {e}")
+
+
+def _guardar_perfil(perfil, muestreador, base):
+    archivos = {
+        "pstats": f"{base}.pstats",
+        "pilas": f"{base}.collapsed.txt",
+        "resumen": f"{base}.txt",
+    }
+    perfil.dump_stats(archivos["pstats"])
+    muestreador.guardar(archivos["pilas"])
+
+    texto = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=texto)
+    estadisticas.sort_stats("cumulative").print_stats(FUNCIONES_RESUMEN)
+    estadisticas.sort_stats("tottime").print_stats(FUNCIONES_RESUMEN)
+    with open(archivos["resumen"], "w", encoding="utf-8") as f:
+        f.write(texto.getvalue())
+    return archivos
@@ -0,0 +1,172 @@
+"""
+Plan de transformaciones por columna para el procesamiento general.
+
+En lugar de recorrer el DataFrame completo una vez por paso (SINDATO, TRIM,
+rellenos, normalizadores y fechas), compilar_plan arma para cada índice de
+columna la cadena de pasos que le corresponde y ejecutar_plan procesa cada
+columna una sola vez, pasando la Series de un paso al siguiente.
+
+Los pasos y su orden son los mismos del flujo original de procesar_general:
+    1. Variantes de SIN DATO → SINDATO (todas las columnas)
+    2. TRIM (columnas NO-fecha)
+    3. Relleno con SINDATO (INDICES_SINDATO)
+    4. Relleno con SINDATO de vacíos y ceros (INDICES_MEDICAMENTOS)
+    5. Normalizador específico (NORMALIZADORES_POR_COLUMNA)
+    6. Fechas: conversión (INDICES_FECHAS) o limpieza de fechas especiales (resto)
+
+IMPORTANTE: Todos los índices en este módulo son 0-based (índices pandas).
+"""
+import time
+from functools import partial
+
+import pandas as pd
+
+from normalizadores_lib import (
+    INDICES_MEDICAMENTOS,
+    INDICES_SINDATO,
+    NORMALIZADORES_POR_COLUMNA,
+    liberar_cache_normalizadores,
+    normalizar_serie,
+    rellenar_medicamentos_serie,
+    rellenar_sindato_serie,
+    sin_dato_serie,
+    trim_serie,
+)
+from fechas_lib import (
+    INDICES_FECHAS,
+    convertir_fechas_columna,
+    limpiar_fechas_especiales_columna,
+)
+
+
+def _paso_medicamentos(col):
+    col_procesada, _ = rellenar_medicamentos_serie(col)
+    return col_procesada
+
+
+def _paso_fechas(col):
+    return pd.Series(convertir_fechas_columna(col), index=col.index, name=col.name)
+
+
+# Nombre de cada paso (para el resumen) en el orden en que se aplican
+PASOS = [
+    "SIN DATO → SINDATO",
+    "TRIM",
+    "Relleno SINDATO",
+    "Medicamentos",
+    "Normalización",
+    "Fechas",
+    "Fechas especiales",
+]
+
+
+def compilar_plan(
+    num_columnas,
+    indices_fechas=None,
+    indices_sindato=None,
+    indices_medicamentos=None,
+    normalizadores=None,
+):
+    """
+    Arma la cadena de pasos de cada columna.
+
+    Args:
+        num_columnas: Cantidad de columnas del DataFrame
+        indices_fechas: Columnas de fecha (por defecto INDICES_FECHAS)
+        indices_sindato: Columnas a rellenar con SINDATO (por defecto INDICES_SINDATO)
+        indices_medicamentos: Columnas de medicamentos (por defecto INDICES_MEDICAMENTOS)
+        normalizadores: {indice: funcion de valor} (por defecto NORMALIZADORES_POR_COLUMNA)
+
+    Returns:
+        list: una lista [(nombre_paso, funcion)] por columna; cada funcion recibe
+        la Series de la columna y devuelve la Series transformada
+    """
+    indices_fechas = set(INDICES_FECHAS if indices_fechas is None else indices_fechas)
+    indices_sindato = set(INDICES_SINDATO if indices_sindato is None else indices_sindato)
+    indices_medicamentos = set(
+        INDICES_MEDICAMENTOS if indices_medicamentos is None else indices_medicamentos
+    )
+    if normalizadores is None:
+        normalizadores = NORMALIZADORES_POR_COLUMNA
+
+    plan = []
+    for indice in range(num_columnas):
+        es_fecha = indice in indices_fechas
+        pasos = [("SIN DATO → SINDATO", sin_dato_serie)]
+        if not es_fecha:
+            pasos.append(("TRIM", trim_serie))
+        if indice in indices_sindato:
+            pasos.append(("Relleno SINDATO", rellenar_sindato_serie))
+        if indice in indices_medicamentos:
+            pasos.append(("Medicamentos", _paso_medicamentos))
+        if indice in normalizadores:
+            pasos.append(
+                ("Normalización", partial(normalizar_serie, func_normalizar=normalizadores[indice]))
+            )
+        if es_fecha:
+            pasos.append(("Fechas", _paso_fechas))
+        else:
+            pasos.append(("Fechas especiales", limpiar_fechas_especiales_columna))
+        plan.append(pasos)
+    return plan
+
+
+def _nombre_normalizador(funcion):
+    normalizador = getattr(funcion, "keywords", {}).get("func_normalizar")
+    return getattr(normalizador, "__name__", None) if normalizador else None
+
+
+def ejecutar_plan(df, plan=None, liberar_cache=True, mostrar_resumen=True, metricas=None):
+    """
+    Ejecuta el plan leyendo y escribiendo cada columna una sola vez.
+
+    Si un paso falla en una columna, la columna sigue con el valor que tenía antes
+    de ese paso y se informa el error (igual que los pasos por DataFrame, que
+    ignoran la columna que falla).
+
+    Args:
+        liberar_cache: Vaciar al terminar los resultados memorizados de los
+            normalizadores (False al procesar por bloques: los valores se repiten
+            entre bloques y el llamador libera al final)
+        mostrar_resumen: Imprimir cuántas columnas pasaron por cada paso
+        metricas: metricas_lib.Metricas donde registrar el tiempo de cada paso
+            por columna (y de cada normalizador)
+
+    Returns:
+        DataFrame nuevo con el mismo índice y columnas
+    """
+    if plan is None:
+        plan = compilar_plan(len(df.columns))
+
+    columnas_por_paso = dict.fromkeys(PASOS, 0)
+    columnas = []
+    for indice in range(len(df.columns)):
+        col = df.iloc[:, indice]
+        for nombre_paso, funcion in plan[indice] if indice < len(plan) else []:
+            inicio = time.perf_counter()
+            try:
+                col = funcion(col)
+                columnas_por_paso[nombre_paso] += 1
+            except Exception as e:
+                print(f"  ⚠ Error en columna {indice} ({nombre_paso}): {e}")
+            if metricas is not None:
+                metricas.agregar_paso(
+                    nombre_paso,
+                    indice,
+                    time.perf_counter() - inicio,
+                    len(col),
+                    normalizador=_nombre_normalizador(funcion),
+                )
+        columnas.append(col.values)
+
+    if liberar_cache:
+        liberar_cache_normalizadores()
+
+    df_procesado = pd.DataFrame(dict(enumerate(columnas)), index=df.index)
+    df_procesado.columns = df.columns
+
+    if mostrar_resumen:
+        for nombre_paso, cantidad in columnas_por_paso.items():
+            if cantidad:
+                print(f"  OK - {nombre_paso}: {cantidad} columnas")
+    return df_procesado
@@ -3,30 +3,53 @@ Script orquestador general: procesa normalización, fechas y validación.
 
 Flujo:
 1. Lee el archivo de entrada
-2. Aplica normalizaciones de valores (normalizadores_lib)
-3. Estandariza fechas (fechas_lib)
-4. Valida contra validaciones_config.json
-5. Genera Excel final + reporte de errores
+2. Aplica SINDATO, TRIM, rellenos, normalizaciones (normalizadores_lib) y
+   fechas (fechas_lib) en una sola pasada por columna (plan_columnas_lib)
+3. Valida contra validaciones_config.json
+4. Genera Excel final + reporte de errores
+
+Con filas_por_bloque (o FILAS_POR_BLOQUE) el archivo se procesa por bloques de
+filas: cada bloque pasa por el plan, la validación (conteos y errores se
+acumulan) y se escribe en la salida antes de leer el siguiente, para archivos
+consolidados que no caben en memoria. El resultado es el mismo que en memoria.
+
+Con incremental=True (o INCREMENTAL) solo las filas nuevas o modificadas respecto
+de ejecuciones anteriores pasan por el plan; el resto toma el resultado guardado
+(ver incremental_lib). La validación siempre se hace sobre todas las filas.
+
+Cada ejecución mide tiempo, CPU, memoria y filas/s por etapa, por paso del plan,
+por columna y por normalizador (ver metricas_lib): se devuelven en el resultado
+("metricas") y se guardan en <log>_metricas.json junto al log.
+
+Con --perfil (o la variable de entorno RCV_PERFIL=1) la ejecución se perfila
+con cProfile y pilas muestreadas para flamegraph (ver perfil_lib).
 
 Uso:
     python procesar_general.py
+    python procesar_general.py --perfil
 """
 import pandas as pd
+import numpy as np
+import argparse
+import io
 import json
 import os
 import re
-import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Importar bibliotecas locales
-from normalizadores_lib import (
-    aplicar_todos_normalizadores, 
-    aplicar_trim_general, 
-    rellenar_sindato_columnas,
-    rellenar_medicamentos_sindato,
-    normalizar_variantes_sin_dato
+from plan_columnas_lib import compilar_plan, ejecutar_plan
+from normalizadores_lib import liberar_cache_normalizadores
+from reglas_normalizacion_lib import cargar_reglas
+from lectura_lib import leer_libro, leer_libro_por_bloques, nombre_origen
+from incremental_lib import ejecutar_plan_incremental, CARPETA_INCREMENTAL
+from escritura_lib import escribir_tabla, EscritorPorBloques, MODO_CSV, MODO_ESTANDAR
+from texto_lib import (
+    plegar_texto, plegar_serie, VALORES_VACIOS, VARIANTES_SIN_DATO, VARIANTES,
 )
-from fechas_lib import procesar_fechas_df, INDICES_FECHAS
+from metricas_lib import Metricas, ruta_metricas
+from perfil_lib import VARIABLE_PERFIL, perfilar, perfil_activo
 
 # --- CONFIGURACIÓN ---
 ARCHIVO_ENTRADA = "./enero/BDRUTACCVMENERO2026_DUSAKAWIEPS_con_encabezados.xlsx"
@@ -39,6 +62,16 @@ LOG_SALIDA = "Procesamiento_General.log"
 
 NUM_FILAS_A_SALTEAR = 1  # Según instructivo
 CONFIG_JSON = "validaciones_config.json"
+REGLAS_JSON = "normalizaciones_config.json"
+# Procesos para validar columnas en paralelo (1 = en serie, None = todos los núcleos)
+WORKERS_VALIDACION = 1
+# Escritura de salidas: "estandar" (to_excel), "rapido" (xlsx en streaming) o "csv" (ver escritura_lib)
+MODO_ESCRITURA = MODO_ESTANDAR
+# Filas por bloque para procesar sin cargar todo el archivo (None = todo en memoria)
+FILAS_POR_BLOQUE = None
+# Reutiliza el resultado del plan de las filas ya procesadas en ejecuciones
+# anteriores (ver incremental_lib); solo en el procesamiento en memoria
+INCREMENTAL = False
 
 
 def _append_log(log_path, mensaje):
@@ -46,50 +79,6 @@ def _append_log(log_path, mensaje):
         f.write(mensaje.rstrip() + "\n")
 
 
-def detectar_engine(archivo):
-    """Detecta el engine necesario según la extensión del archivo"""
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb  # noqa: F401
-            return "pyxlsb"
-        except ImportError:
-            print("Falta pyxlsb. Instalar con: pip install pyxlsb")
-            return None
-    if ext == ".xlsx":
-        return "openpyxl"
-    return None
-
-
-def leer_encabezados(archivo):
-    """Lee los encabezados del archivo (primera fila)"""
-    engine = detectar_engine(archivo)
-    if not engine:
-        return []
-    try:
-        df_headers = pd.read_excel(
-            archivo, header=None, skiprows=0, nrows=1, engine=engine
-        )
-        return df_headers.iloc[0].tolist()
-    except Exception as e:
-        print(f"Error al leer encabezados: {e}")
-        return []
-
-
-def leer_datos(archivo, filas_a_saltar):
-    """Lee los datos del archivo"""
-    engine = detectar_engine(archivo)
-    if not engine:
-        return None
-    try:
-        return pd.read_excel(
-            archivo, header=None, skiprows=filas_a_saltar, engine=engine
-        )
-    except Exception as e:
-        print(f"Error al leer datos: {e}")
-        return None
-
-
 def cargar_configuracion(ruta_json):
     """Carga la configuración de validaciones desde JSON"""
     if not os.path.exists(ruta_json):
@@ -122,15 +111,21 @@ def cargar_configuracion(ruta_json):
     return configuradas
 
 
+# Variantes canónicas (texto_lib) más las abreviaturas de zona, que la limpieza
+# expande antes de validar
+VARIANTES_LIMPIEZA = {
+    **VARIANTES,
+    "U": "URBANA",
+    "R": "RURAL",
+    "CP": "URBANA",  # CP = Cabecera o Pueblo (categoría urbana)
+}
+
+
 def _normalizar_base(valor):
     """Normaliza texto para comparaciones: sin tildes, mayusculas, espacios compactos"""
-    if not isinstance(valor, str):
-        return ""
-    texto = unicodedata.normalize("NFKD", valor)
-    texto = "".join([c for c in texto if not unicodedata.combining(c)])
-    texto = texto.upper()
-    texto = re.sub(r"\s+", " ", texto).strip()
-    texto = re.sub(r"\s*,\s*", ", ", texto)
+    texto = plegar_texto(valor, mayusculas=True)
+    if "," in texto:
+        texto = re.sub(r"\s*,\s*", ", ", texto)
     return texto
 
 
@@ -151,23 +146,22 @@ def normalizar_valor(valor):
     val = _normalizar_valor_basico(valor)
     if val == "":
         return ""
-    # Mapear variantes conocidas a un valor canonico
-    variantes = {
-        "NINGUNA DE LAS ANTERIORES": "NINGUNAS DE LAS ANTERIORES",
-        "NINGUNAS DE LAS ANTERIORES": "NINGUNAS DE LAS ANTERIORES",
-        "NEGRO(A), MULATO(A), AFROCOLOMBIANO O AFRODECENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "NEGRO(A), MULATO(A), AFROCOLOMBIANO O AFRODESCENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "NEGRO (A), MULATO (A), AFROCOLOMBIANO O AFRODECENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "NEGRO (A), MULATO (A), AFROCOLOMBIANO O AFRODESCENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "COMUNIDADES INDIGENAS": "COMUNIDADES INDIGINAS",
-        "VICTIMA DEL CONFLICTO ARMADO INTERNO": "VICTIMAS DEL CONFLICTO ARMADO",
-        "AFROCOLOMBIANO O AFRODECENDIENTE": "OTRO GRUPO POBLACIONAL",
-        "POBLACION RURAL NO MIGRATORIA": "OTRO GRUPO POBLACIONAL",
-        "U": "URBANA",
-        "R": "RURAL",
-        "CP": "URBANA",  # CP = Cabecera o Pueblo (categoría urbana)
-    }
-    return variantes.get(val, val)
+    return VARIANTES_LIMPIEZA.get(val, val)
+
+
+def _normalizar_serie_basico(col):
+    """Versión para una columna completa de _normalizar_valor_basico"""
+    textos = col.astype(object).astype(str).where(col.notna(), "")
+    val = plegar_serie(textos, mayusculas=True)
+    con_coma = val.str.contains(",", regex=False).to_numpy(dtype=bool)
+    if con_coma.any():
+        val[con_coma] = val[con_coma].str.replace(r"\s*,\s*", ", ", regex=True)
+    return val.replace({**VALORES_VACIOS, **VARIANTES_SIN_DATO})
+
+
+def _normalizar_serie(col_norm_basico):
+    """Versión para una columna completa de normalizar_valor, a partir del resultado básico"""
+    return col_norm_basico.replace(VARIANTES_LIMPIEZA)
 
 
 def normalizar_lista_validos(validos):
@@ -175,304 +169,661 @@ def normalizar_lista_validos(validos):
     return {normalizar_valor(v) for v in validos}
 
 
-def validar_columna(df, encabezados, indice_json, config, log, num_filas_saltadas):
-    """Valida una columna y retorna lista de errores detallados
-    
-    Args:
-        indice_json: Índice desde JSON (1-based, número de columna Excel)
-    """
+COLUMNAS_ERRORES = [
+    "fila",
+    "columna_idx",
+    "columna_nombre",
+    "valor_original",
+    "valor_normalizado",
+    "validos_esperados",
+]
+
+
+def _tabla_errores(col, col_norm, invalidos, indice_json, nombre_columna,
+                   validos_esperados, num_filas_saltadas):
+    """Construye la tabla de errores de una columna a partir de la máscara de inválidos"""
+    posiciones = np.flatnonzero(invalidos)
+    return pd.DataFrame(
+        {
+            "fila": posiciones + num_filas_saltadas + 1,  # +1 para header original
+            "columna_idx": indice_json,
+            "columna_nombre": nombre_columna,
+            "valor_original": col.to_numpy(dtype=object)[posiciones],
+            "valor_normalizado": col_norm.to_numpy(dtype=object)[posiciones],
+            "validos_esperados": validos_esperados,
+        },
+        columns=COLUMNAS_ERRORES,
+    )
+
+
+def _unir_tablas_errores(tablas):
+    """Une las tablas de errores por columna (en orden) en un solo DataFrame"""
+    tablas = [t for t in tablas if not t.empty]
+    if not tablas:
+        return pd.DataFrame(columns=COLUMNAS_ERRORES)
+    return pd.concat(tablas, ignore_index=True).infer_objects()
+
+
+def _resolver_nombre(num_columnas, encabezados, indice_json, config, log):
+    """Devuelve el nombre de la columna del índice JSON, o None si está fuera de rango"""
     # Convertir índice de JSON (1-based) a índice pandas (0-based)
     indice = indice_json - 1
     
-    if indice < 0 or indice >= len(df.columns):
+    if indice < 0 or indice >= num_columnas:
         log.write(f"Índice {indice_json} (pandas: {indice}) fuera de rango.\n")
-        return []
+        return None
 
     nombre_columna = config.get("nombre", "")
     if not nombre_columna and indice < len(encabezados):
         nombre_columna = str(encabezados[indice]).strip()
+    return nombre_columna
+
 
-    col = df.iloc[:, indice]
-    col_norm_basico = col.apply(_normalizar_valor_basico)
-    col_norm = col.apply(normalizar_valor)
+def _resolver_columna(df, encabezados, indice_json, config, log):
+    """Devuelve (columna, nombre) para el índice JSON, o (None, None) si está fuera de rango"""
+    nombre_columna = _resolver_nombre(len(df.columns), encabezados, indice_json, config, log)
+    if nombre_columna is None:
+        return None, None
+    return df.iloc[:, indice_json - 1], nombre_columna
 
-    # Excluir vacíos
-    col_norm_no_vacio = col_norm[col_norm != ""]
-    col_norm_basico_no_vacio = col_norm_basico[col_norm_basico != ""]
+
+def validar_columna(df, encabezados, indice_json, config, log, num_filas_saltadas):
+    """Valida una columna y retorna las tablas de errores detallados
+    
+    Args:
+        indice_json: Índice desde JSON (1-based, número de columna Excel)
+
+    Returns:
+        tuple: (errores, errores_totales) como DataFrames con COLUMNAS_ERRORES
+    """
+    col, nombre_columna = _resolver_columna(df, encabezados, indice_json, config, log)
+    if col is None:
+        vacia = pd.DataFrame(columns=COLUMNAS_ERRORES)
+        return vacia, vacia
+
+    return _validar_serie(col, indice_json, nombre_columna, config, log, num_filas_saltadas)
+
+
+def _validar_serie(col, indice_json, nombre_columna, config, log, num_filas_saltadas):
+    """Valida una columna ya extraída del DataFrame (ver validar_columna)"""
+    resumen = _resumir_serie(col, indice_json, nombre_columna, config, num_filas_saltadas)
+    return _escribir_resumen(log, indice_json, nombre_columna, resumen)
+
+
+def _resumir_serie(col, indice_json, nombre_columna, config, num_filas_saltadas):
+    """
+    Cuenta los valores inválidos de una columna (o de un bloque de filas de ella)
+    y arma sus tablas de errores.
+
+    Returns:
+        dict con totales, conteos sin ordenar (en orden de aparición) y tablas
+        de errores; los de varios bloques se combinan con _acumular_resumen
+    """
+    col_norm_basico = _normalizar_serie_basico(col)
+    col_norm = _normalizar_serie(col_norm_basico)
 
     validos = normalizar_lista_validos(config.get("validos", set()))
-    invalidos_total = col_norm_basico_no_vacio[~col_norm_basico_no_vacio.isin(validos)]
-    invalidos = col_norm_no_vacio[~col_norm_no_vacio.isin(validos)]
-    conteo_invalidos = invalidos.value_counts()
-    conteo_invalidos_total = invalidos_total.value_counts()
 
+    # Máscaras por fila: no vacío y fuera de la lista de válidos
+    no_vacio = (col_norm != "").to_numpy()
+    no_vacio_basico = (col_norm_basico != "").to_numpy()
+    invalidos_mask = no_vacio & ~col_norm.isin(validos).to_numpy()
+    invalidos_total_mask = no_vacio_basico & ~col_norm_basico.isin(validos).to_numpy()
+
+    resumen = {
+        "total": len(col),
+        "no_vacios": int(no_vacio.sum()),
+        "invalidos": int(invalidos_mask.sum()),
+        "invalidos_total": int(invalidos_total_mask.sum()),
+        "conteo_invalidos": col_norm[invalidos_mask].value_counts(sort=False),
+        "conteo_invalidos_total": col_norm_basico[invalidos_total_mask].value_counts(sort=False),
+        "errores": [],
+        "errores_totales": [],
+    }
+
+    if resumen["invalidos"] or resumen["invalidos_total"]:
+        # Tablas detalladas de errores (fila, columna, valor original, valor normalizado)
+        validos_esperados = ", ".join(sorted(validos))
+        resumen["errores"].append(_tabla_errores(
+            col, col_norm, invalidos_mask, indice_json, nombre_columna,
+            validos_esperados, num_filas_saltadas,
+        ))
+        resumen["errores_totales"].append(_tabla_errores(
+            col, col_norm_basico, invalidos_total_mask, indice_json, nombre_columna,
+            validos_esperados, num_filas_saltadas,
+        ))
+    return resumen
+
+
+def _acumular_resumen(acumulado, resumen):
+    """Suma al resumen acumulado de una columna el de un nuevo bloque de filas"""
+    if acumulado is None:
+        return resumen
+    for clave in ("total", "no_vacios", "invalidos", "invalidos_total"):
+        acumulado[clave] += resumen[clave]
+    for clave in ("conteo_invalidos", "conteo_invalidos_total"):
+        # Mismo orden de aparición que tendría value_counts sobre la columna completa
+        acumulado[clave] = (
+            pd.concat([acumulado[clave], resumen[clave]])
+            .groupby(level=0, sort=False)
+            .sum()
+        )
+    acumulado["errores"].extend(resumen["errores"])
+    acumulado["errores_totales"].extend(resumen["errores_totales"])
+    return acumulado
+
+
+def _escribir_resumen(log, indice_json, nombre_columna, resumen):
+    """Escribe en el log el resumen de una columna y retorna sus tablas de errores"""
     log.write("-" * 80 + "\n")
     log.write(f"Índice JSON (columna Excel): {indice_json}\n")
-    log.write(f"Índice pandas (0-based): {indice}\n")
+    log.write(f"Índice pandas (0-based): {indice_json - 1}\n")
     log.write(f"Nombre: {nombre_columna}\n")
-    log.write(f"Total registros: {len(col)}\n")
-    log.write(f"Total no vacíos: {len(col_norm_no_vacio)}\n")
-    log.write(f"Total inválidos (antes de normalizar): {len(invalidos_total)}\n")
-    log.write(f"Total inválidos (después de normalizar): {len(invalidos)}\n")
-
-    errores = []
-    errores_totales = []
-    if conteo_invalidos_total.empty and conteo_invalidos.empty:
+    log.write(f"Total registros: {resumen['total']}\n")
+    log.write(f"Total no vacíos: {resumen['no_vacios']}\n")
+    log.write(f"Total inválidos (antes de normalizar): {resumen['invalidos_total']}\n")
+    log.write(f"Total inválidos (después de normalizar): {resumen['invalidos']}\n")
+
+    if not resumen["invalidos_total"] and not resumen["invalidos"]:
         log.write("No se encontraron valores inválidos.\n")
-    else:
-        if not conteo_invalidos_total.empty:
-            log.write("Valores inválidos (antes de normalizar):\n")
-            for valor, cantidad in conteo_invalidos_total.items():
-                log.write(f"  - '{valor}': {cantidad}\n")
-        if not conteo_invalidos.empty:
-            log.write("Valores inválidos (después de normalizar):\n")
-            for valor, cantidad in conteo_invalidos.items():
-                log.write(f"  - '{valor}': {cantidad}\n")
-        
-        # Generar lista detallada de errores (fila, columna, valor original, valor normalizado)
-        for fila_idx, val_norm in enumerate(col_norm):
-            if val_norm != "" and val_norm not in validos:
-                errores.append({
-                    "fila": fila_idx + num_filas_saltadas + 1,  # +1 para header original
-                    "columna_idx": indice_json,
-                    "columna_nombre": nombre_columna,
-                    "valor_original": col.iloc[fila_idx],
-                    "valor_normalizado": val_norm,
-                    "validos_esperados": ", ".join(sorted(validos))
-                })
-        for fila_idx, val_norm in enumerate(col_norm_basico):
-            if val_norm != "" and val_norm not in validos:
-                errores_totales.append({
-                    "fila": fila_idx + num_filas_saltadas + 1,
-                    "columna_idx": indice_json,
-                    "columna_nombre": nombre_columna,
-                    "valor_original": col.iloc[fila_idx],
-                    "valor_normalizado": val_norm,
-                    "validos_esperados": ", ".join(sorted(validos))
-                })
-    
-    return errores, errores_totales
+        vacia = pd.DataFrame(columns=COLUMNAS_ERRORES)
+        return vacia, vacia
+
+    # Mismo orden que value_counts(): de mayor a menor cantidad
+    conteo_invalidos = resumen["conteo_invalidos"].sort_values(ascending=False)
+    conteo_invalidos_total = resumen["conteo_invalidos_total"].sort_values(ascending=False)
+    if not conteo_invalidos_total.empty:
+        log.write("Valores inválidos (antes de normalizar):\n")
+        for valor, cantidad in conteo_invalidos_total.items():
+            log.write(f"  - '{valor}': {cantidad}\n")
+    if not conteo_invalidos.empty:
+        log.write("Valores inválidos (después de normalizar):\n")
+        for valor, cantidad in conteo_invalidos.items():
+            log.write(f"  - '{valor}': {cantidad}\n")
+
+    return _concatenar_bloques(resumen["errores"]), _concatenar_bloques(resumen["errores_totales"])
+
+
+def _concatenar_bloques(tablas):
+    """Tabla de errores de una columna a partir de las de sus bloques de filas"""
+    if len(tablas) == 1:
+        return tablas[0]
+    if not tablas:
+        return pd.DataFrame(columns=COLUMNAS_ERRORES)
+    return pd.concat(tablas, ignore_index=True)
+
+
+def _validar_serie_aislada(col, indice_json, nombre_columna, config, num_filas_saltadas):
+    """
+    Ejecuta _validar_serie en un proceso hijo con un log en memoria.
 
+    Solo recibe la columna a validar (no el DataFrame completo) y devuelve
+    el texto del log para que el proceso principal lo escriba en orden.
+    """
+    log = io.StringIO()
+    errores, errores_totales = _validar_serie(
+        col, indice_json, nombre_columna, config, log, num_filas_saltadas
+    )
+    return log.getvalue(), errores, errores_totales
 
-def validar_df(df, encabezados, configuracion, log, num_filas_saltadas):
-    """Valida el DataFrame completo y retorna listas de errores"""
-    todos_los_errores = []
-    todos_los_errores_totales = []
-    
+
+def _escribir_encabezado_validacion(log, configuracion):
     log.write("=" * 80 + "\n")
     log.write("VALIDACIÓN DE VALORES - COLUMNAS\n")
     log.write(f"Columnas configuradas: {len(configuracion)}\n")
     log.write("=" * 80 + "\n\n")
 
-    for item in configuracion:
-        errores, errores_totales = validar_columna(
-            df,
-            encabezados,
-            item["indice"],
-            item,
-            log,
-            num_filas_saltadas,
-        )
-        todos_los_errores.extend(errores)
-        todos_los_errores_totales.extend(errores_totales)
+
+def validar_df(df, encabezados, configuracion, log, num_filas_saltadas, workers=WORKERS_VALIDACION):
+    """
+    Valida el DataFrame completo y retorna las tablas de errores.
+
+    Con workers > 1 (o None = todos los núcleos) las columnas se validan en un
+    pool de procesos; el log y las tablas se unen en el orden de la configuración,
+    así que el resultado es el mismo que en serie.
+    """
+    tablas_errores = []
+    tablas_errores_totales = []
     
-    return todos_los_errores, todos_los_errores_totales
+    _escribir_encabezado_validacion(log, configuracion)
 
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(configuracion))
 
-def ejecutar_procesamiento_general(
-    archivo_entrada,
-    archivo_salida=ARCHIVO_SALIDA,
-    reporte_errores_csv=REPORTE_ERRORES_CSV,
-    reporte_errores_excel=REPORTE_ERRORES_EXCEL,
-    reporte_errores_totales_csv=REPORTE_ERRORES_TOTALES_CSV,
-    reporte_errores_totales_excel=REPORTE_ERRORES_TOTALES_EXCEL,
-    log_salida=LOG_SALIDA,
-    num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
-    config_json=CONFIG_JSON,
-):
-    _append_log(log_salida, "=" * 80)
-    _append_log(
-        log_salida,
-        "PROCESAMIENTO GENERAL: NORMALIZACION + FECHAS + VALIDACION",
-    )
-    _append_log(log_salida, "=" * 80)
-    _append_log(log_salida, f"Archivo de entrada: {archivo_entrada}")
-    _append_log(
-        log_salida,
-        f"Fecha de ejecucion: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+    if workers <= 1:
+        for item in configuracion:
+            errores, errores_totales = validar_columna(
+                df,
+                encabezados,
+                item["indice"],
+                item,
+                log,
+                num_filas_saltadas,
+            )
+            tablas_errores.append(errores)
+            tablas_errores_totales.append(errores_totales)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Se envían todas las columnas y luego se recogen en el orden de la configuración
+            pendientes = []
+            for item in configuracion:
+                log_rango = io.StringIO()
+                col, nombre_columna = _resolver_columna(
+                    df, encabezados, item["indice"], item, log_rango
+                )
+                if col is None:
+                    pendientes.append((log_rango.getvalue(), None))
+                    continue
+                futuro = pool.submit(
+                    _validar_serie_aislada,
+                    col,
+                    item["indice"],
+                    nombre_columna,
+                    item,
+                    num_filas_saltadas,
+                )
+                pendientes.append((None, futuro))
+
+            for texto_rango, futuro in pendientes:
+                if futuro is None:
+                    log.write(texto_rango)
+                    continue
+                texto_log, errores, errores_totales = futuro.result()
+                log.write(texto_log)
+                tablas_errores.append(errores)
+                tablas_errores_totales.append(errores_totales)
+    
+    return (
+        _unir_tablas_errores(tablas_errores),
+        _unir_tablas_errores(tablas_errores_totales),
     )
 
-    print("=" * 80)
-    print("PROCESAMIENTO GENERAL: NORMALIZACIÓN + FECHAS + VALIDACIÓN")
-    print("=" * 80)
-    print(f"Archivo de entrada: {archivo_entrada}")
-    print(f"Fecha de ejecución: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print()
 
-    # --- 1. LEER DATOS ---
-    print("[1/5] Leyendo archivo de entrada...")
-    encabezados = leer_encabezados(archivo_entrada)
+def _quitar_filas_sin_consecutivo(df):
+    """
+    Elimina las filas sin consecutivo (columna 1 en Excel -> indice 0).
+
+    Returns:
+        tuple: (df filtrado, cantidad de filas eliminadas)
+    """
+    try:
+        col_consecutivo = df.iloc[:, 0]
+        sin_consecutivo = col_consecutivo.isna() | (col_consecutivo.astype(str).str.strip() == "")
+        filas_sin_consecutivo = int(sin_consecutivo.sum())
+        if filas_sin_consecutivo > 0:
+            df = df.loc[~sin_consecutivo]
+        return df, filas_sin_consecutivo
+    except Exception:
+        return df, 0
+
+
+def _guardar_reportes(todos_los_errores, todos_los_errores_totales, reportes, modo_escritura):
+    """Escribe los reportes de errores (CSV y, salvo en modo csv, Excel)"""
+    if not todos_los_errores_totales.empty:
+        print(f"    - Errores totales (antes de normalizar): {len(todos_los_errores_totales)}")
+        df_errores_totales = todos_los_errores_totales
+        df_errores_totales.to_csv(
+            reportes["errores_totales_csv"],
+            index=False,
+            encoding="utf-8-sig",
+            sep=";",
+        )
+        print(f"    - Reporte CSV total: {reportes['errores_totales_csv']}")
+        if modo_escritura != MODO_CSV:
+            escribir_tabla(df_errores_totales, reportes["errores_totales_excel"], modo=modo_escritura)
+            print(f"    - Reporte Excel total: {reportes['errores_totales_excel']}")
+
+    if not todos_los_errores.empty:
+        print(f"    - Errores encontrados: {len(todos_los_errores)}")
+        
+        # Generar reporte de errores en CSV
+        df_errores = todos_los_errores
+        df_errores.to_csv(
+            reportes["errores_csv"], index=False, encoding="utf-8-sig", sep=";"
+        )
+        print(f"    - Reporte CSV: {reportes['errores_csv']}")
+        
+        # Generar reporte de errores en Excel (en modo csv basta el CSV anterior)
+        if modo_escritura != MODO_CSV:
+            escribir_tabla(df_errores, reportes["errores_excel"], modo=modo_escritura)
+            print(f"    - Reporte Excel: {reportes['errores_excel']}")
+    else:
+        print("    - OK - No se encontraron errores de validacion")
+
+
+def _validar_encabezados_leidos(encabezados, datos, log_salida):
     if not encabezados:
         mensaje = "ERROR - No se pudieron leer los encabezados."
         print(mensaje)
         _append_log(log_salida, mensaje)
-        return None
+        return False
 
-    df = leer_datos(archivo_entrada, num_filas_a_saltar)
-    if df is None:
+    if datos is None:
         mensaje = "ERROR - No se pudieron leer los datos."
         print(mensaje)
         _append_log(log_salida, mensaje)
-        return None
+        return False
+    return True
 
-    # Eliminar filas sin consecutivo (columna 1 en Excel -> indice 0)
-    try:
-        col_consecutivo = df.iloc[:, 0]
-        sin_consecutivo = col_consecutivo.isna() | (col_consecutivo.astype(str).str.strip() == "")
-        filas_sin_consecutivo = int(sin_consecutivo.sum())
-        if filas_sin_consecutivo > 0:
-            df = df.loc[~sin_consecutivo].copy()
-            print(f"  OK - Filas sin consecutivo eliminadas: {filas_sin_consecutivo}")
-            _append_log(
-                log_salida,
-                f"Filas sin consecutivo eliminadas: {filas_sin_consecutivo}",
-            )
-    except Exception:
-        pass
 
-    print(f"  OK - Datos cargados: {len(df)} registros, {len(df.columns)} columnas")
-    print()
+def _informar_filas_sin_consecutivo(filas_sin_consecutivo, log_salida):
+    if filas_sin_consecutivo > 0:
+        print(f"  OK - Filas sin consecutivo eliminadas: {filas_sin_consecutivo}")
+        _append_log(
+            log_salida,
+            f"Filas sin consecutivo eliminadas: {filas_sin_consecutivo}",
+        )
 
-    # --- 1.5. NORMALIZAR VARIANTES DE "SIN DATO" → "SINDATO" (PRIMERO) ---
-    print("[1.5/7] Normalizando variantes 'SIN DATO' → 'SINDATO'...")
-    try:
-        df = normalizar_variantes_sin_dato(df)
-        print("  OK - Variantes de 'SIN DATO' normalizadas")
-        _append_log(log_salida, "OK - Variantes de 'SIN DATO' normalizadas")
-    except Exception as e:
-        print(f"  WARNING - Error al normalizar 'SIN DATO': {e}")
-        _append_log(log_salida, f"WARNING - Error al normalizar 'SIN DATO': {e}")
-        print("  → Continuando...")
-    print()
 
-    # --- 2. APLICAR TRIM GENERAL ---
-    print("[2/7] Aplicando TRIM general a columnas NO-fecha...")
-    try:
-        # Excluir las columnas de fechas del TRIM (se procesan en el paso de fechas)
-        df = aplicar_trim_general(df, indices_excluir=INDICES_FECHAS)
-        print("  OK - TRIM aplicado correctamente")
-        _append_log(log_salida, "OK - TRIM aplicado correctamente")
-    except Exception as e:
-        print(f"  WARNING - Error en TRIM: {e}")
-        _append_log(log_salida, f"WARNING - Error en TRIM: {e}")
-        print("  - Continuando sin TRIM...")
-    print()
+def _cargar_normalizadores(reglas_json, advertencias):
+    """
+    Normalizadores por columna de reglas_json.
 
-    # --- 3. RELLENAR SINDATO EN VALORES VACÍOS ---
-    print("[3/7] Rellenando SINDATO en columnas de texto vacías...")
+    Si las reglas no se pueden cargar retorna {} (el plan se ejecuta igual, sin
+    normalizaciones) y agrega la advertencia a `advertencias`.
+    """
     try:
-        df = rellenar_sindato_columnas(df)
-        print("  OK - SINDATO rellenado correctamente")
-        _append_log(log_salida, "OK - SINDATO rellenado correctamente")
+        _, normalizadores = cargar_reglas(reglas_json)
     except Exception as e:
-        print(f"  WARNING - Error al rellenar SINDATO: {e}")
-        _append_log(log_salida, f"WARNING - Error al rellenar SINDATO: {e}")
-        print("  - Continuando sin rellenar SINDATO...")
-    print()
+        mensaje = f"WARNING - Plan por columna sin normalizaciones: {e}"
+        print(f"  {mensaje}")
+        advertencias.append(mensaje)
+        return {}
+    return normalizadores
 
-    # --- 3.5. RELLENAR SINDATO EN MEDICAMENTOS (vacíos Y ceros) ---
-    print("[3.5/7] Rellenando SINDATO en columnas de medicamentos (vacíos y ceros)...")
-    try:
-        df = rellenar_medicamentos_sindato(df)
-        print("  OK - Medicamentos procesados correctamente")
-        _append_log(log_salida, "OK - Medicamentos procesados correctamente")
-    except Exception as e:
-        print(f"  WARNING - Error al procesar medicamentos: {e}")
-        _append_log(log_salida, f"WARNING - Error al procesar medicamentos: {e}")
-        print("  - Continuando sin procesar medicamentos...")
-    print()
 
-    # --- 4. NORMALIZAR VALORES ---
-    print("[4/7] Aplicando normalizaciones de valores específicas...")
-    try:
-        df = aplicar_todos_normalizadores(df)
-        print("  OK - Normalizaciones aplicadas correctamente")
-        _append_log(log_salida, "OK - Normalizaciones aplicadas correctamente")
-    except Exception as e:
-        print(f"  WARNING - Error en normalizacion: {e}")
-        _append_log(log_salida, f"WARNING - Error en normalizacion: {e}")
-        print("  - Continuando sin normalizaciones...")
+def _procesar_en_memoria(
+    archivo_entrada,
+    archivo_salida,
+    log_salida,
+    num_filas_a_saltar,
+    config_json,
+    reglas_json,
+    modo_escritura,
+    workers_validacion,
+    reportes,
+    metricas,
+    advertencias,
+    carpeta_incremental=None,
+):
+    """
+    Pasos 1-4 con el archivo completo en memoria.
+
+    Con carpeta_incremental, el plan solo se ejecuta para las filas nuevas o
+    modificadas respecto del almacén de esa carpeta. Cada paso se mide como una
+    etapa de metricas (Metricas). Los problemas que no detienen el proceso (ej.
+    reglas de normalización inválidas) se agregan a la lista advertencias.
+
+    Returns:
+        tuple: (archivo_salida, errores, errores_totales), o None si falla
+    """
+    # --- 1. LEER DATOS ---
+    print("[1/4] Leyendo archivo de entrada...")
+    with metricas.etapa("lectura") as etapa:
+        encabezados, df = leer_libro(archivo_entrada, num_filas_a_saltar)
+        if not _validar_encabezados_leidos(encabezados, df, log_salida):
+            return None
+
+        df, filas_sin_consecutivo = _quitar_filas_sin_consecutivo(df)
+        etapa["filas"] = len(df)
+    _informar_filas_sin_consecutivo(filas_sin_consecutivo, log_salida)
+
+    print(f"  OK - Datos cargados: {len(df)} registros, {len(df.columns)} columnas")
     print()
 
-    # --- 5. PROCESAR FECHAS ---
-    print("[5/7] Procesando fechas...")
+    # --- 2. PLAN POR COLUMNA: SINDATO, TRIM, RELLENOS, NORMALIZACIÓN Y FECHAS ---
+    # Cada columna se lee y se escribe una sola vez (ver plan_columnas_lib)
+    print("[2/4] Aplicando SINDATO, TRIM, rellenos, normalizaciones y fechas por columna...")
+    # Las reglas se leen en cada ejecución: un cambio en el JSON aplica sin reiniciar.
+    # Si fallan, el resto del plan se aplica igual
+    normalizadores = _cargar_normalizadores(reglas_json, advertencias)
     try:
-        df = procesar_fechas_df(df, INDICES_FECHAS)
-        print("  OK - Fechas procesadas correctamente")
-        _append_log(log_salida, "OK - Fechas procesadas correctamente")
+        with metricas.etapa("plan", filas=len(df)):
+            plan = compilar_plan(len(df.columns), normalizadores=normalizadores)
+            if carpeta_incremental:
+                df, reutilizadas = ejecutar_plan_incremental(
+                    df, plan, reglas_json, carpeta=carpeta_incremental, metricas=metricas
+                )
+            else:
+                df = ejecutar_plan(df, plan, metricas=metricas)
+        if carpeta_incremental:
+            mensaje = (
+                f"Incremental: {reutilizadas} filas reutilizadas, "
+                f"{len(df) - reutilizadas} procesadas"
+            )
+            print(f"  OK - {mensaje}")
+            _append_log(log_salida, mensaje)
+        print("  OK - Plan por columna aplicado correctamente")
+        _append_log(log_salida, "OK - Plan por columna aplicado correctamente")
     except Exception as e:
-        print(f"  WARNING - Error en procesamiento de fechas: {e}")
-        _append_log(log_salida, f"WARNING - Error en procesamiento de fechas: {e}")
-        print("  - Continuando sin procesar fechas...")
+        print(f"  WARNING - Error en plan por columna: {e}")
+        _append_log(log_salida, f"WARNING - Error en plan por columna: {e}")
+        print("  - Continuando sin transformaciones...")
     print()
 
-    # --- 6. VALIDAR ---
-    print("[6/7] Validando contra configuración...")
+    # --- 3. VALIDAR ---
+    print("[3/4] Validando contra configuración...")
     configuracion = cargar_configuracion(config_json)
     if not configuracion:
         print("  WARNING - No hay columnas configuradas para validar.")
         _append_log(log_salida, "WARNING - No hay columnas configuradas para validar.")
-        todos_los_errores = []
-        todos_los_errores_totales = []
+        todos_los_errores = pd.DataFrame(columns=COLUMNAS_ERRORES)
+        todos_los_errores_totales = pd.DataFrame(columns=COLUMNAS_ERRORES)
     else:
-        with open(log_salida, "w", encoding="utf-8") as log:
+        with metricas.etapa("validacion", filas=len(df)), \
+                open(log_salida, "w", encoding="utf-8") as log:
             todos_los_errores, todos_los_errores_totales = validar_df(
                 df,
                 encabezados,
                 configuracion,
                 log,
                 num_filas_a_saltar,
+                workers=workers_validacion,
             )
         
         print(f"  OK - Validacion completada")
         print(f"    - Log generado: {LOG_SALIDA}")
-        
-        if todos_los_errores_totales:
-            print(f"    - Errores totales (antes de normalizar): {len(todos_los_errores_totales)}")
-            df_errores_totales = pd.DataFrame(todos_los_errores_totales)
-            df_errores_totales.to_csv(
-                reporte_errores_totales_csv,
-                index=False,
-                encoding="utf-8-sig",
-                sep=";",
-            )
-            df_errores_totales.to_excel(reporte_errores_totales_excel, index=False)
-            print(f"    - Reporte CSV total: {reporte_errores_totales_csv}")
-            print(f"    - Reporte Excel total: {reporte_errores_totales_excel}")
-
-        if todos_los_errores:
-            print(f"    - Errores encontrados: {len(todos_los_errores)}")
-            
-            # Generar reporte de errores en CSV
-            df_errores = pd.DataFrame(todos_los_errores)
-            df_errores.to_csv(
-                reporte_errores_csv, index=False, encoding="utf-8-sig", sep=";"
+        with metricas.etapa("reportes", filas=len(todos_los_errores) + len(todos_los_errores_totales)):
+            _guardar_reportes(todos_los_errores, todos_los_errores_totales, reportes, modo_escritura)
+    print()
+
+    # --- 4. GUARDAR RESULTADO FINAL ---
+    print("[4/4] Guardando archivo final...")
+    try:
+        # Los encabezados se asignan sin copiar los datos (ver escritura_lib)
+        with metricas.etapa("escritura", filas=len(df)):
+            # El limpio se siembra en el caché de lectura: Validación e IPS lo leen después
+            archivo_salida = escribir_tabla(
+                df, archivo_salida, encabezados[:len(df.columns)], modo=modo_escritura,
+                sembrar_cache=True,
             )
-            print(f"    - Reporte CSV: {reporte_errores_csv}")
-            
-            # Generar reporte de errores en Excel
-            df_errores.to_excel(reporte_errores_excel, index=False)
-            print(f"    - Reporte Excel: {reporte_errores_excel}")
-        else:
-            print("    - OK - No se encontraron errores de validacion")
+        print(f"  OK - Archivo guardado: {archivo_salida}")
+    except Exception as e:
+        print(f"  ❌ Error al guardar archivo: {e}")
+        _append_log(log_salida, f"ERROR - No se pudo guardar archivo: {e}")
+        return None
     print()
 
-    # --- 7. GUARDAR RESULTADO FINAL ---
-    print("[7/7] Guardando archivo final...")
+    return archivo_salida, todos_los_errores, todos_los_errores_totales
+
+
+def _abrir_escritor(archivo_salida, encabezados, modo_escritura, log_salida):
     try:
-        # Crear DataFrame con encabezados
-        df_final = pd.DataFrame(df.values, columns=encabezados[:len(df.columns)])
-        df_final.to_excel(archivo_salida, index=False)
+        return EscritorPorBloques(archivo_salida, encabezados, modo=modo_escritura)
+    except Exception as e:
+        print(f"  ❌ Error al guardar archivo: {e}")
+        _append_log(log_salida, f"ERROR - No se pudo guardar archivo: {e}")
+        return None
+
+
+def _procesar_por_bloques(
+    archivo_entrada,
+    archivo_salida,
+    log_salida,
+    num_filas_a_saltar,
+    config_json,
+    reglas_json,
+    modo_escritura,
+    filas_por_bloque,
+    reportes,
+    metricas,
+    advertencias,
+):
+    """
+    Pasos 1-4 por bloques de filas: nunca hay más de un bloque en memoria.
+
+    Cada bloque se filtra, pasa por el plan, se resume para la validación
+    (conteos y tablas de errores se acumulan entre bloques) y se agrega a la
+    salida. Al final se escriben el log y los reportes con los totales, con el
+    mismo contenido que en memoria. La validación es en serie. En metricas, cada
+    etapa acumula el tiempo de todos los bloques. Las advertencias se agregan a
+    la lista advertencias, como en memoria. Si el plan o la escritura fallan en
+    un bloque, la salida a medio escribir se descarta.
+
+    Returns:
+        tuple: (archivo_salida, errores, errores_totales), o None si falla
+    """
+    # --- 1. LEER DATOS ---
+    print(f"[1/4] Leyendo archivo de entrada por bloques de {filas_por_bloque} filas...")
+    # Primera pasada de la lectura (ver leer_libro_por_bloques); la carga de cada
+    # bloque se suma a la misma etapa
+    with metricas.etapa("lectura"):
+        encabezados, bloques = leer_libro_por_bloques(
+            archivo_entrada, num_filas_a_saltar, filas_por_bloque
+        )
+    if not _validar_encabezados_leidos(encabezados, bloques, log_salida):
+        return None
+    print()
+
+    normalizadores = _cargar_normalizadores(reglas_json, advertencias)
+    configuracion = cargar_configuracion(config_json)
+    resumenes = [None] * len(configuracion)
+
+    # --- 2. PLAN POR COLUMNA Y RESUMEN DE VALIDACIÓN, BLOQUE A BLOQUE ---
+    print("[2/4] Aplicando SINDATO, TRIM, rellenos, normalizaciones y fechas por bloque...")
+    plan = None
+    escritor = None
+    num_columnas = 0
+    filas_procesadas = 0
+    filas_sin_consecutivo = 0
+    try:
+        for numero, df in enumerate(metricas.medir_iteracion("lectura", bloques), start=1):
+            if escritor is None:
+                num_columnas = len(df.columns)
+                escritor = _abrir_escritor(
+                    archivo_salida, encabezados[:num_columnas], modo_escritura, log_salida
+                )
+                if escritor is None:
+                    return None
+                plan = compilar_plan(num_columnas, normalizadores=normalizadores)
+
+            df, eliminadas = _quitar_filas_sin_consecutivo(df)
+            filas_sin_consecutivo += eliminadas
+            if df.empty:
+                continue
+
+            # Si el plan falla en un bloque se detiene todo: seguir dejaría una
+            # salida con unos bloques transformados y otros no
+            try:
+                with metricas.etapa("plan", filas=len(df)):
+                    df = ejecutar_plan(
+                        df, plan, liberar_cache=False, mostrar_resumen=False,
+                        metricas=metricas,
+                    )
+            except Exception as e:
+                mensaje = f"ERROR - Error en plan por columna (bloque {numero}): {e}"
+                print(f"  ❌ {mensaje}")
+                _append_log(log_salida, mensaje)
+                escritor.descartar()
+                return None
+
+            # Las filas de los errores son relativas al archivo, no al bloque
+            with metricas.etapa("validacion", filas=len(df)):
+                for posicion, item in enumerate(configuracion):
+                    col, nombre_columna = _resolver_columna(
+                        df, encabezados, item["indice"], item, io.StringIO()
+                    )
+                    if col is None:
+                        continue
+                    resumenes[posicion] = _acumular_resumen(
+                        resumenes[posicion],
+                        _resumir_serie(
+                            col,
+                            item["indice"],
+                            nombre_columna,
+                            item,
+                            num_filas_a_saltar + filas_procesadas,
+                        ),
+                    )
+
+            try:
+                with metricas.etapa("escritura", filas=len(df)):
+                    escritor.escribir(df)
+            except Exception as e:
+                print(f"  ❌ Error al guardar archivo: {e}")
+                _append_log(log_salida, f"ERROR - No se pudo guardar archivo: {e}")
+                escritor.descartar()
+                return None
+            filas_procesadas += len(df)
+            print(f"  - Bloque {numero}: {filas_procesadas} registros procesados")
+    finally:
+        liberar_cache_normalizadores()
+
+    _informar_filas_sin_consecutivo(filas_sin_consecutivo, log_salida)
+    print(f"  OK - Datos cargados: {filas_procesadas} registros, {num_columnas} columnas")
+    print("  OK - Plan por columna aplicado correctamente")
+    _append_log(log_salida, "OK - Plan por columna aplicado correctamente")
+    print()
+
+    # --- 3. VALIDAR (con los resúmenes acumulados) ---
+    print("[3/4] Validando contra configuración...")
+    if not configuracion:
+        print("  WARNING - No hay columnas configuradas para validar.")
+        _append_log(log_salida, "WARNING - No hay columnas configuradas para validar.")
+        todos_los_errores = pd.DataFrame(columns=COLUMNAS_ERRORES)
+        todos_los_errores_totales = pd.DataFrame(columns=COLUMNAS_ERRORES)
+    else:
+        tablas_errores = []
+        tablas_errores_totales = []
+        with metricas.etapa("validacion"), open(log_salida, "w", encoding="utf-8") as log:
+            _escribir_encabezado_validacion(log, configuracion)
+            for posicion, item in enumerate(configuracion):
+                nombre_columna = _resolver_nombre(
+                    num_columnas, encabezados, item["indice"], item, log
+                )
+                if nombre_columna is None:
+                    continue
+                resumen = resumenes[posicion]
+                if resumen is None:
+                    # Ningún bloque con datos: mismo resumen que una columna vacía
+                    resumen = _resumir_serie(
+                        pd.Series(dtype=object), item["indice"], nombre_columna, item,
+                        num_filas_a_saltar,
+                    )
+                errores, errores_totales = _escribir_resumen(
+                    log, item["indice"], nombre_columna, resumen
+                )
+                tablas_errores.append(errores)
+                tablas_errores_totales.append(errores_totales)
+        todos_los_errores = _unir_tablas_errores(tablas_errores)
+        todos_los_errores_totales = _unir_tablas_errores(tablas_errores_totales)
+
+        print(f"  OK - Validacion completada")
+        print(f"    - Log generado: {LOG_SALIDA}")
+        with metricas.etapa("reportes", filas=len(todos_los_errores) + len(todos_los_errores_totales)):
+            _guardar_reportes(todos_los_errores, todos_los_errores_totales, reportes, modo_escritura)
+    print()
+
+    # --- 4. CERRAR RESULTADO FINAL (las filas ya se escribieron por bloque) ---
+    print("[4/4] Guardando archivo final...")
+    if escritor is None:
+        escritor = _abrir_escritor(archivo_salida, [], modo_escritura, log_salida)
+        if escritor is None:
+            return None
+    try:
+        with metricas.etapa("escritura"):
+            archivo_salida = escritor.cerrar()
         print(f"  OK - Archivo guardado: {archivo_salida}")
     except Exception as e:
         print(f"  ❌ Error al guardar archivo: {e}")
@@ -480,15 +831,117 @@ def ejecutar_procesamiento_general(
         return None
     print()
 
+    return archivo_salida, todos_los_errores, todos_los_errores_totales
+
+
+def ejecutar_procesamiento_general(
+    archivo_entrada,
+    archivo_salida=ARCHIVO_SALIDA,
+    reporte_errores_csv=REPORTE_ERRORES_CSV,
+    reporte_errores_excel=REPORTE_ERRORES_EXCEL,
+    reporte_errores_totales_csv=REPORTE_ERRORES_TOTALES_CSV,
+    reporte_errores_totales_excel=REPORTE_ERRORES_TOTALES_EXCEL,
+    log_salida=LOG_SALIDA,
+    num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
+    config_json=CONFIG_JSON,
+    workers_validacion=WORKERS_VALIDACION,
+    reglas_json=REGLAS_JSON,
+    modo_escritura=MODO_ESCRITURA,
+    filas_por_bloque=FILAS_POR_BLOQUE,
+    incremental=INCREMENTAL,
+    carpeta_incremental=CARPETA_INCREMENTAL,
+):
+    _append_log(log_salida, "=" * 80)
+    _append_log(
+        log_salida,
+        "PROCESAMIENTO GENERAL: NORMALIZACION + FECHAS + VALIDACION",
+    )
+    _append_log(log_salida, "=" * 80)
+    _append_log(log_salida, f"Archivo de entrada: {nombre_origen(archivo_entrada)}")
+    _append_log(
+        log_salida,
+        f"Fecha de ejecucion: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+    )
+
+    print("=" * 80)
+    print("PROCESAMIENTO GENERAL: NORMALIZACIÓN + FECHAS + VALIDACIÓN")
+    print("=" * 80)
+    print(f"Archivo de entrada: {nombre_origen(archivo_entrada)}")
+    print(f"Fecha de ejecución: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+
+    metricas = Metricas(
+        archivo=nombre_origen(archivo_entrada),
+        modo="bloques" if filas_por_bloque else "memoria",
+        filas_por_bloque=filas_por_bloque,
+        modo_escritura=modo_escritura,
+        incremental=bool(incremental and not filas_por_bloque),
+    )
+    archivo_metricas = ruta_metricas(log_salida)
+    advertencias = []
+
+    reportes = {
+        "errores_csv": reporte_errores_csv,
+        "errores_excel": reporte_errores_excel,
+        "errores_totales_csv": reporte_errores_totales_csv,
+        "errores_totales_excel": reporte_errores_totales_excel,
+    }
+
+    if filas_por_bloque:
+        if incremental:
+            print("WARNING - El modo incremental no aplica por bloques; se procesan todas las filas")
+        resultado = _procesar_por_bloques(
+            archivo_entrada,
+            archivo_salida,
+            log_salida,
+            num_filas_a_saltar,
+            config_json,
+            reglas_json,
+            modo_escritura,
+            filas_por_bloque,
+            reportes,
+            metricas,
+            advertencias,
+        )
+    else:
+        resultado = _procesar_en_memoria(
+            archivo_entrada,
+            archivo_salida,
+            log_salida,
+            num_filas_a_saltar,
+            config_json,
+            reglas_json,
+            modo_escritura,
+            workers_validacion,
+            reportes,
+            metricas,
+            advertencias,
+            carpeta_incremental=carpeta_incremental if incremental else None,
+        )
+
+    # Las métricas se guardan también si el proceso falló (muestran hasta dónde llegó)
+    metricas.guardar(archivo_metricas)
+    # Al final del log: la validación lo reescribe desde el principio
+    for mensaje in advertencias:
+        _append_log(log_salida, mensaje)
+    if resultado is None:
+        return None
+    archivo_salida, todos_los_errores, todos_los_errores_totales = resultado
+
     print("=" * 80)
     print("PROCESO COMPLETADO")
     print("=" * 80)
     print(f"📊 Resultado: {archivo_salida}")
-    if todos_los_errores:
+    if not todos_los_errores.empty:
         print(f"⚠ Errores de validación: {len(todos_los_errores)}")
         print(f"📋 Ver detalles en: {reporte_errores_csv}")
     else:
         print("OK - Sin errores de validacion")
+    print("⏱ Tiempos por etapa:")
+    for linea in metricas.resumen():
+        print(f"  - {linea}")
+        _append_log(log_salida, f"Tiempo {linea}")
+    print(f"📈 Métricas: {archivo_metricas}")
 
     return {
         "archivo_salida": archivo_salida,
@@ -499,21 +952,41 @@ def ejecutar_procesamiento_general(
         "reporte_errores_totales_excel": reporte_errores_totales_excel,
         "errores": todos_los_errores,
         "errores_totales": todos_los_errores_totales,
+        "metricas": metricas.como_dict(),
+        "metricas_json": archivo_metricas,
+        "advertencias": advertencias,
     }
 
 
-def main():
-    resultado = ejecutar_procesamiento_general(
-        ARCHIVO_ENTRADA,
-        archivo_salida=ARCHIVO_SALIDA,
-        reporte_errores_csv=REPORTE_ERRORES_CSV,
-        reporte_errores_excel=REPORTE_ERRORES_EXCEL,
-        reporte_errores_totales_csv=REPORTE_ERRORES_TOTALES_CSV,
-        reporte_errores_totales_excel=REPORTE_ERRORES_TOTALES_EXCEL,
-        log_salida=LOG_SALIDA,
-        num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
-        config_json=CONFIG_JSON,
+def parsear_args():
+    parser = argparse.ArgumentParser(
+        description="Normalización, fechas y validación del archivo RCV."
     )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help=f"Perfilar la ejecución (también con {VARIABLE_PERFIL}=1; ver perfil_lib).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parsear_args()
+    with perfilar(
+        "procesar_general", ARCHIVO_ENTRADA, activo=args.perfil or perfil_activo()
+    ):
+        resultado = ejecutar_procesamiento_general(
+            ARCHIVO_ENTRADA,
+            archivo_salida=ARCHIVO_SALIDA,
+            reporte_errores_csv=REPORTE_ERRORES_CSV,
+            reporte_errores_excel=REPORTE_ERRORES_EXCEL,
+            reporte_errores_totales_csv=REPORTE_ERRORES_TOTALES_CSV,
+            reporte_errores_totales_excel=REPORTE_ERRORES_TOTALES_EXCEL,
+            log_salida=LOG_SALIDA,
+            num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
+            config_json=CONFIG_JSON,
+            reglas_json=REGLAS_JSON,
+        )
     if not resultado:
         print(f"ERROR - Revisa el log: {LOG_SALIDA}")
 
@@ -0,0 +1,295 @@
+"""
+Procesamiento por lotes: cadena completa para varios archivos RCV en paralelo.
+
+Para cada archivo (ej. uno por EPS/municipio al cierre del mes):
+1. Copia con encabezados (crear_con_encabezados_desde_rcv)
+2. Limpieza: normalización + fechas + validación (procesar_general)
+3. Validación del archivo limpio (validar_valores_columna)
+4. Separación por IPS (scripts_auxiliares/separar_por_ips_consecutivo)
+
+Los archivos se reparten en un pool de procesos (WORKERS_LOTE). Cada archivo
+tiene su carpeta de salida con todos sus resultados y un log propio con la
+salida de las cuatro etapas; al terminar se escribe un resumen consolidado
+(RESUMEN_LOTE, CSV con ';') con el estado, la etapa que falló y los conteos de
+cada archivo. Un archivo que falla no detiene a los demás.
+
+Uso:
+    python procesar_lote.py --carpeta ./enero --workers 4
+"""
+import argparse
+import contextlib
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from crear_con_encabezados_desde_rcv import (
+    ARCHIVO_ENCABEZADOS_JSON,
+    BASE_DIR,
+    buscar_archivos_rcv,
+    generar_con_encabezados,
+)
+from procesar_general import ejecutar_procesamiento_general
+from validar_valores_columna import ejecutar_validacion
+from scripts_auxiliares.separar_por_ips_consecutivo import INDICE_IPS, separar_por_ips
+
+# --- CONFIGURACIÓN ---
+CARPETA_LOTE = "Lote_Procesado"
+RESUMEN_LOTE = "Resumen_Lote.csv"
+LOG_ARCHIVO = "Lote.log"
+NUM_FILAS_A_SALTEAR = 1
+# Procesos en paralelo (None = todos los núcleos). Cada proceso tiene un archivo
+# completo en memoria; con archivos grandes conviene bajar este valor o usar
+# FILAS_POR_BLOQUE.
+WORKERS_LOTE = None
+FILAS_POR_BLOQUE = None
+
+ETAPAS = ("copia", "limpieza", "validacion", "ips")
+
+
+def _carpeta_archivo(ruta, base_dir, carpeta_lote):
+    """Carpeta de salida del archivo: su ruta relativa sin extensión (única en el lote)"""
+    relativa = os.path.splitext(os.path.relpath(ruta, base_dir))[0]
+    nombre = relativa.replace(os.sep, "__").replace("/", "__")
+    return os.path.join(carpeta_lote, nombre)
+
+
+def _ejecutar_cadena(ruta, carpeta, encabezados_json, num_filas_a_saltar, filas_por_bloque, resumen):
+    """Ejecuta las cuatro etapas; resumen se completa a medida que avanzan"""
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+
+    # --- 1. COPIA ---
+    resumen["etapa"] = "copia"
+    print(f"[1/4] Copia con encabezados: {ruta}")
+    copia = generar_con_encabezados(
+        ruta,
+        encabezados_json_path=encabezados_json,
+        archivo_salida=os.path.join(carpeta, f"{nombre}_copia.xlsx"),
+    )
+    if not copia:
+        raise RuntimeError("No se generó la copia con encabezados")
+    resumen["copia"] = copia
+
+    # --- 2. LIMPIEZA ---
+    resumen["etapa"] = "limpieza"
+    print(f"[2/4] Limpieza: {copia}")
+    resultado = ejecutar_procesamiento_general(
+        copia,
+        archivo_salida=os.path.join(carpeta, f"{nombre}_limpio.xlsx"),
+        reporte_errores_csv=os.path.join(carpeta, "Reporte_Validacion_Errores.csv"),
+        reporte_errores_excel=os.path.join(carpeta, "Reporte_Validacion_Errores.xlsx"),
+        reporte_errores_totales_csv=os.path.join(carpeta, "Reporte_Validacion_Errores_Totales.csv"),
+        reporte_errores_totales_excel=os.path.join(carpeta, "Reporte_Validacion_Errores_Totales.xlsx"),
+        log_salida=os.path.join(carpeta, "Procesamiento_General.log"),
+        num_filas_a_saltar=num_filas_a_saltar,
+        filas_por_bloque=filas_por_bloque,
+    )
+    if not resultado:
+        raise RuntimeError("La limpieza terminó sin resultado")
+    limpio = resultado["archivo_salida"]
+    resumen["limpio"] = limpio
+    resumen["errores_limpieza"] = len(resultado["errores"])
+    resumen["errores_totales_limpieza"] = len(resultado["errores_totales"])
+    resumen["advertencias"] = "; ".join(resultado["advertencias"])
+
+    # --- 3. VALIDACIÓN DEL ARCHIVO LIMPIO ---
+    resumen["etapa"] = "validacion"
+    print(f"[3/4] Validación: {limpio}")
+    validacion = ejecutar_validacion(
+        limpio,
+        log_salida=os.path.join(carpeta, "Validacion_Columnas.log"),
+        num_filas_a_saltar=num_filas_a_saltar,
+        csv_salida=os.path.join(carpeta, "Validacion_Errores.csv"),
+    )
+    if not validacion:
+        raise RuntimeError("La validación terminó sin resultado")
+    resumen["errores_validacion"] = len(validacion["errores"])
+
+    # --- 4. SEPARACIÓN POR IPS ---
+    resumen["etapa"] = "ips"
+    print(f"[4/4] Separación por IPS: {limpio}")
+    carpeta_ips = separar_por_ips(
+        limpio,
+        carpeta_salida_base=os.path.join(carpeta, "Reportes_Por_IPS_CSV"),
+        num_filas_a_saltar=num_filas_a_saltar,
+        indice_ips=INDICE_IPS,
+    )
+    if not carpeta_ips or not os.path.exists(carpeta_ips):
+        raise RuntimeError("No se generaron los CSV por IPS")
+    resumen["carpeta_ips"] = carpeta_ips
+    resumen["archivos_ips"] = sum(
+        1 for f in os.listdir(carpeta_ips) if f.lower().endswith(".csv")
+    )
+
+
+def procesar_archivo_lote(
+    ruta,
+    carpeta,
+    encabezados_json=ARCHIVO_ENCABEZADOS_JSON,
+    num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
+    filas_por_bloque=FILAS_POR_BLOQUE,
+):
+    """
+    Cadena completa para un archivo (se ejecuta en un proceso del pool).
+
+    Todo lo que imprimen las etapas va al log del archivo (carpeta/LOG_ARCHIVO).
+
+    Returns:
+        dict: fila del resumen (archivo, estado, etapa, error, conteos, rutas)
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    log_archivo = os.path.join(carpeta, LOG_ARCHIVO)
+    resumen = {
+        "archivo": ruta,
+        "estado": "OK",
+        "etapa": "",
+        "error": "",
+        "advertencias": "",
+        "errores_limpieza": None,
+        "errores_totales_limpieza": None,
+        "errores_validacion": None,
+        "archivos_ips": None,
+        "segundos": None,
+        "copia": "",
+        "limpio": "",
+        "carpeta_ips": "",
+        "log": log_archivo,
+    }
+
+    inicio = time.perf_counter()
+    with open(log_archivo, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        try:
+            _ejecutar_cadena(
+                ruta, carpeta, encabezados_json, num_filas_a_saltar, filas_por_bloque, resumen
+            )
+            resumen["etapa"] = ""
+        except Exception as e:
+            resumen["estado"] = "ERROR"
+            resumen["error"] = str(e)
+            print(f"❌ Error en etapa '{resumen['etapa']}': {e}")
+            print(traceback.format_exc())
+    resumen["segundos"] = round(time.perf_counter() - inicio, 1)
+    return resumen
+
+
+def procesar_lote(
+    archivos,
+    base_dir=BASE_DIR,
+    carpeta_lote=CARPETA_LOTE,
+    workers=WORKERS_LOTE,
+    encabezados_json=ARCHIVO_ENCABEZADOS_JSON,
+    num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
+    filas_por_bloque=FILAS_POR_BLOQUE,
+):
+    """
+    Procesa varios archivos en un pool de procesos y escribe el resumen consolidado.
+
+    Args:
+        archivos: Rutas de los archivos RCV (.xlsb)
+        base_dir: Carpeta base (define el nombre de la carpeta de salida de cada archivo)
+        workers: Procesos en paralelo (None = todos los núcleos)
+
+    Returns:
+        DataFrame con una fila por archivo, en el orden de `archivos`; None si no hay archivos
+    """
+    if not archivos:
+        print(f"No se encontraron archivos .xlsb en: {os.path.abspath(base_dir)}")
+        return None
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(archivos)))
+
+    os.makedirs(carpeta_lote, exist_ok=True)
+    print("=" * 80)
+    print("PROCESAMIENTO POR LOTES: COPIA → LIMPIEZA → VALIDACIÓN → IPS")
+    print("=" * 80)
+    print(f"Archivos: {len(archivos)} | Procesos: {workers} | Salida: {os.path.abspath(carpeta_lote)}")
+    print()
+
+    resumenes = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {
+            pool.submit(
+                procesar_archivo_lote,
+                ruta,
+                _carpeta_archivo(ruta, base_dir, carpeta_lote),
+                encabezados_json,
+                num_filas_a_saltar,
+                filas_por_bloque,
+            ): ruta
+            for ruta in archivos
+        }
+        for completados, futuro in enumerate(as_completed(futuros), start=1):
+            ruta = futuros[futuro]
+            try:
+                resumen = futuro.result()
+            except Exception as e:
+                # El proceso murió (ej. sin memoria): no hay log del archivo
+                resumen = {"archivo": ruta, "estado": "ERROR", "etapa": "", "error": str(e)}
+            resumenes[ruta] = resumen
+            detalle = (
+                f"OK ({resumen['segundos']} s)"
+                if resumen["estado"] == "OK"
+                else f"ERROR en '{resumen['etapa']}': {resumen['error']}"
+            )
+            print(f"[{completados}/{len(archivos)}] {os.path.basename(ruta)}: {detalle}")
+
+    df_resumen = pd.DataFrame([resumenes[ruta] for ruta in archivos])
+    ruta_resumen = os.path.join(carpeta_lote, RESUMEN_LOTE)
+    df_resumen.to_csv(ruta_resumen, index=False, encoding="utf-8-sig", sep=";")
+
+    fallidos = int((df_resumen["estado"] != "OK").sum())
+    print()
+    print("=" * 80)
+    print("LOTE COMPLETADO")
+    print("=" * 80)
+    print(f"OK: {len(archivos) - fallidos} | Con error: {fallidos}")
+    print(f"📋 Resumen: {ruta_resumen}")
+    return df_resumen
+
+
+def parsear_args():
+    parser = argparse.ArgumentParser(
+        description="Ejecutar copia, limpieza, validación y separación por IPS para varios archivos."
+    )
+    parser.add_argument(
+        "--carpeta",
+        default=BASE_DIR,
+        help="Carpeta donde buscar los .xlsb (incluye subcarpetas).",
+    )
+    parser.add_argument(
+        "--salida",
+        default=CARPETA_LOTE,
+        help="Carpeta de resultados (una subcarpeta por archivo + resumen).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS_LOTE,
+        help="Procesos en paralelo (por defecto, todos los núcleos).",
+    )
+    parser.add_argument(
+        "--filas-por-bloque",
+        type=int,
+        default=FILAS_POR_BLOQUE,
+        help="Limpieza por bloques de filas (menos memoria por proceso).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parsear_args()
+    procesar_lote(
+        buscar_archivos_rcv(args.carpeta),
+        base_dir=args.carpeta,
+        carpeta_lote=args.salida,
+        workers=args.workers,
+        filas_por_bloque=args.filas_por_bloque,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Compilador de reglas de normalización declaradas en JSON (normalizaciones_config.json).
+
+Cada normalizador del JSON se convierte en una función valor → texto que
+normalizadores_lib aplica una vez por valor distinto de la columna:
+- Si todas sus reglas son 'igual_a', queda como una tabla {texto: resultado}.
+- Si usa 'contiene' / 'contiene_todos', todas las palabras clave del normalizador
+  se buscan en una sola pasada con una expresión combinada y luego cada regla
+  se evalúa como operaciones de conjuntos sobre las palabras encontradas.
+
+Formato: ver el "_comentario" de normalizaciones_config.json.
+"""
+import json
+import os
+import re
+
+import pandas as pd
+
+from texto_lib import plegar_texto
+
+
+def _texto_plegado(valor):
+    return plegar_texto(str(valor))
+
+
+def _texto_mayusculas(valor):
+    return str(valor).strip().upper()
+
+
+# Preparación del texto antes de evaluar las reglas
+MODOS_TEXTO = {
+    "plegado": _texto_plegado,
+    "mayusculas": _texto_mayusculas,
+}
+
+
+def _compilar_buscador(palabras):
+    """
+    Devuelve una función texto → frozenset de palabras clave contenidas en el texto.
+
+    Las palabras se combinan en un solo patrón con lookahead, así que se revisa
+    cada posición del texto una vez para todas las palabras. En cada posición la
+    alternativa más larga que coincide es la que se reporta; las demás que
+    coinciden en esa posición son prefijos suyos y se agregan desde una tabla
+    precalculada (ej. "wayuu" encontrada → también "wayu").
+    """
+    palabras = sorted(set(palabras), key=len, reverse=True)
+    patron = re.compile("(?=(" + "|".join(re.escape(p) for p in palabras) + "))")
+    prefijos = {
+        palabra: frozenset(p for p in palabras if palabra.startswith(p))
+        for palabra in palabras
+    }
+
+    def buscar(texto):
+        encontradas = set()
+        for coincidencia in patron.finditer(texto):
+            encontradas |= prefijos[coincidencia.group(1)]
+        return encontradas
+
+    return buscar
+
+
+def compilar_normalizador(nombre, definicion):
+    """
+    Compila la definición JSON de un normalizador.
+
+    Returns:
+        función valor → texto normalizado
+
+    Raises:
+        ValueError: si el modo de texto es desconocido o una regla no tiene 'resultado'
+    """
+    modo = definicion.get("texto", "plegado")
+    preparar = MODOS_TEXTO.get(modo)
+    if preparar is None:
+        raise ValueError(f"Normalizador '{nombre}': modo de texto desconocido '{modo}'")
+
+    reglas = []
+    palabras = set()
+    for regla in definicion.get("reglas", []):
+        if "resultado" not in regla:
+            raise ValueError(f"Normalizador '{nombre}': regla sin 'resultado': {regla}")
+        igual_a = frozenset(regla.get("igual_a", ()))
+        contiene = frozenset(regla.get("contiene", ()))
+        contiene_todos = frozenset(regla.get("contiene_todos", ()))
+        palabras |= contiene | contiene_todos
+        reglas.append((igual_a, contiene, contiene_todos, regla["resultado"]))
+
+    por_defecto = definicion.get("por_defecto")
+    vacios = definicion.get("vacios")
+    valores_vacios = frozenset(vacios.get("valores", ())) if vacios else None
+    resultado_vacios = vacios.get("resultado") if vacios else None
+
+    # Solo reglas 'igual_a': tabla de búsqueda (gana la primera regla que lista el texto)
+    tabla = None
+    if not palabras:
+        tabla = {}
+        for igual_a, _, _, resultado in reglas:
+            for texto in igual_a:
+                tabla.setdefault(texto, resultado)
+
+    buscar = _compilar_buscador(palabras) if palabras else None
+
+    def normalizar(valor):
+        if valores_vacios is not None and (
+            pd.isna(valor) or str(valor).strip() in valores_vacios
+        ):
+            return resultado_vacios
+
+        t = preparar(valor)
+        if tabla is not None:
+            resultado = tabla.get(t)
+            if resultado is not None:
+                return resultado
+        else:
+            encontradas = buscar(t)
+            for igual_a, contiene, contiene_todos, resultado in reglas:
+                if igual_a and t not in igual_a:
+                    continue
+                if contiene and contiene.isdisjoint(encontradas):
+                    continue
+                if not contiene_todos <= encontradas:
+                    continue
+                return resultado
+
+        return str(valor) if por_defecto is None else por_defecto
+
+    normalizar.__name__ = f"normalizar_{nombre}"
+    return normalizar
+
+
+def compilar_reglas(data):
+    """
+    Compila el contenido de normalizaciones_config.json.
+
+    Una definición inválida detiene la compilación completa: aplicar solo una
+    parte de las reglas daría resultados distintos sin avisar.
+
+    Returns:
+        tuple: ({nombre: función}, {indice 0-based: función})
+
+    Raises:
+        ValueError: si un normalizador o una columna no son válidos
+    """
+    por_nombre = {
+        nombre: compilar_normalizador(nombre, definicion)
+        for nombre, definicion in data.get("normalizadores", {}).items()
+    }
+
+    por_columna = {}
+    for item in data.get("columnas", []):
+        indice = item.get("indice")
+        nombre = item.get("normalizador")
+        if isinstance(indice, bool) or not isinstance(indice, int) or indice < 1:
+            raise ValueError(f"Columna de normalización con índice inválido: {item}")
+        if nombre not in por_nombre:
+            raise ValueError(f"Columna de normalización con normalizador desconocido: {item}")
+        # Convertir índice de JSON (1-based) a índice pandas (0-based)
+        por_columna[indice - 1] = por_nombre[nombre]
+
+    return por_nombre, por_columna
+
+
+def cargar_reglas(ruta_json):
+    """
+    Lee y compila las reglas de normalización.
+
+    Returns:
+        tuple: ({nombre: función}, {indice 0-based: función})
+
+    Raises:
+        FileNotFoundError: si no existe el archivo de reglas
+        ValueError: si el JSON no se puede leer o compilar
+    """
+    if not os.path.exists(ruta_json):
+        raise FileNotFoundError(f"No se encontró el archivo de reglas de normalización: {ruta_json}")
+
+    try:
+        with open(ruta_json, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return compilar_reglas(data)
+    except Exception as e:
+        raise ValueError(f"Error al leer reglas de normalización {ruta_json}: {e}") from e
@@ -1,28 +1,14 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
 
 # --- CONFIGURACIÓN ---
 ARCHIVO_EXCEL = "./Procesado_Final.xlsx"
 NUM_FILAS_A_SALTEAR = 1
 
-def detectar_engine(archivo):
-    """Detecta el engine apropiado según la extensión"""
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        return "pyxlsb"
-    elif ext in [".xlsx", ".xls"]:
-        return "openpyxl"
-    return None
-
-def leer_encabezados(archivo):
-    """Lee los encabezados del archivo"""
-    engine = detectar_engine(archivo)
-    try:
-        df_headers = pd.read_excel(archivo, header=None, skiprows=0, engine=engine, nrows=1)
-        return df_headers.iloc[0].tolist()
-    except Exception:
-        return []
-
 def analizar_valores_vacios(archivo, filas_a_saltar):
     """Analiza qué columnas tienen valores vacíos y muestra estadísticas"""
     
@@ -31,21 +17,12 @@ def analizar_valores_vacios(archivo, filas_a_saltar):
     print("="*80)
     print(f"Archivo: {archivo}\n")
     
-    # Leer datos
-    engine = detectar_engine(archivo)
-    if not engine:
-        print(f"Error: No se pudo detectar el tipo de archivo")
+    # Leer encabezados y datos (una sola lectura del libro)
+    encabezados, df = leer_libro(archivo, filas_a_saltar)
+    if df is None:
+        print(f"Error al leer archivo: {archivo}")
         return
-    
-    try:
-        df = pd.read_excel(archivo, header=None, skiprows=filas_a_saltar, engine=engine)
-        print(f"OK - Datos cargados: {len(df)} registros, {len(df.columns)} columnas\n")
-    except Exception as e:
-        print(f"Error al leer archivo: {e}")
-        return
-    
-    # Leer encabezados
-    encabezados = leer_encabezados(archivo)
+    print(f"OK - Datos cargados: {len(df)} registros, {len(df.columns)} columnas\n")
     
     # Analizar cada columna
     columnas_con_vacios = []
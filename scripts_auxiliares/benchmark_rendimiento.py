@@ -0,0 +1,561 @@
+"""
+Benchmark reproducible del pipeline con libros RCV sintéticos (sin datos de pacientes).
+
+1. Genera un libro .xlsx con la forma del RCV original (título en las filas 1-2,
+   los 125 encabezados de encabezados.json en la fila 3 y datos desde la fila 4)
+   para cada tamaño de TAMANOS. Los valores son sintéticos pero con la mezcla
+   que llega en los archivos mensuales:
+   - columnas validadas: los valores de validaciones_config.json (los primeros
+     más frecuentes) con variantes de mayúsculas, espacios y tildes;
+   - columnas de fecha (INDICES_FECHAS): fechas de Excel, seriales, textos en
+     varios formatos, fechas especiales (1800/1845) y vacíos;
+   - IPS (INDICE_IPS), medicamentos (vacíos y ceros), números y texto libre.
+   Con la misma semilla se genera siempre el mismo contenido; cada libro se
+   guarda en CARPETA_BENCHMARK/libros y se reutiliza.
+2. Mide cada punto de entrada en cadena: procesar_archivo (copia con
+   encabezados) → ejecutar_procesamiento_general → ejecutar_validacion →
+   separar_por_ips, más las etapas y pasos del plan que reporta metricas_lib.
+3. Agrega una línea por tamaño a CARPETA_BENCHMARK/resultados.jsonl (commit,
+   versión del código, versiones de Python/pandas) y la compara con la última
+   medición anterior del mismo tamaño y semilla: las medidas que empeoran más
+   de UMBRAL_REGRESION se marcan como regresión.
+
+Los cachés del proyecto (lectura, resultados, incremental) se crean en
+tempfile.gettempdir(): aquí se redirigen a una carpeta propia que se vacía
+antes de cada medición, así siempre se mide el trabajo completo.
+
+Uso (desde la carpeta raíz):
+    python scripts_auxiliares/benchmark_rendimiento.py --tamanos 10000 50000
+    python scripts_auxiliares/benchmark_rendimiento.py --tamanos 10000 --estricto
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Antes de importar los módulos del proyecto: sus carpetas de caché se calculan al importarlos
+CARPETA_TEMPORAL_BENCHMARK = os.path.join(tempfile.gettempdir(), "rcv_benchmark_tmp")
+os.makedirs(CARPETA_TEMPORAL_BENCHMARK, exist_ok=True)
+tempfile.tempdir = CARPETA_TEMPORAL_BENCHMARK
+
+sys.path.insert(0, RAIZ)
+from cache_resultados_lib import version_codigo  # noqa: E402
+from crear_con_encabezados_desde_rcv import (  # noqa: E402
+    DATA_START_ROW,
+    leer_encabezados_json,
+    procesar_archivo as crear_copia,
+)
+import fechas_lib  # noqa: E402
+from fechas_lib import INDICES_FECHAS  # noqa: E402
+from lectura_lib import leer_libro  # noqa: E402
+from normalizadores_lib import INDICES_MEDICAMENTOS, INDICES_SINDATO  # noqa: E402
+from procesar_general import ejecutar_procesamiento_general  # noqa: E402
+from validar_valores_columna import ejecutar_validacion  # noqa: E402
+from scripts_auxiliares.separar_por_ips_consecutivo import (  # noqa: E402
+    INDICE_IPS,
+    separar_por_ips,
+)
+
+# --- CONFIGURACIÓN ---
+TAMANOS = (10000, 50000, 200000)
+SEMILLA = 2024
+CARPETA_BENCHMARK = "Benchmark_Rendimiento"
+ARCHIVO_RESULTADOS = "resultados.jsonl"
+ENCABEZADOS_JSON = os.path.join(RAIZ, "encabezados.json")
+VALIDACIONES_JSON = os.path.join(RAIZ, "validaciones_config.json")
+NORMALIZACIONES_JSON = os.path.join(RAIZ, "normalizaciones_config.json")
+# Cada medida se repite y se conserva la menor (la menos afectada por otros procesos)
+REPETICIONES = 1
+# Una medida es regresión si tarda más de (1 + UMBRAL) veces la referencia y
+# al menos DIFERENCIA_MINIMA_SEGUNDOS más (evita marcar ruido en medidas cortas)
+UMBRAL_REGRESION = 0.10
+DIFERENCIA_MINIMA_SEGUNDOS = 0.5
+FILAS_POR_BLOQUE_GENERACION = 10000
+NUM_IPS = 40
+
+ENTRADAS = ("procesar_archivo", "procesar_general", "validacion", "separar_por_ips")
+
+# --- VALORES SINTÉTICOS ---
+NOMBRES = ["MARIA", "JOSE", "ANA", "LUIS", "CARMEN", "JUAN", "ROSA", "CARLOS", "LUZ", "PEDRO"]
+APELLIDOS = ["GOMEZ", "PEREZ", "RODRIGUEZ", "MARTINEZ", "LOPEZ", "DIAZ", "PUSHAINA", "EPIEYU"]
+VACIOS = [None, "", " ", "SIN DATO", "sin dato", "SIN_DATO", "N/A"]
+TEXTOS_LIBRES = [
+    "CONTROL", "PACIENTE ESTABLE", "  pendiente  ", "NO APLICA", "REMITIDO",
+    "sin novedad", "Normal", "ANORMAL", "0", "1",
+]
+MEDICAMENTOS = ["LOSARTAN 50MG", "ENALAPRIL 20MG", "METFORMINA 850MG", "ASA 100MG", "0", 0]
+FECHA_BASE = np.datetime64("1950-01-01")
+DIAS_FECHAS = 27000  # hasta ~2024
+
+
+def _sin_tildes(texto):
+    return "".join(
+        c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn"
+    )
+
+
+def _pesos_zipf(cantidad):
+    """Frecuencias decrecientes: el primer valor es el más común"""
+    pesos = 1.0 / np.arange(1, cantidad + 1)
+    return pesos / pesos.sum()
+
+
+def _elegir(rng, opciones, n, pesos=None):
+    arreglo = np.empty(len(opciones), dtype=object)
+    arreglo[:] = opciones
+    return rng.choice(arreglo, size=n, p=pesos)
+
+
+def _cargar_validos(ruta=VALIDACIONES_JSON):
+    """{indice 0-based: valores válidos en el orden del JSON}"""
+    with open(ruta, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        item["indice"] - 1: list(item["validos"])
+        for item in data.get("columnas_validacion", [])
+        if item.get("indice") and item.get("validos")
+    }
+
+
+def _tipos_columnas(num_columnas, validos):
+    """Tipo de contenido de cada columna (0-based)"""
+    fechas = set(INDICES_FECHAS)
+    medicamentos = set(INDICES_MEDICAMENTOS)
+    tipos = []
+    for indice in range(num_columnas):
+        if indice == 0:
+            tipos.append("consecutivo")
+        elif indice == INDICE_IPS:
+            tipos.append("ips")
+        elif indice in fechas:
+            tipos.append("fecha")
+        elif indice in validos:
+            tipos.append("categoria")
+        elif indice in medicamentos:
+            tipos.append("medicamento")
+        elif indice in (1, 2):
+            tipos.append("nombre")
+        elif indice in (3, 4):
+            tipos.append("apellido")
+        elif indice % 3 == 0 and indice not in INDICES_SINDATO:
+            tipos.append("numero")
+        else:
+            tipos.append("texto")
+    return tipos
+
+
+def _columna_categoria(rng, validos, n):
+    valores = _elegir(rng, validos, n, _pesos_zipf(len(validos)))
+    # Variantes que los normalizadores deben corregir
+    variante = rng.random(n)
+    for i in np.flatnonzero(variante < 0.15):
+        v = str(valores[i])
+        valores[i] = (v.upper(), v.lower(), f"  {v} ", _sin_tildes(v))[i % 4]
+    vacios = variante > 0.95
+    valores[vacios] = _elegir(rng, VACIOS, int(vacios.sum()))
+    return valores.tolist()
+
+
+def _columna_fecha(rng, n):
+    dias = rng.integers(0, DIAS_FECHAS, n)
+    fechas = pd.to_datetime(FECHA_BASE + dias.astype("timedelta64[D]"))
+    forma = rng.random(n)
+    valores = np.empty(n, dtype=object)
+
+    como_fecha = forma < 0.40
+    valores[como_fecha] = fechas[como_fecha].to_pydatetime()
+    serial = (forma >= 0.40) & (forma < 0.55)
+    valores[serial] = (dias[serial] + 18264).tolist()  # días desde 1899-12-30
+    dma = (forma >= 0.55) & (forma < 0.75)
+    valores[dma] = fechas[dma].strftime("%d/%m/%Y").tolist()
+    amd = (forma >= 0.75) & (forma < 0.85)
+    valores[amd] = fechas[amd].strftime("%Y-%m-%d").tolist()
+    especial = (forma >= 0.85) & (forma < 0.90)
+    valores[especial] = _elegir(rng, ["1800/01/01", "1800-01-01", "1845-01-01"], int(especial.sum()))
+    vacio = forma >= 0.90
+    valores[vacio] = _elegir(rng, VACIOS, int(vacio.sum()))
+    return valores.tolist()
+
+
+def _columna_numero(rng, n):
+    valores = np.empty(n, dtype=object)
+    forma = rng.random(n)
+    enteros = forma < 0.6
+    valores[enteros] = rng.integers(0, 300, int(enteros.sum())).tolist()
+    decimales = (forma >= 0.6) & (forma < 0.9)
+    valores[decimales] = np.round(rng.random(int(decimales.sum())) * 200, 2).tolist()
+    vacio = forma >= 0.9
+    valores[vacio] = _elegir(rng, VACIOS + ["0", 0], int(vacio.sum()))
+    return valores.tolist()
+
+
+def _generar_columna(tipo, indice, rng, n, inicio, validos):
+    if tipo == "consecutivo":
+        return list(range(inicio + 1, inicio + n + 1))
+    if tipo == "ips":
+        nombres = [f"IPS SINTETICA {k:02d}" for k in range(1, NUM_IPS + 1)]
+        return _elegir(rng, nombres, n, _pesos_zipf(NUM_IPS)).tolist()
+    if tipo == "fecha":
+        return _columna_fecha(rng, n)
+    if tipo == "categoria":
+        return _columna_categoria(rng, validos[indice], n)
+    if tipo == "medicamento":
+        return _elegir(rng, MEDICAMENTOS + VACIOS, n).tolist()
+    if tipo == "nombre":
+        return _elegir(rng, NOMBRES + [None], n).tolist()
+    if tipo == "apellido":
+        return _elegir(rng, APELLIDOS + [None], n).tolist()
+    if tipo == "numero":
+        return _columna_numero(rng, n)
+    return _elegir(rng, TEXTOS_LIBRES + VACIOS, n).tolist()
+
+
+def generar_libro_sintetico(ruta, filas, semilla=SEMILLA, encabezados_json=ENCABEZADOS_JSON):
+    """
+    Escribe un libro RCV sintético de `filas` registros (ver docstring del módulo).
+
+    Se escribe en streaming por bloques de filas: la memoria no depende del tamaño.
+    """
+    encabezados = leer_encabezados_json(encabezados_json)
+    validos = _cargar_validos()
+    tipos = _tipos_columnas(len(encabezados), validos)
+    rng = np.random.default_rng(semilla)
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("RCV")
+    hoja.append(["BASE DE DATOS RUTA CARDIOCEREBROVASCULAR METABÓLICA (SINTÉTICA)"])
+    for _ in range(DATA_START_ROW - 3):
+        hoja.append([])
+    hoja.append(encabezados)
+
+    for inicio in range(0, filas, FILAS_POR_BLOQUE_GENERACION):
+        n = min(FILAS_POR_BLOQUE_GENERACION, filas - inicio)
+        columnas = [
+            _generar_columna(tipo, indice, rng, n, inicio, validos)
+            for indice, tipo in enumerate(tipos)
+        ]
+        for fila in zip(*columnas):
+            hoja.append(fila)
+
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    ruta_tmp = f"{ruta}.tmp"
+    libro.save(ruta_tmp)
+    os.replace(ruta_tmp, ruta)
+    return ruta
+
+
+def obtener_libro(filas, semilla, carpeta):
+    """Ruta del libro sintético del tamaño pedido (lo genera si no existe)"""
+    ruta = os.path.join(carpeta, "libros", f"rcv_sintetico_{filas}_s{semilla}.xlsx")
+    if not os.path.exists(ruta):
+        print(f"Generando libro sintético de {filas} filas: {ruta}")
+        inicio = time.perf_counter()
+        generar_libro_sintetico(ruta, filas, semilla)
+        print(f"  OK - {time.perf_counter() - inicio:.1f} s")
+    return ruta
+
+
+# --- MEDICIÓN ---
+
+def _vaciar_temporales():
+    shutil.rmtree(CARPETA_TEMPORAL_BENCHMARK, ignore_errors=True)
+    os.makedirs(CARPETA_TEMPORAL_BENCHMARK, exist_ok=True)
+
+
+def _medir(nombre, funcion, repeticiones, log):
+    """
+    (menor tiempo en segundos, resultado de la última ejecución)
+
+    Raises:
+        RuntimeError: si el punto de entrada retorna None (falló sin excepción):
+            su tiempo no sería comparable con el de una ejecución completa
+    """
+    mejor = None
+    resultado = None
+    for _ in range(max(1, repeticiones)):
+        _vaciar_temporales()
+        with contextlib.redirect_stdout(log):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            segundos = time.perf_counter() - inicio
+        if resultado is None:
+            raise RuntimeError(f"{nombre} terminó sin resultado (ver {log.name})")
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return round(mejor, 3), resultado
+
+
+def verificar_prefiltro_fechas(libro):
+    """
+    Comprueba que limpiar_fechas_especiales_columna no mande a detectar_fecha_especial
+    textos sin "1800"/"1845" (nombres, direcciones, códigos) en las columnas no fecha.
+
+    Raises:
+        RuntimeError: si algún texto sin el año llegó a detectar_fecha_especial
+    """
+    _, df = leer_libro(libro)
+    indebidos = []
+    detectar = fechas_lib.detectar_fecha_especial
+
+    def detectar_vigilado(valor):
+        if isinstance(valor, str) and not re.search(fechas_lib._PATRON_ANIO_ESPECIAL, valor):
+            indebidos.append(valor)
+        return detectar(valor)
+
+    fechas_lib.detectar_fecha_especial = detectar_vigilado
+    try:
+        for indice in range(len(df.columns)):
+            if indice not in INDICES_FECHAS and df.dtypes.iloc[indice] == object:
+                fechas_lib.limpiar_fechas_especiales_columna(df.iloc[:, indice])
+    finally:
+        fechas_lib.detectar_fecha_especial = detectar
+    if indebidos:
+        raise RuntimeError(
+            f"{len(indebidos)} textos sin 1800/1845 pasaron por detectar_fecha_especial "
+            f"(ej. {indebidos[:3]})"
+        )
+
+
+def _commit_actual():
+    try:
+        salida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ, capture_output=True, text=True, timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+
+def ejecutar_benchmark(filas, semilla=SEMILLA, carpeta=CARPETA_BENCHMARK,
+                       repeticiones=REPETICIONES, entradas=ENTRADAS):
+    """
+    Mide los puntos de entrada sobre el libro sintético de `filas` registros.
+
+    Returns:
+        dict: registro de resultados (medidas en segundos por nombre)
+    """
+    rcv = obtener_libro(filas, semilla, carpeta)
+    trabajo = os.path.join(carpeta, f"trabajo_{filas}")
+    shutil.rmtree(trabajo, ignore_errors=True)
+    os.makedirs(trabajo)
+    encabezados = leer_encabezados_json(ENCABEZADOS_JSON)
+
+    medidas = {}
+    copia = os.path.join(trabajo, "rcv_copia.xlsx")
+    limpio = os.path.join(trabajo, "rcv_limpio.xlsx")
+    with open(os.path.join(trabajo, "benchmark.log"), "w", encoding="utf-8") as log:
+        # La copia es la entrada de los demás pasos: se genera aunque no se mida
+        segundos, _ = _medir(
+            "procesar_archivo",
+            lambda: crear_copia(rcv, encabezados, archivo_salida=copia),
+            repeticiones if "procesar_archivo" in entradas else 1,
+            log,
+        )
+        if "procesar_archivo" in entradas:
+            medidas["procesar_archivo"] = segundos
+        with contextlib.redirect_stdout(log):
+            verificar_prefiltro_fechas(copia)
+
+        # Configuración con rutas absolutas: desde otra carpeta las rutas
+        # relativas por defecto no la encuentran
+        segundos, resultado = _medir(
+            "procesar_general",
+            lambda: ejecutar_procesamiento_general(
+                copia,
+                archivo_salida=limpio,
+                config_json=VALIDACIONES_JSON,
+                reglas_json=NORMALIZACIONES_JSON,
+                reporte_errores_csv=os.path.join(trabajo, "Reporte_Validacion_Errores.csv"),
+                reporte_errores_excel=os.path.join(trabajo, "Reporte_Validacion_Errores.xlsx"),
+                reporte_errores_totales_csv=os.path.join(trabajo, "Reporte_Errores_Totales.csv"),
+                reporte_errores_totales_excel=os.path.join(trabajo, "Reporte_Errores_Totales.xlsx"),
+                log_salida=os.path.join(trabajo, "Procesamiento_General.log"),
+            ),
+            repeticiones if "procesar_general" in entradas else 1,
+            log,
+        )
+        if "procesar_general" in entradas:
+            medidas["procesar_general"] = segundos
+            metricas = resultado["metricas"]
+            for etapa in metricas["etapas"]:
+                medidas[f"procesar_general.{etapa['etapa']}"] = etapa["segundos"]
+            for paso in metricas["pasos_plan"]:
+                medidas[f"plan.{paso['paso']}"] = paso["segundos"]
+
+        if "validacion" in entradas:
+            medidas["validacion"], _ = _medir(
+                "validacion",
+                lambda: ejecutar_validacion(
+                    limpio,
+                    config_json=VALIDACIONES_JSON,
+                    log_salida=os.path.join(trabajo, "Validacion_Columnas.log"),
+                    csv_salida=os.path.join(trabajo, "Validacion_Errores.csv"),
+                ),
+                repeticiones,
+                log,
+            )
+
+        if "separar_por_ips" in entradas:
+            medidas["separar_por_ips"], _ = _medir(
+                "separar_por_ips",
+                lambda: separar_por_ips(
+                    limpio, carpeta_salida_base=os.path.join(trabajo, "Reportes_Por_IPS_CSV")
+                ),
+                repeticiones,
+                log,
+            )
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "version_codigo": version_codigo(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "filas": filas,
+        "semilla": semilla,
+        "repeticiones": repeticiones,
+        "medidas": medidas,
+    }
+
+
+# --- RESULTADOS Y COMPARACIÓN ---
+
+def cargar_resultados(ruta):
+    if not os.path.exists(ruta):
+        return []
+    registros = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                print(f"Línea inválida ignorada en {ruta}: {linea[:80]}")
+    return registros
+
+
+def guardar_resultado(registro, ruta):
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def buscar_referencia(registros, filas, semilla, commit=None):
+    """Última medición del mismo tamaño y semilla (de ese commit, si se indica)"""
+    for registro in reversed(registros):
+        if registro.get("filas") != filas or registro.get("semilla") != semilla:
+            continue
+        if commit and not str(registro.get("commit") or "").startswith(commit):
+            continue
+        return registro
+    return None
+
+
+def comparar(actual, referencia, umbral=UMBRAL_REGRESION):
+    """
+    Imprime la comparación medida por medida.
+
+    Returns:
+        list: nombres de las medidas con regresión
+    """
+    print(f"  Referencia: {referencia['fecha']} (commit {referencia.get('commit') or '-'})")
+    print(f"  {'medida':<42} {'antes':>9} {'ahora':>9} {'razón':>7}")
+    regresiones = []
+    for nombre, segundos in actual["medidas"].items():
+        antes = referencia["medidas"].get(nombre)
+        if antes is None:
+            print(f"  {nombre:<42} {'-':>9} {segundos:>9.2f}")
+            continue
+        razon = segundos / antes if antes else float("inf")
+        marca = ""
+        if razon > 1 + umbral and segundos - antes >= DIFERENCIA_MINIMA_SEGUNDOS:
+            marca = "  ⚠ REGRESIÓN"
+            regresiones.append(nombre)
+        print(f"  {nombre:<42} {antes:>9.2f} {segundos:>9.2f} {razon:>6.2f}x{marca}")
+    return regresiones
+
+
+def parsear_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark del pipeline con libros RCV sintéticos."
+    )
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS),
+                        help="Filas de cada libro sintético.")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--carpeta", default=CARPETA_BENCHMARK,
+                        help="Carpeta de libros, salidas y resultados.")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--entradas", nargs="+", choices=ENTRADAS, default=list(ENTRADAS),
+                        help="Puntos de entrada a medir.")
+    parser.add_argument("--referencia", default=None,
+                        help="Commit con el que comparar (por defecto, la última medición).")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                        help="Aumento relativo que cuenta como regresión (0.10 = 10%%).")
+    parser.add_argument("--solo-generar", action="store_true",
+                        help="Solo generar los libros sintéticos.")
+    parser.add_argument("--no-guardar", action="store_true",
+                        help="No agregar esta medición a resultados.jsonl.")
+    parser.add_argument("--estricto", action="store_true",
+                        help="Terminar con código 1 si hay regresiones.")
+    return parser.parse_args()
+
+
+def main():
+    args = parsear_args()
+    ruta_resultados = os.path.join(args.carpeta, ARCHIVO_RESULTADOS)
+
+    if args.solo_generar:
+        for filas in args.tamanos:
+            obtener_libro(filas, args.semilla, args.carpeta)
+        return 0
+
+    registros = cargar_resultados(ruta_resultados)
+    regresiones = []
+    for numero, filas in enumerate(args.tamanos, start=1):
+        print(f"[{numero}/{len(args.tamanos)}] Benchmark con {filas} filas...")
+        registro = ejecutar_benchmark(
+            filas, args.semilla, args.carpeta, args.repeticiones, tuple(args.entradas)
+        )
+        for nombre in ENTRADAS:
+            if nombre in registro["medidas"]:
+                print(f"  {nombre}: {registro['medidas'][nombre]:.2f} s")
+
+        referencia = buscar_referencia(registros, filas, args.semilla, args.referencia)
+        if referencia:
+            regresiones += [f"{filas}: {m}" for m in comparar(registro, referencia, args.umbral)]
+        else:
+            print("  Sin medición de referencia para comparar.")
+
+        if not args.no_guardar:
+            guardar_resultado(registro, ruta_resultados)
+            registros.append(registro)
+        print()
+
+    if not args.no_guardar:
+        print(f"📋 Resultados: {ruta_resultados}")
+    if regresiones:
+        print(f"⚠ Regresiones ({len(regresiones)}): {', '.join(regresiones)}")
+        return 1 if args.estricto else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
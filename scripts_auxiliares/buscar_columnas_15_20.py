@@ -1,38 +1,23 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
 
 ARCHIVO_EXCEL = "rcv_cesar.xlsx"
 ARCHIVO_SALIDA = "Medicamentos_SINDATO.xlsx"
 NUM_FILAS_A_SALTEAR = 1
 
 
-def detectar_engine(archivo):
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb
-
-            return "pyxlsb"
-        except ImportError:
-            print("Instalando pyxlsb...")
-            import subprocess
-            import sys
-
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "pyxlsb"])
-            return "pyxlsb"
-    elif ext == ".xlsx":
-        return "openpyxl"
-    return None
-
-
 def buscar_columnas_rango(archivo):
-    print(f"Leyendo encabezados de: {archivo}\n")
+    print(f"Leyendo archivo: {archivo}\n")
 
-    engine = detectar_engine(archivo)
-
-    # Leer encabezados
-    df_headers = pd.read_excel(archivo, header=None, skiprows=0, nrows=1, engine=engine)
-    encabezados = df_headers.iloc[0].tolist()
+    # Leer encabezados y datos (una sola lectura del libro)
+    encabezados, df = leer_libro(archivo, NUM_FILAS_A_SALTEAR)
+    if df is None:
+        print(f"Error al leer archivo: {archivo}")
+        return
 
     # Información general del archivo
     print(f"📊 INFORMACIÓN DEL ARCHIVO")
@@ -73,23 +58,6 @@ def buscar_columnas_rango(archivo):
 
         indices = [col_info["indice"] for col_info in columnas_encontradas]
 
-        # Leer el archivo completo con datos
-        print(f"\nLeyendo archivo completo: {ARCHIVO_EXCEL}")
-        if ARCHIVO_EXCEL.endswith(".xlsb"):
-            df = pd.read_excel(
-                ARCHIVO_EXCEL,
-                engine="pyxlsb",
-                skiprows=NUM_FILAS_A_SALTEAR,
-                header=None,
-            )
-        else:
-            df = pd.read_excel(
-                ARCHIVO_EXCEL,
-                engine="openpyxl",
-                skiprows=NUM_FILAS_A_SALTEAR,
-                header=None,
-            )
-
         print(f"Total de filas leídas del archivo original: {len(df)}")
         print(
             f"(Sin contar la fila {NUM_FILAS_A_SALTEAR} que se saltó como encabezado)"
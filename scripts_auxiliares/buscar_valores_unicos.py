@@ -1,7 +1,9 @@
-import pandas as pd
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
+
 # --- CONFIGURACIÓN ---
 ARCHIVO_EXCEL = "prueba.xlsx"
 NUM_FILAS_A_SALTEAR = 1
@@ -50,31 +52,11 @@ def buscar_valores_unicos(archivo, encabezado_buscado, filas_a_saltar):
     print(f"Leyendo archivo: {archivo}")
 
     try:
-        # Detectar el engine según la extensión
-        ext = os.path.splitext(archivo)[1].lower()
-        if ext == ".xlsb":
-            try:
-                import pyxlsb
-
-                engine = "pyxlsb"
-            except ImportError:
-                print("Instalando pyxlsb...")
-                import subprocess
-
-                subprocess.check_call(
-                    [sys.executable, "-m", "pip", "install", "pyxlsb"]
-                )
-                engine = "pyxlsb"
-        elif ext == ".xlsx":
-            engine = "openpyxl"
-        else:
-            engine = None
-
-        # Leer encabezados (primera fila)
-        df_headers = pd.read_excel(
-            archivo, header=None, skiprows=0, nrows=1, engine=engine
-        )
-        encabezados = df_headers.iloc[0].tolist()
+        # Leer encabezados y datos (una sola lectura del libro)
+        encabezados, df = leer_libro(archivo, filas_a_saltar)
+        if df is None:
+            print(f"❌ Error: No se pudo leer el archivo '{archivo}'.")
+            return
 
         # Buscar el índice de la columna
         indice_columna = None
@@ -107,8 +89,6 @@ def buscar_valores_unicos(archivo, encabezado_buscado, filas_a_saltar):
             f"✓ Columna encontrada en índice {indice_columna}: '{encabezados[indice_columna]}'"
         )
 
-        # Leer datos
-        df = pd.read_excel(archivo, header=None, skiprows=filas_a_saltar, engine=engine)
         columna = df.iloc[:, indice_columna]
 
         # Obtener valores únicos (excluyendo NaN)
@@ -141,8 +121,6 @@ def buscar_valores_unicos(archivo, encabezado_buscado, filas_a_saltar):
             tiene_espacios = "⚠️ " if str(valor) != str(valor).strip() else ""
             print(f"  {i}. {tiene_espacios}'{valor}' → {cantidad} veces")
 
-    except FileNotFoundError:
-        print(f"❌ Error: El archivo '{archivo}' no se encontró.")
     except Exception as e:
         print(f"❌ Error: {e}")
 
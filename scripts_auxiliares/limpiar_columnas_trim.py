@@ -2,6 +2,9 @@ import pandas as pd
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
+
 # --- CONFIGURACIÓN ---
 ARCHIVO_EXCEL = "prueba.xlsx"
 ARCHIVO_SALIDA = "Columnas_Con_Trim.xlsx"
@@ -45,49 +48,6 @@ INDICES_FECHAS = [
 ]
 
 
-def detectar_engine(archivo):
-    """Detecta el engine según la extensión del archivo"""
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb
-
-            return "pyxlsb"
-        except ImportError:
-            print("Instalando pyxlsb...")
-            import subprocess
-
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "pyxlsb"])
-            return "pyxlsb"
-    elif ext == ".xlsx":
-        return "openpyxl"
-    return None
-
-
-def leer_encabezados(archivo):
-    """Lee los encabezados del archivo"""
-    engine = detectar_engine(archivo)
-    try:
-        df_headers = pd.read_excel(
-            archivo, header=None, skiprows=0, nrows=1, engine=engine
-        )
-        return df_headers.iloc[0].tolist()
-    except Exception as e:
-        print(f"Error al leer encabezados: {e}")
-        return []
-
-
-def leer_datos(archivo, filas_a_saltar):
-    """Lee todos los datos del archivo"""
-    engine = detectar_engine(archivo)
-    try:
-        df = pd.read_excel(archivo, header=None, skiprows=filas_a_saltar, engine=engine)
-        return df
-    except Exception as e:
-        print(f"Error al leer datos: {e}")
-        return None
-
-
 def analizar_columna(df, indice, nombre_encabezado):
     """Analiza una columna y retorna información sobre valores únicos y espacios"""
     columna = df.iloc[:, indice]
@@ -149,7 +109,7 @@ def main():
 
     # Leer encabezados
     print(f"\nLeyendo archivo: {ARCHIVO_EXCEL}")
-    encabezados = leer_encabezados(ARCHIVO_EXCEL)
+    encabezados, df = leer_libro(ARCHIVO_EXCEL, NUM_FILAS_A_SALTEAR)
 
     if not encabezados:
         print("No se pudieron leer los encabezados.")
@@ -181,8 +141,6 @@ def main():
         print("Saliendo...")
         return
 
-    # Leer datos
-    df = leer_datos(ARCHIVO_EXCEL, NUM_FILAS_A_SALTEAR)
     if df is None:
         return
 
@@ -275,9 +233,9 @@ def main():
             # Crear DataFrame de salida con TODAS las columnas
             df_salida = pd.DataFrame()
 
-            # Recargar el DataFrame completo para incluir todas las columnas
-            df_completo = leer_datos(ARCHIVO_EXCEL, NUM_FILAS_A_SALTEAR)
-            encabezados_completos = leer_encabezados(ARCHIVO_EXCEL)
+            # El DataFrame leído al inicio ya incluye todas las columnas
+            df_completo = df
+            encabezados_completos = encabezados
 
             # Procesar todas las columnas
             for i, encabezado in enumerate(encabezados_completos):
@@ -3,6 +3,9 @@ import os
 import sys
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
+
 # --- CONFIGURACIÓN ---
 ARCHIVO_EXCEL = "prueba.xlsx"
 LOG_SALIDA = "Normalizacion_Valores_Unicos.log"
@@ -46,49 +49,6 @@ INDICES_FECHAS = [
 ]
 
 
-def detectar_engine(archivo):
-    """Detecta el engine según la extensión del archivo"""
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb
-
-            return "pyxlsb"
-        except ImportError:
-            print("Instalando pyxlsb...")
-            import subprocess
-
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "pyxlsb"])
-            return "pyxlsb"
-    elif ext == ".xlsx":
-        return "openpyxl"
-    return None
-
-
-def leer_encabezados(archivo):
-    """Lee los encabezados del archivo"""
-    engine = detectar_engine(archivo)
-    try:
-        df_headers = pd.read_excel(
-            archivo, header=None, skiprows=0, nrows=1, engine=engine
-        )
-        return df_headers.iloc[0].tolist()
-    except Exception as e:
-        print(f"Error al leer encabezados: {e}")
-        return []
-
-
-def leer_datos(archivo, filas_a_saltar):
-    """Lee todos los datos del archivo"""
-    engine = detectar_engine(archivo)
-    try:
-        df = pd.read_excel(archivo, header=None, skiprows=filas_a_saltar, engine=engine)
-        return df
-    except Exception as e:
-        print(f"Error al leer datos: {e}")
-        return None
-
-
 def encontrar_variantes(valores):
     """
     Agrupa valores por su versión normalizada (minúsculas sin espacios extras)
@@ -126,12 +86,11 @@ def analizar_todas_columnas(archivo, filas_a_saltar):
 
     print(f"Leyendo archivo: {archivo}")
 
-    encabezados = leer_encabezados(archivo)
+    encabezados, df = leer_libro(archivo, filas_a_saltar)
     if not encabezados:
         print("No se pudieron leer los encabezados.")
         return
 
-    df = leer_datos(archivo, filas_a_saltar)
     if df is None:
         return
 
@@ -1,7 +1,11 @@
 import pandas as pd
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
+
 # --- CONFIGURACIÓN ---
 ARCHIVO_ORIGINAL = "./rcv_cesar.xlsx"
 ARCHIVO_SALIDA = "Todas_Fechas_Estandarizadas.xlsx"
@@ -190,36 +194,12 @@ def procesar_todas_fechas(
 ):
     print(f"Leyendo archivo: {archivo_entrada}")
 
-    try:
-        # Detectar el engine según la extensión
-        ext = os.path.splitext(archivo_entrada)[1].lower()
-        if ext == ".xlsb":
-            df = pd.read_excel(
-                archivo_entrada, header=None, skiprows=filas_a_saltar, engine="pyxlsb"
-            )
-        else:
-            df = pd.read_excel(archivo_entrada, header=None, skiprows=filas_a_saltar)
-        print(f"Datos cargados correctamente. Registros: {len(df)}\n")
-    except FileNotFoundError:
-        print(f"Error: El archivo '{archivo_entrada}' no se encontró.")
-        return
-    except Exception as e:
-        print(f"Error al leer el archivo: {e}")
+    # Leer encabezados (primera fila) y datos (una sola lectura del libro)
+    encabezados, df = leer_libro(archivo_entrada, filas_a_saltar)
+    if df is None:
+        print(f"Error: No se pudo leer el archivo '{archivo_entrada}'.")
         return
-
-    # Leer los encabezados (primera fila del archivo original)
-    try:
-        if ext == ".xlsb":
-            df_headers = pd.read_excel(
-                archivo_entrada, header=None, skiprows=0, engine="pyxlsb", nrows=1
-            )
-        else:
-            df_headers = pd.read_excel(
-                archivo_entrada, header=None, skiprows=0, nrows=1
-            )
-        encabezados = df_headers.iloc[0].tolist()
-    except Exception:
-        encabezados = {}
+    print(f"Datos cargados correctamente. Registros: {len(df)}\n")
 
     # Crear DataFrame de salida con todas las columnas
     df_salida = pd.DataFrame()
@@ -1,7 +1,9 @@
-import pandas as pd
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
+
 # --- CONFIGURACIÓN ---
 ARCHIVO_EXCEL = "prueba.xlsx"
 ARCHIVO_SALIDA = "prueba_consecutivo_regenerado.xlsx"
@@ -9,25 +11,6 @@ NUM_FILAS_A_SALTEAR = 1
 NOMBRE_COLUMNA_CONSECUTIVO = "CONSECUTIVO"
 
 
-def detectar_engine(archivo):
-    """Detecta el engine según la extensión del archivo"""
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb
-
-            return "pyxlsb"
-        except ImportError:
-            print("Instalando pyxlsb...")
-            import subprocess
-
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "pyxlsb"])
-            return "pyxlsb"
-    elif ext == ".xlsx":
-        return "openpyxl"
-    return None
-
-
 def regenerar_consecutivo(
     archivo_entrada, archivo_salida, nombre_columna, filas_a_saltar
 ):
@@ -41,13 +24,11 @@ def regenerar_consecutivo(
     print(f"Leyendo archivo: {archivo_entrada}")
 
     try:
-        engine = detectar_engine(archivo_entrada)
-
-        # Leer encabezados
-        df_headers = pd.read_excel(
-            archivo_entrada, header=None, skiprows=0, nrows=1, engine=engine
-        )
-        encabezados = df_headers.iloc[0].tolist()
+        # Leer encabezados y datos (una sola lectura del libro)
+        encabezados, df = leer_libro(archivo_entrada, filas_a_saltar)
+        if df is None:
+            print(f"❌ Error: No se pudo leer el archivo '{archivo_entrada}'.")
+            return
 
         # Buscar la columna CONSECUTIVO
         indice_consecutivo = None
@@ -65,10 +46,6 @@ def regenerar_consecutivo(
 
         print(f"✓ Columna '{nombre_columna}' encontrada en índice {indice_consecutivo}")
 
-        # Leer todos los datos
-        df = pd.read_excel(
-            archivo_entrada, header=None, skiprows=filas_a_saltar, engine=engine
-        )
         print(f"✓ Datos cargados: {len(df)} registros × {len(df.columns)} columnas")
 
         # Verificar estado actual de la columna
@@ -110,8 +87,6 @@ def regenerar_consecutivo(
             print(f"❌ Error al guardar: {e}")
             return
 
-    except FileNotFoundError:
-        print(f"❌ Error: El archivo '{archivo_entrada}' no se encontró.")
     except Exception as e:
         print(f"❌ Error: {e}")
 
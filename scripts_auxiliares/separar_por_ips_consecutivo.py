@@ -1,18 +1,52 @@
 import pandas as pd
+import numpy as np
 import os
+import re
 import sys
 import csv
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro, nombre_origen  # noqa: E402
+from utils_app import EmpaquetadorZip, NIVEL_COMPRESION_ZIP, SOLO_ALMACENAR_ZIP  # noqa: E402
 
 ARCHIVO_EXCEL = "./nov_limpio.xlsx"
 NUM_FILAS_A_SALTEAR = 1
 INDICE_IPS = 22  # columna con nombre de IPS
 NOMBRE_CONSECUTIVO_IPS = "CONSECUTIVO_IPS"
 CARPETA_SALIDA = "Reportes_Por_IPS_CSV"
+COLUMNAS_ESPERADAS = 125
+# Hilos que serializan y escriben los CSV por IPS en paralelo
+WORKERS_ESCRITURA_IPS = 4
+
+# Variantes de vacío / "SIN DATO" que se escriben como SINDATO
+VARIANTES_SINDATO = {
+    "nan": "SINDATO",
+    "NaN": "SINDATO",
+    "": "SINDATO",
+    "SIN DATO": "SINDATO",
+    "SIN DATOS": "SINDATO",
+    "Sin Dato": "SINDATO",
+    "Sin Datos": "SINDATO",
+    "sin dato": "SINDATO",
+    "sin datos": "SINDATO",
+    "SINDATOS": "SINDATO",
+    "Sin datos": "SINDATO",
+}
+
+# Caracteres que pueden romper el CSV: saltos de línea y tabulaciones → espacio;
+# delimitador (;), comillas y backslash (escapechar) → se eliminan
+TABLA_CSV = str.maketrans({
+    "\n": " ", "\r": " ", "\t": " ",
+    ";": None, '"': None, "'": None, "\\": None,
+})
+_ESPACIOS = re.compile(r"\s+")
 
 
 def obtener_carpeta_mes(archivo, carpeta_base=CARPETA_SALIDA):
-    base = os.path.basename(archivo)
+    base = os.path.basename(nombre_origen(archivo))
     nombre, _ext = os.path.splitext(base)
     prefijo = nombre.split("_")[0].strip().lower()
     mapa = {"nov": "noviembre", "dic": "diciembre", "ene": "enero"}
@@ -37,22 +71,83 @@ def parsear_args():
     return parser.parse_args()
 
 
-def detectar_engine(archivo):
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb
-
-            return "pyxlsb"
-        except ImportError:
-            print("Instalando pyxlsb...")
-            import subprocess
-
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "pyxlsb"])
-            return "pyxlsb"
-    elif ext == ".xlsx":
-        return "openpyxl"
-    return None
+def _sanear_valor(texto):
+    """Texto final de una celda en el CSV por IPS"""
+    texto = texto.strip()
+    texto = VARIANTES_SINDATO.get(texto, texto)
+    texto = texto.translate(TABLA_CSV)
+    texto = _ESPACIOS.sub(" ", texto).strip()
+    return texto or "SINDATO"
+
+
+def _sanear_columna(col):
+    """
+    Sanea una columna completa: cada valor distinto se limpia una sola vez y
+    el resultado se expande con los códigos de factorize.
+    """
+    codigos, unicos = pd.factorize(col.astype(str))
+    saneados = np.array([_sanear_valor(texto) for texto in unicos], dtype=object)
+    return saneados[codigos]
+
+
+def _problemas_columnas(texto):
+    """Filas (1-based, contando el encabezado) del CSV sin COLUMNAS_ESPERADAS columnas"""
+    problemas = []
+    for numero, linea in enumerate(texto.split("\n")[:-1], start=1):
+        columnas = linea.count(";") + 1
+        if columnas != COLUMNAS_ESPERADAS:
+            problemas.append((numero, columnas))
+    return problemas
+
+
+def _serializar_grupo(grupo, salida_ips=None):
+    """
+    Genera el CSV de un grupo y valida sus columnas sobre el texto generado.
+
+    Con salida_ips el CSV se escribe en ese archivo; sin ella se retornan los
+    bytes (para escribirlos en el ZIP).
+
+    Returns:
+        tuple: (bytes o None, lista de (fila, columnas) con problemas)
+    """
+    # Delimitado por ';', sin comillas, terminadores de línea consistentes
+    texto = grupo.to_csv(
+        None,
+        index=False,
+        header=True,
+        sep=";",
+        quoting=csv.QUOTE_NONE,
+        escapechar=None,  # Sin escapechar para evitar problemas
+        lineterminator="\n",
+    )
+    problemas = _problemas_columnas(texto)
+    # UTF-8 con BOM para mejor compatibilidad (igual que encoding="utf-8-sig")
+    datos = ("\ufeff" + texto).encode("utf-8")
+    if salida_ips is None:
+        return datos, problemas
+    with open(salida_ips, "wb") as f:
+        f.write(datos)
+    return None, problemas
+
+
+def _terminar_escritura(pendiente, archivo_zip):
+    nombre_seguro, destino, num_registros, num_columnas, futuro = pendiente
+    try:
+        datos, problemas = futuro.result()
+        if archivo_zip is not None:
+            archivo_zip.agregar_bytes(destino, datos)
+    except Exception as e:
+        print(f"  ❌ ERROR al guardar {nombre_seguro}: {str(e)}")
+        raise
+
+    if problemas:
+        print(f"  ⚠️ ERROR CRÍTICO en {nombre_seguro}:")
+        for fila, cols in problemas:
+            print(f"     Fila {fila}: {cols} columnas detectadas (esperadas: {COLUMNAS_ESPERADAS})")
+    else:
+        print(
+            f"  ✔ {destino} ({num_registros} registros, {num_columnas} columnas) - VALIDADO"
+        )
 
 
 def procesar_archivo(
@@ -60,17 +155,31 @@ def procesar_archivo(
     carpeta_salida_base=CARPETA_SALIDA,
     num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
     indice_ips=INDICE_IPS,
+    zip_salida=None,
+    workers=WORKERS_ESCRITURA_IPS,
+    nivel_compresion=NIVEL_COMPRESION_ZIP,
+    solo_almacenar=SOLO_ALMACENAR_ZIP,
 ):
-    print("Leyendo archivo:", archivo_excel)
-    engine = detectar_engine(archivo_excel)
-    df_headers = pd.read_excel(
-        archivo_excel, header=None, skiprows=0, nrows=1, engine=engine
-    )
-    encabezados = df_headers.iloc[0].tolist()
+    """
+    Genera un CSV por IPS en carpeta_salida_base/<mes>/.
+
+    Args:
+        archivo_excel: Ruta del archivo limpio o su contenido en memoria
+            (bytes/memoryview/UploadedFile; el mes se toma de su nombre)
+        zip_salida: Si se indica, los CSV se escriben directamente en este ZIP
+            (con las mismas rutas relativas a carpeta_salida_base) y no en disco
+        workers: Hilos que serializan y escriben los CSV en paralelo
+        nivel_compresion, solo_almacenar: Compresión del ZIP (ver utils_app.EmpaquetadorZip)
+
+    Returns:
+        str: carpeta de salida (o la ruta del ZIP con zip_salida); None si falla
+    """
+    print("Leyendo archivo:", nombre_origen(archivo_excel))
+    encabezados, df = leer_libro(archivo_excel, num_filas_a_saltar)
+    if df is None:
+        print(f"No se pudo leer el archivo: {nombre_origen(archivo_excel)}")
+        return
 
-    df = pd.read_excel(
-        archivo_excel, header=None, skiprows=num_filas_a_saltar, engine=engine
-    )
     if indice_ips >= len(df.columns):
         print(f"El índice {indice_ips} no existe en el archivo.")
         return
@@ -87,134 +196,94 @@ def procesar_archivo(
 
     # Ordenar por IPS y consecutivo para claridad
     df_ordenado = df.sort_values(by=[nombre_col_ips, NOMBRE_CONSECUTIVO_IPS])
+    claves_ips = df_ordenado[nombre_col_ips]
+
+    # Sanear todo el archivo una sola vez, antes de separar por IPS (el saneado
+    # de cada celda depende solo de su valor). La columna temporal
+    # CONSECUTIVO_IPS no se exporta.
+    # Las columnas datetime se sanean por grupo: astype(str) decide el formato
+    # (con o sin hora) mirando todos los valores de la columna.
+    df_ordenado = df_ordenado.drop(columns=[NOMBRE_CONSECUTIVO_IPS])
+    columnas_fecha = [
+        j for j in range(len(df_ordenado.columns))
+        if pd.api.types.is_datetime64_any_dtype(df_ordenado.dtypes.iloc[j])
+    ]
+    df_texto = pd.DataFrame(
+        {
+            j: (df_ordenado.iloc[:, j] if j in columnas_fecha
+                else _sanear_columna(df_ordenado.iloc[:, j]))
+            for j in range(len(df_ordenado.columns))
+        },
+        index=df_ordenado.index,
+    )
+    df_texto.columns = df_ordenado.columns
 
     # Generar CSV separados por IPS
     carpeta_salida = obtener_carpeta_mes(archivo_excel, carpeta_base=carpeta_salida_base)
-    os.makedirs(carpeta_salida, exist_ok=True)
-    print("\nGenerando CSV por IPS en:", os.path.abspath(carpeta_salida))
-    for ips, grupo in df_ordenado.groupby(nombre_col_ips):
-        # Reemplazar caracteres inválidos de Windows
-        nombre_seguro = (str(ips).strip()
-                        .replace("/", "-")
-                        .replace("\\", "-")
-                        .replace("<", "-")
-                        .replace(">", "-")
-                        .replace(":", "-")
-                        .replace('"', "-")
-                        .replace("|", "-")
-                        .replace("?", "-")
-                        .replace("*", "-"))
-        salida_ips = os.path.join(carpeta_salida, f"{nombre_seguro}.csv")
-
-        # Reiniciar consecutivo desde 1 para cada CSV
-        grupo = grupo.copy()
-
-        # Si existe una columna CONSECUTIVO en las 125 originales, actualizarla.
-        # NO agregar columnas nuevas para mantener exactamente 125 columnas.
-        if "CONSECUTIVO" in grupo.columns:
-            grupo["CONSECUTIVO"] = range(1, len(grupo) + 1)
-
-        # Eliminar la columna temporal CONSECUTIVO_IPS
-        if NOMBRE_CONSECUTIVO_IPS in grupo.columns:
-            grupo = grupo.drop(columns=[NOMBRE_CONSECUTIVO_IPS])
-
-        # Normalizar valores vacíos y variantes de "SIN DATO" a "SINDATO"
-        for col in grupo.columns:
-            # Reemplazar variantes de "SIN DATO" (case-insensitive)
-            grupo[col] = grupo[col].astype(str).str.strip()
-            grupo[col] = grupo[col].replace(
-                {
-                    "nan": "SINDATO",
-                    "NaN": "SINDATO",
-                    "": "SINDATO",
-                    "SIN DATO": "SINDATO",
-                    "SIN DATOS": "SINDATO",
-                    "Sin Dato": "SINDATO",
-                    "Sin Datos": "SINDATO",
-                    "sin dato": "SINDATO",
-                    "sin datos": "SINDATO",
-                    "SINDATOS": "SINDATO",
-                    "Sin datos": "SINDATO",
-                }
-            )
-
-        # Llenar cualquier NaN restante con SINDATO
-        grupo = grupo.fillna("SINDATO")
-
-        # LIMPIEZA EXHAUSTIVA: Eliminar todos los caracteres que pueden romper el CSV
-        for col in grupo.columns:
-            # Convertir a string primero
-            grupo[col] = grupo[col].astype(str)
-            
-            # Eliminar saltos de línea, retornos de carro y tabulaciones
-            grupo[col] = grupo[col].str.replace("\n", " ", regex=False)
-            grupo[col] = grupo[col].str.replace("\r", " ", regex=False)
-            grupo[col] = grupo[col].str.replace("\t", " ", regex=False)
-            
-            # Eliminar punto y coma (;) - delimitador del CSV
-            grupo[col] = grupo[col].str.replace(";", "", regex=False)
-            
-            # Eliminar comillas dobles y simples que pueden causar problemas
-            grupo[col] = grupo[col].str.replace('"', "", regex=False)
-            grupo[col] = grupo[col].str.replace("'", "", regex=False)
-            
-            # Eliminar backslashes que pueden causar problemas con escapechar
-            grupo[col] = grupo[col].str.replace("\\", "", regex=False)
-            
-            # Limpiar espacios múltiples que quedan después de los reemplazos
-            grupo[col] = grupo[col].str.replace(r"\s+", " ", regex=True)
-            
-            # Limpiar espacios al inicio y final
-            grupo[col] = grupo[col].str.strip()
-            
-            # Reemplazar strings vacíos resultantes con SINDATO
-            grupo[col] = grupo[col].replace("", "SINDATO")
-
-        # Verificar que tengamos exactamente 125 columnas
-        if len(grupo.columns) != 125:
-            print(
-                f"  ⚠ ADVERTENCIA: {nombre_seguro} tiene {len(grupo.columns)} columnas (esperadas: 125)"
-            )
-
-        # Guardar CSV con encabezados, delimitado por ';', sin comillas, en UTF-8
-        try:
-            grupo.to_csv(
-                salida_ips,
-                index=False,
-                header=True,
-                sep=";",
-                encoding="utf-8-sig",  # UTF-8 con BOM para mejor compatibilidad
-                quoting=csv.QUOTE_NONE,
-                escapechar=None,  # Sin escapechar para evitar problemas
-                lineterminator="\n",  # Asegurar terminadores de línea consistentes
-            )
-            
-            # VALIDACIÓN POST-GUARDADO: Verificar que el CSV se guardó correctamente
-            with open(salida_ips, "r", encoding="utf-8-sig") as f:
-                lineas = f.readlines()
-                total_lineas = len(lineas)
-                
-                # Verificar algunas filas aleatorias para asegurar que tienen 125 columnas
-                problemas_encontrados = []
-                for idx in [1, min(10, total_lineas-1), min(100, total_lineas-1), total_lineas-1]:
-                    if idx < total_lineas:
-                        cols = lineas[idx].count(";") + 1
-                        if cols != 125:
-                            problemas_encontrados.append((idx+1, cols))
-                
-                if problemas_encontrados:
-                    print(f"  ⚠️ ERROR CRÍTICO en {nombre_seguro}:")
-                    for fila, cols in problemas_encontrados:
-                        print(f"     Fila {fila}: {cols} columnas detectadas (esperadas: 125)")
-                else:
+    if zip_salida:
+        archivo_zip = EmpaquetadorZip(zip_salida, nivel_compresion, solo_almacenar)
+        print("\nGenerando CSV por IPS en:", os.path.abspath(zip_salida))
+    else:
+        archivo_zip = None
+        os.makedirs(carpeta_salida, exist_ok=True)
+        print("\nGenerando CSV por IPS en:", os.path.abspath(carpeta_salida))
+
+    # Los grupos se serializan en paralelo y se terminan en orden; se limita la
+    # cantidad de grupos pendientes para no tener todos los CSV en memoria
+    workers = max(1, workers or 1)
+    pendientes = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for ips, grupo in df_texto.groupby(claves_ips):
+                # Reemplazar caracteres inválidos de Windows
+                nombre_seguro = (str(ips).strip()
+                                .replace("/", "-")
+                                .replace("\\", "-")
+                                .replace("<", "-")
+                                .replace(">", "-")
+                                .replace(":", "-")
+                                .replace('"', "-")
+                                .replace("|", "-")
+                                .replace("?", "-")
+                                .replace("*", "-"))
+                salida_ips = os.path.join(carpeta_salida, f"{nombre_seguro}.csv")
+
+                grupo = grupo.copy()
+                for j in columnas_fecha:
+                    grupo.isetitem(j, _sanear_columna(grupo.iloc[:, j]))
+
+                # Reiniciar consecutivo desde 1 para cada CSV.
+                # Si existe una columna CONSECUTIVO en las 125 originales, actualizarla.
+                # NO agregar columnas nuevas para mantener exactamente 125 columnas.
+                if "CONSECUTIVO" in grupo.columns:
+                    grupo["CONSECUTIVO"] = range(1, len(grupo) + 1)
+
+                # Verificar que tengamos exactamente 125 columnas
+                if len(grupo.columns) != COLUMNAS_ESPERADAS:
                     print(
-                        f"  ✔ {salida_ips} ({len(grupo)} registros, {len(grupo.columns)} columnas) - VALIDADO"
+                        f"  ⚠ ADVERTENCIA: {nombre_seguro} tiene {len(grupo.columns)} columnas "
+                        f"(esperadas: {COLUMNAS_ESPERADAS})"
                     )
-        except Exception as e:
-            print(f"  ❌ ERROR al guardar {nombre_seguro}: {str(e)}")
-            raise
+
+                if archivo_zip is not None:
+                    destino = os.path.relpath(salida_ips, carpeta_salida_base).replace(os.sep, "/")
+                    futuro = pool.submit(_serializar_grupo, grupo)
+                else:
+                    destino = salida_ips
+                    futuro = pool.submit(_serializar_grupo, grupo, salida_ips)
+                pendientes.append(
+                    (nombre_seguro, destino, len(grupo), len(grupo.columns), futuro)
+                )
+                if len(pendientes) >= 2 * workers:
+                    _terminar_escritura(pendientes.popleft(), archivo_zip)
+
+            while pendientes:
+                _terminar_escritura(pendientes.popleft(), archivo_zip)
+    finally:
+        if archivo_zip is not None:
+            archivo_zip.cerrar()
     print("\n✓ CSV por IPS generados.")
-    return carpeta_salida
+    return zip_salida or carpeta_salida
 
 
 def separar_por_ips(
@@ -222,12 +291,20 @@ def separar_por_ips(
     carpeta_salida_base=CARPETA_SALIDA,
     num_filas_a_saltar=NUM_FILAS_A_SALTEAR,
     indice_ips=INDICE_IPS,
+    zip_salida=None,
+    workers=WORKERS_ESCRITURA_IPS,
+    nivel_compresion=NIVEL_COMPRESION_ZIP,
+    solo_almacenar=SOLO_ALMACENAR_ZIP,
 ):
     return procesar_archivo(
         archivo_excel,
         carpeta_salida_base=carpeta_salida_base,
         num_filas_a_saltar=num_filas_a_saltar,
         indice_ips=indice_ips,
+        zip_salida=zip_salida,
+        workers=workers,
+        nivel_compresion=nivel_compresion,
+        solo_almacenar=solo_almacenar,
     )
 
 
@@ -1,7 +1,11 @@
 import pandas as pd
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lectura_lib import leer_libro  # noqa: E402
+
 ARCHIVO_ORIGINAL = "limpieza.xlsx"
 NUM_FILAS_A_SALTEAR = 2
 
@@ -43,14 +47,9 @@ INDICES_A_VERIFICAR = [
 
 print(f"Leyendo archivo: {ARCHIVO_ORIGINAL}")
 try:
-    # Detectar el engine según la extensión
-    ext = os.path.splitext(ARCHIVO_ORIGINAL)[1].lower()
-    if ext == ".xlsb":
-        df = pd.read_excel(
-            ARCHIVO_ORIGINAL, header=None, skiprows=NUM_FILAS_A_SALTEAR, engine="pyxlsb"
-        )
-    else:
-        df = pd.read_excel(ARCHIVO_ORIGINAL, header=None, skiprows=NUM_FILAS_A_SALTEAR)
+    _, df = leer_libro(ARCHIVO_ORIGINAL, NUM_FILAS_A_SALTEAR)
+    if df is None:
+        raise ValueError(f"No se pudo leer el archivo: {ARCHIVO_ORIGINAL}")
 
     print(f"Total de columnas en el archivo: {len(df.columns)}")
     print(f"Total de filas: {len(df)}\n")
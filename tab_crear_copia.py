@@ -5,8 +5,13 @@ Tab de creación de copia con encabezados.
 import os
 import streamlit as st
 from crear_con_encabezados_desde_rcv import generar_con_encabezados
-from utils_app import guardar_temporal, limpiar_directorio, formatear_mensaje_exito, formatear_mensaje_error
-from ui_components import mostrar_info_paso, boton_centrado, crear_columnas_centradas
+from trabajos_lib import enviar_trabajo, ERROR
+from utils_app import guardar_temporal_reutilizable, limpiar_directorio, formatear_mensaje_exito
+from ui_components import (mostrar_info_paso, boton_centrado, crear_columnas_centradas,
+                          recordar_trabajo, olvidar_trabajo, seguir_trabajo, mostrar_error_trabajo,
+                          boton_descarga)
+
+CLAVE_TRABAJO = "trabajo_copia"
 
 
 def mostrar_tab_crear_copia():
@@ -47,30 +52,57 @@ def mostrar_tab_crear_copia():
     if not archivo_origen:
         st.warning("⏳ Por favor, sube un archivo Excel para continuar.")
     else:
-        temp_dir, ruta_temp = guardar_temporal(archivo_origen, "copia_")
+        temp_dir, origen = guardar_temporal_reutilizable(
+            archivo_origen, "copia_", st.session_state, "copia_archivo_temporal"
+        )
         st.success(formatear_mensaje_exito(archivo_origen.name))
 
         if boton_centrado("Generar Copia", "🚀"):
-            with st.spinner("⏳ Generando copia con encabezados..."):
-                salida = generar_con_encabezados(
-                    ruta_temp,
-                    data_start_row=int(fila_inicio),
-                )
-            
-            if not salida or not os.path.exists(salida):
-                st.error(formatear_mensaje_error("generacion"))
-            else:
-                st.success("✅ ¡Copia generada exitosamente!")
-                st.session_state["temp_dir_copia"] = temp_dir
-                
-                st.markdown("---")
-                with open(salida, "rb") as f:
-                    col1, col2, col3 = crear_columnas_centradas()
-                    with col2:
-                        st.download_button(
-                            "⬇️ Descargar Copia Generada",
-                            f,
-                            file_name=os.path.basename(salida),
-                            on_click=lambda: limpiar_directorio(st.session_state.get("temp_dir_copia")),
-                            use_container_width=True
-                        )
+            trabajo_id = enviar_trabajo(
+                "crear_copia",
+                generar_con_encabezados,
+                args=(origen,),
+                kwargs={
+                    "data_start_row": int(fila_inicio),
+                    # La copia va al directorio de trabajo, no junto a la subida compartida
+                    "archivo_salida": os.path.join(
+                        temp_dir,
+                        f"{os.path.splitext(archivo_origen.name)[0]}_copia.xlsx",
+                    ),
+                },
+            )
+            recordar_trabajo(CLAVE_TRABAJO, trabajo_id)
+
+    # Resultado del trabajo en segundo plano (sobrevive a un refresco del navegador)
+    _mostrar_resultado_copia()
+
+
+def _descarga_completada(temp_dir):
+    limpiar_directorio(temp_dir)
+    olvidar_trabajo(CLAVE_TRABAJO)
+
+
+def _mostrar_resultado_copia():
+    """Muestra el progreso de la copia y, al terminar, el botón de descarga"""
+    trabajo = seguir_trabajo(CLAVE_TRABAJO, "Generando copia con encabezados...")
+    if trabajo is None:
+        return
+
+    salida = trabajo["resultado"]
+    if trabajo["estado"] == ERROR or not salida or not os.path.exists(salida):
+        mostrar_error_trabajo(trabajo, "generacion")
+        return
+
+    st.success("✅ ¡Copia generada exitosamente!")
+
+    st.markdown("---")
+    col1, col2, col3 = crear_columnas_centradas()
+    with col2:
+        boton_descarga(
+            salida,
+            "⬇️ Descargar Copia Generada",
+            os.path.basename(salida),
+            on_click=_descarga_completada,
+            args=(os.path.dirname(salida),),
+            use_container_width=True
+        )
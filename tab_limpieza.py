@@ -4,12 +4,19 @@ Tab de limpieza y exportación por IPS.
 
 import os
 import streamlit as st
-from procesar_general import ejecutar_procesamiento_general
+from cache_resultados_lib import calcular_clave, restaurar_resultado, guardar_resultado
+from procesar_general import ejecutar_procesamiento_general, CONFIG_JSON, REGLAS_JSON
 from scripts_auxiliares.separar_por_ips_consecutivo import separar_por_ips
-from utils_app import (guardar_temporal, limpiar_directorio, crear_zip, 
+from trabajos_lib import enviar_trabajo, ERROR
+from utils_app import (guardar_temporal_reutilizable, limpiar_directorio, 
                        formatear_mensaje_exito, formatear_mensaje_error)
 from ui_components import (mostrar_info_paso, boton_centrado, crear_columnas_centradas, 
-                          mostrar_separador_paso, crear_seccion_archivos)
+                          mostrar_separador_paso, crear_seccion_archivos,
+                          recordar_trabajo, trabajo_recordado, olvidar_trabajo,
+                          seguir_trabajo, mostrar_error_trabajo, boton_descarga)
+
+CLAVE_TRABAJO_LIMPIEZA = "trabajo_limpieza"
+CLAVE_TRABAJO_IPS = "trabajo_ips"
 
 
 def mostrar_tab_limpieza():
@@ -35,13 +42,20 @@ def mostrar_tab_limpieza():
     
     if not archivo_con_encabezados:
         st.warning("⏳ Por favor, sube el archivo copia para continuar.")
-        return
-    
-    temp_dir, ruta_temp = guardar_temporal(archivo_con_encabezados, "limpieza_")
-    st.success(formatear_mensaje_exito(archivo_con_encabezados.name))
+        # Tras un refresco del navegador el archivo ya no está cargado, pero el
+        # trabajo en curso (o su resultado) se sigue mostrando
+        if not trabajo_recordado(CLAVE_TRABAJO_LIMPIEZA):
+            return
+        temp_dir = origen = nombre_archivo = None
+    else:
+        temp_dir, origen = guardar_temporal_reutilizable(
+            archivo_con_encabezados, "limpieza_", st.session_state, "limpieza_archivo_temporal"
+        )
+        nombre_archivo = archivo_con_encabezados.name
+        st.success(formatear_mensaje_exito(nombre_archivo))
     
     # Paso A: Limpieza
-    _mostrar_seccion_limpieza(temp_dir, ruta_temp, archivo_con_encabezados.name)
+    _mostrar_seccion_limpieza(temp_dir, origen, nombre_archivo)
     
     mostrar_separador_paso()
     
@@ -49,11 +63,65 @@ def mostrar_tab_limpieza():
     _mostrar_seccion_exportacion_ips()
 
 
-def _mostrar_seccion_limpieza(temp_dir, ruta_temp, nombre_archivo):
+def _limpiar_con_cache(origen, archivos_salida, nombre_limpio):
+    """
+    Trabajo en segundo plano de la limpieza.
+
+    Mismo archivo + misma configuración + mismo código → reutiliza los resultados
+    del caché; si no, ejecuta el procesamiento general y lo guarda en el caché.
+
+    Returns:
+        dict: rutas de los archivos generados, nombre_limpio y desde_cache; None si falla
+    """
+    destinos = {
+        "archivo_salida": archivos_salida["excel"],
+        "log": archivos_salida["log"],
+        "reporte_errores_csv": archivos_salida["reporte_csv"],
+        "reporte_errores_excel": archivos_salida["reporte_excel"],
+        "reporte_errores_totales_csv": archivos_salida["totales_csv"],
+        "reporte_errores_totales_excel": archivos_salida["totales_excel"],
+    }
+    clave_cache = calcular_clave(
+        origen, archivos_config=[CONFIG_JSON, REGLAS_JSON], num_filas_a_saltar=1
+    )
+    # El directorio temporal se reutiliza entre ejecuciones: quitar salidas anteriores
+    for ruta in destinos.values():
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    restaurados = restaurar_resultado(clave_cache, destinos)
+    
+    if restaurados and "archivo_salida" in restaurados:
+        return {**destinos, "nombre_limpio": nombre_limpio, "desde_cache": True}
+
+    resultado = ejecutar_procesamiento_general(
+        origen,
+        archivo_salida=archivos_salida["excel"],
+        reporte_errores_csv=archivos_salida["reporte_csv"],
+        reporte_errores_excel=archivos_salida["reporte_excel"],
+        reporte_errores_totales_csv=archivos_salida["totales_csv"],
+        reporte_errores_totales_excel=archivos_salida["totales_excel"],
+        log_salida=archivos_salida["log"],
+        num_filas_a_saltar=1,
+    )
+    if not resultado:
+        return None
+
+    # Un resultado con advertencias (ej. sin normalizaciones) no se reutiliza
+    if not resultado["advertencias"]:
+        guardar_resultado(clave_cache, {nombre: resultado[nombre] for nombre in destinos})
+    return {
+        **{nombre: resultado[nombre] for nombre in destinos},
+        "nombre_limpio": nombre_limpio,
+        "desde_cache": False,
+        "advertencias": resultado["advertencias"],
+    }
+
+
+def _mostrar_seccion_limpieza(temp_dir, origen, nombre_archivo):
     """Muestra la sección de limpieza de datos"""
     st.markdown("#### 🔧 Paso A: Ejecutar Limpieza de Datos")
     
-    if boton_centrado("Ejecutar Limpieza", "🧹"):
+    if boton_centrado("Ejecutar Limpieza", "🧹", disabled=origen is None):
         # Generar nombre del archivo limpio basado en el original
         nombre_base = os.path.splitext(nombre_archivo)[0]  # Quitar extensión
         # Quitar "_copia" si existe
@@ -71,35 +139,46 @@ def _mostrar_seccion_limpieza(temp_dir, ruta_temp, nombre_archivo):
             "totales_excel": os.path.join(temp_dir, "Reporte_Validacion_Errores_Totales.xlsx")
         }
         
-        with st.spinner("⏳ Procesando... Esto puede tomar 1-3 minutos..."):
-            resultado = ejecutar_procesamiento_general(
-                ruta_temp,
-                archivo_salida=archivos_salida["excel"],
-                reporte_errores_csv=archivos_salida["reporte_csv"],
-                reporte_errores_excel=archivos_salida["reporte_excel"],
-                reporte_errores_totales_csv=archivos_salida["totales_csv"],
-                reporte_errores_totales_excel=archivos_salida["totales_excel"],
-                log_salida=archivos_salida["log"],
-                num_filas_a_saltar=1,
+        trabajo_id = enviar_trabajo(
+            "limpieza",
+            _limpiar_con_cache,
+            args=(origen, archivos_salida, nombre_limpio),
+            datos={"log": archivos_salida["log"]},
+        )
+        recordar_trabajo(CLAVE_TRABAJO_LIMPIEZA, trabajo_id)
+        # Una limpieza nueva invalida la exportación anterior
+        olvidar_trabajo(CLAVE_TRABAJO_IPS)
+        st.session_state["limpieza_completada"] = False
+    
+    trabajo = seguir_trabajo(
+        CLAVE_TRABAJO_LIMPIEZA, "Procesando... Esto puede tomar 1-3 minutos..."
+    )
+    if trabajo is None:
+        return
+    
+    resultado = trabajo["resultado"]
+    if trabajo["estado"] == ERROR or not resultado:
+        mostrar_error_trabajo(trabajo, "limpieza")
+        ruta_log = trabajo["datos"].get("log")
+        if ruta_log and os.path.exists(ruta_log):
+            boton_descarga(
+                ruta_log,
+                "📄 Descargar Log de Errores",
+                "Procesamiento_General.log"
             )
-        
-        if not resultado:
-            st.error(formatear_mensaje_error("limpieza"))
-            if os.path.exists(archivos_salida["log"]):
-                with open(archivos_salida["log"], "rb") as f:
-                    st.download_button(
-                        "📄 Descargar Log de Errores",
-                        f,
-                        file_name="Procesamiento_General.log",
-                    )
-        else:
-            st.success("✅ ¡Limpieza completada exitosamente!")
-            st.session_state["limpio_archivo"] = resultado["archivo_salida"]
-            st.session_state["limpio_temp_dir"] = temp_dir
-            st.session_state["limpieza_completada"] = True
-            st.session_state["nombre_archivo_limpio"] = nombre_limpio
-            
-            _mostrar_archivos_limpieza(resultado, nombre_limpio)
+        return
+    
+    if resultado.get("desde_cache"):
+        st.info("⚡ Este archivo ya se había procesado con la misma configuración: se reutilizan los resultados.")
+    st.success("✅ ¡Limpieza completada exitosamente!")
+    for advertencia in resultado.get("advertencias", []):
+        st.warning(f"⚠️ {advertencia}")
+    st.session_state["limpio_archivo"] = resultado["archivo_salida"]
+    st.session_state["limpio_temp_dir"] = os.path.dirname(resultado["archivo_salida"])
+    st.session_state["limpieza_completada"] = True
+    st.session_state["nombre_archivo_limpio"] = resultado["nombre_limpio"]
+    
+    _mostrar_archivos_limpieza(resultado, resultado["nombre_limpio"])
 
 
 def _mostrar_archivos_limpieza(resultado, nombre_limpio):
@@ -111,54 +190,72 @@ def _mostrar_archivos_limpieza(resultado, nombre_limpio):
     with col1:
         st.markdown("**📊 Archivo Principal:**")
         if os.path.exists(resultado["archivo_salida"]):
-            with open(resultado["archivo_salida"], "rb") as f:
-                st.download_button(
-                    "⬇️ Excel Limpio",
-                    f,
-                    file_name=nombre_limpio,
-                    use_container_width=True
-                )
+            boton_descarga(
+                resultado["archivo_salida"],
+                "⬇️ Excel Limpio",
+                nombre_limpio,
+                use_container_width=True
+            )
 
     with col2:
         st.markdown("**📈 Reportes de Validación:**")
         if os.path.exists(resultado["reporte_errores_csv"]):
-            with open(resultado["reporte_errores_csv"], "rb") as f:
-                st.download_button(
-                    "⬇️ Reporte CSV",
-                    f,
-                    file_name="Reporte_Validacion_Errores.csv",
-                    use_container_width=True
-                )
+            boton_descarga(
+                resultado["reporte_errores_csv"],
+                "⬇️ Reporte CSV",
+                "Reporte_Validacion_Errores.csv",
+                use_container_width=True
+            )
 
     col1, col2 = st.columns(2)
     
     with col1:
         if os.path.exists(resultado["reporte_errores_excel"]):
-            with open(resultado["reporte_errores_excel"], "rb") as f:
-                st.download_button(
-                    "⬇️ Reporte Excel",
-                    f,
-                    file_name="Reporte_Validacion_Errores.xlsx",
-                    use_container_width=True
-                )
+            boton_descarga(
+                resultado["reporte_errores_excel"],
+                "⬇️ Reporte Excel",
+                "Reporte_Validacion_Errores.xlsx",
+                use_container_width=True
+            )
 
     with col2:
         if os.path.exists(resultado["reporte_errores_totales_csv"]):
-            with open(resultado["reporte_errores_totales_csv"], "rb") as f:
-                st.download_button(
-                    "⬇️ Reporte Total CSV",
-                    f,
-                    file_name="Reporte_Validacion_Errores_Totales.csv",
-                    use_container_width=True
-                )
+            boton_descarga(
+                resultado["reporte_errores_totales_csv"],
+                "⬇️ Reporte Total CSV",
+                "Reporte_Validacion_Errores_Totales.csv",
+                use_container_width=True
+            )
     
     if os.path.exists(resultado["reporte_errores_totales_excel"]):
-        with open(resultado["reporte_errores_totales_excel"], "rb") as f:
-            st.download_button(
-                "⬇️ Reporte Total Excel",
-                f,
-                file_name="Reporte_Validacion_Errores_Totales.xlsx",
-            )
+        boton_descarga(
+            resultado["reporte_errores_totales_excel"],
+            "⬇️ Reporte Total Excel",
+            "Reporte_Validacion_Errores_Totales.xlsx"
+        )
+
+
+def _exportar_ips(archivo_limpio, temp_dir_limpio):
+    """
+    Trabajo en segundo plano de la exportación por IPS.
+
+    Returns:
+        dict: {"zip": ruta del ZIP}; None si falla
+    """
+    carpeta_base = os.path.join(temp_dir_limpio, "Reportes_Por_IPS_CSV")
+    zip_path = os.path.join(temp_dir_limpio, "Reportes_Por_IPS_CSV.zip")
+    # Los CSV se escriben directamente en el ZIP (sin carpeta intermedia)
+    zip_salida = separar_por_ips(
+        archivo_limpio,
+        carpeta_salida_base=carpeta_base,
+        num_filas_a_saltar=1,
+        indice_ips=22,
+        zip_salida=zip_path,
+    )
+    if not zip_salida or not os.path.exists(zip_salida):
+        return None
+
+    return {"zip": zip_salida}
 
 
 def _mostrar_seccion_exportacion_ips():
@@ -184,42 +281,46 @@ def _mostrar_seccion_exportacion_ips():
         if not puede_exportar:
             st.error(formatear_mensaje_error("exportacion"))
         else:
-            carpeta_base = os.path.join(temp_dir_limpio, "Reportes_Por_IPS_CSV")
-            
-            with st.spinner("⏳ Generando archivos CSV por IPS... Esto puede tomar 1-5 minutos..."):
-                carpeta_salida = separar_por_ips(
-                    archivo_limpio,
-                    carpeta_salida_base=carpeta_base,
-                    num_filas_a_saltar=1,
-                    indice_ips=22,
-                )
-            
-            if not carpeta_salida or not os.path.exists(carpeta_salida):
-                st.error(formatear_mensaje_error("exportacion"))
-            else:
-                zip_path = os.path.join(temp_dir_limpio, "Reportes_Por_IPS_CSV.zip")
-                zip_final = crear_zip(carpeta_base, zip_path)
-                st.success("✅ ¡Archivos CSV por IPS generados exitosamente!")
-                st.session_state["ips_descargado"] = False
-                
-                st.markdown("---")
-                col1, col2, col3 = crear_columnas_centradas()
-                with col2:
-                    with open(zip_final, "rb") as f:
-                        st.download_button(
-                            "📦 Descargar ZIP Completo de IPS",
-                            f,
-                            file_name="Reportes_Por_IPS_CSV.zip",
-                            on_click=lambda: st.session_state.update({"ips_descargado": True}),
-                            use_container_width=True
-                        )
-                
-                if st.session_state.get("ips_descargado", False):
-                    st.info("✅ Descarga completada. Puedes cargar una nueva copia arriba para continuar.")
-                    if boton_centrado("Limpiar y Procesar Nuevo Archivo", "🔄"):
-                        limpiar_directorio(st.session_state.get("limpio_temp_dir"))
-                        st.session_state["limpio_archivo"] = None
-                        st.session_state["limpio_temp_dir"] = None
-                        st.session_state["limpieza_completada"] = False
-                        st.session_state["ips_descargado"] = False
-                        st.rerun()
+            trabajo_id = enviar_trabajo(
+                "exportacion_ips",
+                _exportar_ips,
+                args=(archivo_limpio, temp_dir_limpio),
+            )
+            recordar_trabajo(CLAVE_TRABAJO_IPS, trabajo_id)
+            st.session_state["ips_descargado"] = False
+    
+    trabajo = seguir_trabajo(
+        CLAVE_TRABAJO_IPS, "Generando archivos CSV por IPS... Esto puede tomar 1-5 minutos..."
+    )
+    if trabajo is None:
+        return
+    
+    resultado = trabajo["resultado"]
+    if trabajo["estado"] == ERROR or not resultado or not os.path.exists(resultado["zip"]):
+        mostrar_error_trabajo(trabajo, "exportacion")
+        return
+    
+    st.success("✅ ¡Archivos CSV por IPS generados exitosamente!")
+    
+    st.markdown("---")
+    col1, col2, col3 = crear_columnas_centradas()
+    with col2:
+        boton_descarga(
+            resultado["zip"],
+            "📦 Descargar ZIP Completo de IPS",
+            "Reportes_Por_IPS_CSV.zip",
+            on_click=lambda: st.session_state.update({"ips_descargado": True}),
+            use_container_width=True
+        )
+    
+    if st.session_state.get("ips_descargado", False):
+        st.info("✅ Descarga completada. Puedes cargar una nueva copia arriba para continuar.")
+        if boton_centrado("Limpiar y Procesar Nuevo Archivo", "🔄"):
+            limpiar_directorio(st.session_state.get("limpio_temp_dir"))
+            st.session_state["limpio_archivo"] = None
+            st.session_state["limpio_temp_dir"] = None
+            st.session_state["limpieza_completada"] = False
+            st.session_state["ips_descargado"] = False
+            olvidar_trabajo(CLAVE_TRABAJO_LIMPIEZA)
+            olvidar_trabajo(CLAVE_TRABAJO_IPS)
+            st.rerun()
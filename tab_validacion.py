@@ -5,8 +5,12 @@ Tab de validación de columnas.
 import os
 import streamlit as st
 from validar_valores_columna import ejecutar_validacion
-from utils_app import guardar_temporal, limpiar_directorio, formatear_mensaje_exito, formatear_mensaje_error
-from ui_components import mostrar_info_paso, boton_centrado
+from trabajos_lib import enviar_trabajo, ERROR
+from utils_app import guardar_temporal_reutilizable, limpiar_directorio, formatear_mensaje_exito
+from ui_components import (mostrar_info_paso, boton_centrado, recordar_trabajo, olvidar_trabajo,
+                          seguir_trabajo, mostrar_error_trabajo, boton_descarga)
+
+CLAVE_TRABAJO = "trabajo_validacion"
 
 
 def mostrar_tab_validacion():
@@ -47,49 +51,71 @@ def mostrar_tab_validacion():
     if not archivo_subido:
         st.warning("⏳ Por favor, sube un archivo Excel para continuar.")
     else:
-        temp_dir, ruta_temp = guardar_temporal(archivo_subido, "validacion_")
+        temp_dir, origen = guardar_temporal_reutilizable(
+            archivo_subido, "validacion_", st.session_state, "validacion_archivo_temporal"
+        )
         st.success(formatear_mensaje_exito(archivo_subido.name))
 
         if boton_centrado("Ejecutar Validación", "✅"):
             log_path = os.path.join(temp_dir, "Validacion_Columnas.log")
             csv_path = os.path.join(temp_dir, "Validacion_Errores.csv")
 
-            with st.spinner("⏳ Ejecutando validación..."):
-                resultado = ejecutar_validacion(
-                    ruta_temp,
-                    log_salida=log_path,
-                    num_filas_a_saltar=int(filas_a_saltar),
-                    csv_salida=csv_path,
-                )
-
-            if not resultado:
-                st.error(formatear_mensaje_error("validacion"))
-            else:
-                st.success("✅ ¡Validación completada exitosamente!")
-                st.session_state["temp_dir_validacion"] = temp_dir
-
-                st.markdown("#### 📦 Archivos de Validación")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown("**📄 Log de Validación:**")
-                    with open(resultado["log"], "rb") as f:
-                        st.download_button(
-                            "⬇️ Descargar Log",
-                            f,
-                            file_name="Validacion_Columnas.log",
-                            use_container_width=True
-                        )
-
-                with col2:
-                    st.markdown("**📊 Reporte CSV:**")
-                    if resultado["csv"] and os.path.exists(resultado["csv"]):
-                        with open(resultado["csv"], "rb") as f:
-                            st.download_button(
-                                "⬇️ Descargar CSV",
-                                f,
-                                file_name="Validacion_Errores.csv",
-                                on_click=lambda: limpiar_directorio(st.session_state.get("temp_dir_validacion")),
-                                use_container_width=True
-                            )
+            trabajo_id = enviar_trabajo(
+                "validacion",
+                ejecutar_validacion,
+                args=(origen,),
+                kwargs={
+                    "log_salida": log_path,
+                    "num_filas_a_saltar": int(filas_a_saltar),
+                    "csv_salida": csv_path,
+                },
+            )
+            recordar_trabajo(CLAVE_TRABAJO, trabajo_id)
+
+    # Resultado del trabajo en segundo plano (sobrevive a un refresco del navegador)
+    _mostrar_resultado_validacion()
+
+
+def _descarga_completada(temp_dir):
+    limpiar_directorio(temp_dir)
+    olvidar_trabajo(CLAVE_TRABAJO)
+
+
+def _mostrar_resultado_validacion():
+    """Muestra el progreso de la validación y, al terminar, los archivos generados"""
+    trabajo = seguir_trabajo(CLAVE_TRABAJO, "Ejecutando validación...")
+    if trabajo is None:
+        return
+
+    resultado = trabajo["resultado"]
+    if trabajo["estado"] == ERROR or not resultado or not os.path.exists(resultado["log"]):
+        mostrar_error_trabajo(trabajo, "validacion")
+        return
+
+    st.success("✅ ¡Validación completada exitosamente!")
+    temp_dir = os.path.dirname(resultado["log"])
+
+    st.markdown("#### 📦 Archivos de Validación")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**📄 Log de Validación:**")
+        boton_descarga(
+            resultado["log"],
+            "⬇️ Descargar Log",
+            "Validacion_Columnas.log",
+            use_container_width=True
+        )
+
+    with col2:
+        st.markdown("**📊 Reporte CSV:**")
+        if resultado["csv"] and os.path.exists(resultado["csv"]):
+            boton_descarga(
+                resultado["csv"],
+                "⬇️ Descargar CSV",
+                "Validacion_Errores.csv",
+                on_click=_descarga_completada,
+                args=(temp_dir,),
+                use_container_width=True
+            )
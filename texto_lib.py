@@ -0,0 +1,82 @@
+"""
+Biblioteca de normalización de texto (plegado de tildes, mayúsculas/minúsculas y espacios).
+
+Centraliza el núcleo que usaban por separado normalizar_texto (normalizadores_lib)
+y _normalizar_base (procesar_general / validar_valores_columna):
+    NFKD → quitar marcas combinantes → minúsculas/mayúsculas → compactar espacios
+
+- plegar_texto: versión escalar con caché LRU sobre textos distintos.
+- plegar_serie: versión para una Series completa; pliega cada valor distinto una vez.
+- VALORES_VACIOS / VARIANTES_SIN_DATO / VARIANTES: tablas de valores (ya plegados
+  en mayúsculas) que la limpieza y la validación mapean a su forma canónica.
+"""
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+
+class _TablaSinMarcas(dict):
+    """Tabla para str.translate que elimina marcas combinantes (tildes, diéresis...).
+
+    Se llena a medida que aparecen caracteres nuevos, en lugar de recorrer
+    todo el rango Unicode al importar el módulo.
+    """
+
+    def __missing__(self, codigo):
+        valor = None if unicodedata.combining(chr(codigo)) else codigo
+        self[codigo] = valor
+        return valor
+
+
+_TABLA_SIN_MARCAS = _TablaSinMarcas()
+
+# Valores que la validación trata como vacíos o como SINDATO
+VALORES_VACIOS = {"NAN": "", "NONE": "", "NULL": ""}
+VARIANTES_SIN_DATO = {"SIN DATO": "SINDATO", "SIN DATOS": "SINDATO", "SIN_DATO": "SINDATO"}
+
+# Mapear variantes conocidas a un valor canonico
+VARIANTES = {
+    "NINGUNA DE LAS ANTERIORES": "NINGUNAS DE LAS ANTERIORES",
+    "NINGUNAS DE LAS ANTERIORES": "NINGUNAS DE LAS ANTERIORES",
+    "NEGRO(A), MULATO(A), AFROCOLOMBIANO O AFRODECENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
+    "NEGRO(A), MULATO(A), AFROCOLOMBIANO O AFRODESCENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
+    "NEGRO (A), MULATO (A), AFROCOLOMBIANO O AFRODECENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
+    "NEGRO (A), MULATO (A), AFROCOLOMBIANO O AFRODESCENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
+    "COMUNIDADES INDIGENAS": "COMUNIDADES INDIGINAS",
+    "VICTIMA DEL CONFLICTO ARMADO INTERNO": "VICTIMAS DEL CONFLICTO ARMADO",
+    "AFROCOLOMBIANO O AFRODECENDIENTE": "OTRO GRUPO POBLACIONAL",
+    "POBLACION RURAL NO MIGRATORIA": "OTRO GRUPO POBLACIONAL",
+}
+
+
+@lru_cache(maxsize=65536)
+def _plegar(texto, mayusculas):
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto).translate(_TABLA_SIN_MARCAS)
+    texto = texto.upper() if mayusculas else texto.lower()
+    # split() sin argumentos corta por los mismos espacios Unicode que \s
+    return " ".join(texto.split())
+
+
+def plegar_texto(texto, mayusculas=False):
+    """Quita tildes, pasa a minúsculas (o mayúsculas) y compacta espacios. No-texto → \"\""""
+    if not isinstance(texto, str):
+        return ""
+    return _plegar(texto, mayusculas)
+
+
+def plegar_serie(serie, mayusculas=False):
+    """
+    Aplica plegar_texto a toda una Series, una sola vez por valor distinto.
+
+    Returns:
+        Series de textos con el mismo índice; nulos y no-textos → ""
+    """
+    valores = serie.to_numpy(dtype=object)
+    codigos, unicos = pd.factorize(valores)
+    plegados = pd.Series(
+        [plegar_texto(v, mayusculas) for v in unicos] + [""], dtype=object
+    )
+    # Los nulos tienen código -1 → última posición ("")
+    return pd.Series(plegados.to_numpy()[codigos], index=serie.index, dtype=object)
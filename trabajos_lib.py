@@ -0,0 +1,367 @@
+"""
+Ejecución en segundo plano de los procesos pesados del dashboard.
+
+- enviar_trabajo: encola una función en un pool de hilos y devuelve el id del trabajo.
+- obtener_trabajo: estado actual del trabajo, para que la página lo consulte periódicamente.
+
+El estado se guarda en una base SQLite local (no en la sesión de Streamlit), así
+que un trabajo sigue corriendo y se puede consultar aunque se refresque el
+navegador, y varios analistas comparten el mismo pool sin bloquear la página.
+
+Progreso: lo que la función imprime (print) desde su hilo se captura como salida
+del trabajo. Las líneas "[n/total] ..." de los orquestadores (ej. "[2/4] Aplicando
+...") se traducen en etapa y porcentaje; en los procesos sin etapas numeradas la
+etapa es la última línea impresa.
+
+Cada trabajo guarda el proceso dueño (pid + instante de inicio del proceso). Al
+arrancar, un proceso marca como interrumpidos solo los trabajos pendientes cuyo
+dueño ya no existe: varios procesos del servidor pueden compartir la base sin
+anular los trabajos que los otros tienen en curso.
+
+Con la variable de entorno RCV_PERFIL=1 cada trabajo se perfila (perfil_lib),
+identificado por su tipo y el hash de su primer argumento (el archivo de entrada).
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_lib import asegurar_carpeta_privada, carpeta_privada
+from perfil_lib import perfilar
+
+# --- CONFIGURACIÓN ---
+# Carpeta privada del usuario: la base guarda rutas y salidas de los trabajos
+CARPETA_TRABAJOS = carpeta_privada("rcv_trabajos")
+RUTA_BD_TRABAJOS = os.path.join(CARPETA_TRABAJOS, "trabajos.sqlite")
+WORKERS_TRABAJOS = 2
+MAX_LINEAS_SALIDA = 200
+DIAS_RETENCION_TRABAJOS = 7
+
+PENDIENTE = "pendiente"
+EN_PROCESO = "en_proceso"
+COMPLETADO = "completado"
+ERROR = "error"
+
+_PATRON_ETAPA = re.compile(r"^\s*\[(\d+(?:\.\d+)?)/(\d+)\]\s*(.*)")
+
+_pool = None
+_bloqueo_pool = threading.Lock()
+_hilo_local = threading.local()
+_inicio_este_proceso = None
+
+
+# --- CAPTURA DE SALIDA POR HILO ---
+
+class _SalidaPorHilo:
+    """
+    Reemplazo de sys.stdout que envía lo impreso por un hilo de trabajo a su
+    manejador y deja pasar todo lo demás a la salida original.
+    """
+
+    def __init__(self, original):
+        self._original = original
+
+    def write(self, texto):
+        manejador = getattr(_hilo_local, "manejador", None)
+        if manejador is None:
+            return self._original.write(texto)
+        manejador.write(texto)
+        return len(texto)
+
+    def flush(self):
+        if getattr(_hilo_local, "manejador", None) is None:
+            self._original.flush()
+
+    def __getattr__(self, nombre):
+        return getattr(self._original, nombre)
+
+
+class _SalidaTrabajo:
+    """Acumula la salida de un trabajo por líneas y actualiza su etapa/progreso"""
+
+    def __init__(self, trabajo_id):
+        self.trabajo_id = trabajo_id
+        self.lineas = []
+        self._pendiente = ""
+
+    def write(self, texto):
+        self._pendiente += texto
+        *completas, self._pendiente = self._pendiente.split("\n")
+        for linea in completas:
+            self._procesar_linea(linea)
+
+    def cerrar(self):
+        if self._pendiente:
+            self._procesar_linea(self._pendiente)
+            self._pendiente = ""
+
+    def _procesar_linea(self, linea):
+        linea = linea.rstrip()
+        if not linea.strip():
+            return
+        self.lineas.append(linea)
+        del self.lineas[:-MAX_LINEAS_SALIDA]
+
+        cambios = {"salida": "\n".join(self.lineas)}
+        coincidencia = _PATRON_ETAPA.match(linea)
+        if coincidencia:
+            actual, total, descripcion = coincidencia.groups()
+            # La etapa n empieza: se consideran completas las n-1 anteriores
+            cambios["progreso"] = min(max((float(actual) - 1) / float(total), 0.0), 1.0)
+            cambios["etapa"] = f"[{actual}/{total}] {descripcion}".strip()
+        else:
+            cambios["mensaje"] = linea.strip()
+        _actualizar(self.trabajo_id, **cambios)
+
+
+def _instalar_captura():
+    if not isinstance(sys.stdout, _SalidaPorHilo):
+        sys.stdout = _SalidaPorHilo(sys.stdout)
+
+
+# --- PROCESO DUEÑO ---
+
+def _inicio_proceso(pid):
+    """
+    Identifica el arranque de un proceso, para no confundirlo con otro que
+    reutilice el mismo pid.
+
+    Returns:
+        str: marca de inicio si el proceso existe; None si no existe;
+        "" si no se puede determinar
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # El nombre del proceso va entre paréntesis y puede tener espacios:
+            # tras el último ")" el campo 22 (inicio en ticks) queda en la posición 19
+            inicio = f.read().rsplit(b")", 1)[1].split()[19].decode()
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f"{f.read().strip()}:{inicio}"
+    except FileNotFoundError:
+        if os.path.isdir("/proc/self"):
+            return None
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return ""
+    try:
+        return repr(psutil.Process(pid).create_time())
+    except psutil.NoSuchProcess:
+        return None
+    except psutil.Error:
+        return ""
+
+
+def _marca_este_proceso():
+    global _inicio_este_proceso
+    if _inicio_este_proceso is None:
+        _inicio_este_proceso = _inicio_proceso(os.getpid()) or ""
+    return _inicio_este_proceso
+
+
+def _dueno_vivo(pid, inicio):
+    """
+    True si el proceso que registró el trabajo sigue corriendo.
+
+    Los trabajos sin dueño (bases anteriores) se consideran huérfanos. Si no hay
+    forma de verificar el proceso se asume vivo: es preferible dejar un trabajo
+    en curso hasta la limpieza por antigüedad que anular uno ajeno.
+    """
+    if pid is None:
+        return False
+    actual = _inicio_proceso(pid)
+    if actual is None:
+        return False
+    if actual == "" or not inicio:
+        return True
+    return actual == inicio
+
+
+# --- BASE DE DATOS ---
+
+def _conectar():
+    conexion = sqlite3.connect(RUTA_BD_TRABAJOS, timeout=30)
+    conexion.row_factory = sqlite3.Row
+    return conexion
+
+
+def _crear_tabla():
+    if not asegurar_carpeta_privada(CARPETA_TRABAJOS):
+        raise RuntimeError(
+            f"La carpeta de trabajos no es privada del usuario: {CARPETA_TRABAJOS}"
+        )
+    with _conectar() as conexion:
+        conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trabajos (
+                id TEXT PRIMARY KEY,
+                tipo TEXT,
+                estado TEXT,
+                etapa TEXT,
+                mensaje TEXT,
+                progreso REAL,
+                salida TEXT,
+                datos TEXT,
+                resultado TEXT,
+                error TEXT,
+                creado REAL,
+                actualizado REAL,
+                dueno_pid INTEGER,
+                dueno_inicio TEXT
+            )
+            """
+        )
+        columnas = {fila["name"] for fila in conexion.execute("PRAGMA table_info(trabajos)")}
+        if "dueno_pid" not in columnas:
+            conexion.execute("ALTER TABLE trabajos ADD COLUMN dueno_pid INTEGER")
+        if "dueno_inicio" not in columnas:
+            conexion.execute("ALTER TABLE trabajos ADD COLUMN dueno_inicio TEXT")
+
+
+def _actualizar(trabajo_id, **cambios):
+    cambios["actualizado"] = time.time()
+    columnas = ", ".join(f"{nombre} = ?" for nombre in cambios)
+    with _conectar() as conexion:
+        conexion.execute(
+            f"UPDATE trabajos SET {columnas} WHERE id = ?",
+            (*cambios.values(), trabajo_id),
+        )
+
+
+def _serializable(resultado):
+    """
+    Parte del resultado que se guarda en la base (JSON).
+
+    Los dict conservan solo valores simples (rutas, conteos, banderas); los
+    DataFrames y otros objetos pesados se omiten: las páginas usan las rutas.
+    """
+    simples = (str, int, float, bool, type(None))
+    if isinstance(resultado, dict):
+        return {
+            clave: valor
+            for clave, valor in resultado.items()
+            if isinstance(valor, simples)
+        }
+    return resultado if isinstance(resultado, simples) else None
+
+
+# --- POOL ---
+
+def _obtener_pool():
+    """Crea el pool (una vez por proceso) y marca como interrumpidos los trabajos huérfanos"""
+    global _pool
+    with _bloqueo_pool:
+        if _pool is None:
+            _crear_tabla()
+            with _conectar() as conexion:
+                # Trabajos que quedaron corriendo en un proceso del servidor que ya
+                # terminó; los de otros procesos vivos siguen su curso
+                pendientes = conexion.execute(
+                    "SELECT id, dueno_pid, dueno_inicio FROM trabajos WHERE estado IN (?, ?)",
+                    (PENDIENTE, EN_PROCESO),
+                ).fetchall()
+                huerfanos = [
+                    fila["id"] for fila in pendientes
+                    if not _dueno_vivo(fila["dueno_pid"], fila["dueno_inicio"])
+                ]
+                conexion.executemany(
+                    "UPDATE trabajos SET estado = ?, error = ?, actualizado = ? WHERE id = ?",
+                    [(ERROR, "Interrumpido por reinicio del servidor", time.time(), trabajo_id)
+                     for trabajo_id in huerfanos],
+                )
+                conexion.execute(
+                    "DELETE FROM trabajos WHERE creado < ?",
+                    (time.time() - DIAS_RETENCION_TRABAJOS * 86400,),
+                )
+            _instalar_captura()
+            _pool = ThreadPoolExecutor(
+                max_workers=WORKERS_TRABAJOS, thread_name_prefix="trabajo"
+            )
+        return _pool
+
+
+def _ejecutar(trabajo_id, tipo, funcion, args, kwargs):
+    salida = _SalidaTrabajo(trabajo_id)
+    _hilo_local.manejador = salida
+    _actualizar(trabajo_id, estado=EN_PROCESO)
+    try:
+        with perfilar(tipo, args[0] if args else None):
+            resultado = funcion(*args, **kwargs)
+    except Exception:
+        salida.cerrar()
+        _actualizar(trabajo_id, estado=ERROR, error=traceback.format_exc())
+        return
+    finally:
+        _hilo_local.manejador = None
+
+    salida.cerrar()
+    if not resultado:
+        # Las funciones del proyecto retornan None cuando no pudieron completar
+        _actualizar(
+            trabajo_id,
+            estado=ERROR,
+            error="El proceso terminó sin resultado. Revisa la salida del trabajo.",
+        )
+        return
+    _actualizar(
+        trabajo_id,
+        estado=COMPLETADO,
+        progreso=1.0,
+        resultado=json.dumps(_serializable(resultado), ensure_ascii=False),
+    )
+
+
+def enviar_trabajo(tipo, funcion, args=(), kwargs=None, datos=None):
+    """
+    Encola funcion(*args, **kwargs) para ejecutarse en segundo plano.
+
+    Args:
+        tipo: Nombre del proceso (ej. "limpieza"), solo informativo
+        datos: dict opcional (JSON) que la página necesita aunque el trabajo falle
+            (ej. la ruta del log)
+
+    Returns:
+        str: id del trabajo
+    """
+    pool = _obtener_pool()
+    trabajo_id = uuid.uuid4().hex
+    ahora = time.time()
+    with _conectar() as conexion:
+        conexion.execute(
+            "INSERT INTO trabajos (id, tipo, estado, progreso, datos, creado, actualizado, "
+            "dueno_pid, dueno_inicio) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (trabajo_id, tipo, PENDIENTE, 0.0,
+             json.dumps(datos or {}, ensure_ascii=False), ahora, ahora,
+             os.getpid(), _marca_este_proceso()),
+        )
+    pool.submit(_ejecutar, trabajo_id, tipo, funcion, tuple(args), dict(kwargs or {}))
+    return trabajo_id
+
+
+def obtener_trabajo(trabajo_id):
+    """
+    Estado de un trabajo.
+
+    Returns:
+        dict con id, tipo, estado, etapa, mensaje, progreso, salida, datos,
+        resultado y error; None si el id no existe
+    """
+    _obtener_pool()
+    with _conectar() as conexion:
+        fila = conexion.execute(
+            "SELECT * FROM trabajos WHERE id = ?", (trabajo_id,)
+        ).fetchone()
+    if fila is None:
+        return None
+    trabajo = dict(fila)
+    trabajo["datos"] = json.loads(trabajo["datos"]) if trabajo["datos"] else {}
+    trabajo["resultado"] = json.loads(trabajo["resultado"]) if trabajo["resultado"] else None
+    return trabajo
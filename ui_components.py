@@ -2,7 +2,18 @@
 Componentes reutilizables de la interfaz de usuario.
 """
 
+import html
+import os
+from urllib.parse import quote
+
 import streamlit as st
+from trabajos_lib import obtener_trabajo, COMPLETADO, ERROR
+from utils_app import (
+    formatear_mensaje_error, es_descarga_grande, publicar_descarga, retirar_descarga,
+)
+
+# Cada cuánto se consulta el estado de un trabajo en segundo plano
+INTERVALO_CONSULTA_SEGUNDOS = 2
 
 
 def mostrar_header():
@@ -88,6 +99,63 @@ def boton_centrado(texto, icono="", **kwargs):
         return st.button(texto_completo, use_container_width=True, **kwargs)
 
 
+def boton_descarga(ruta, etiqueta, nombre_descarga, on_click=None, args=None, **kwargs):
+    """
+    Botón de descarga de un archivo del disco.
+
+    Los archivos grandes (ver utils_app.LIMITE_DESCARGA_EN_MEMORIA_MB) no se
+    cargan en memoria: se publican como estáticos y se descargan con un enlace.
+    El enlace no avisa cuándo se hizo clic, así que on_click se ofrece en un
+    botón aparte para confirmar la descarga.
+
+    Args:
+        ruta: Archivo a descargar
+        etiqueta: Texto del botón
+        nombre_descarga: Nombre con el que se descarga
+        on_click, args: Callback al descargar (como en st.download_button)
+        **kwargs: Argumentos adicionales para st.download_button
+    """
+    if not es_descarga_grande(ruta):
+        with open(ruta, "rb") as f:
+            st.download_button(
+                etiqueta, f, file_name=nombre_descarga, on_click=on_click, args=args, **kwargs
+            )
+        return
+
+    # Publicar una sola vez por versión del archivo (cada rerun vuelve a dibujar
+    # el enlace); si el archivo cambió, se retira la publicación anterior
+    clave = f"descarga_publicada::{ruta}::{nombre_descarga}"
+    firma = (os.path.getmtime(ruta), os.path.getsize(ruta))
+    publicada = st.session_state.get(clave)
+    if not publicada or publicada[0] != firma:
+        if publicada:
+            retirar_descarga(publicada[1])
+        publicada = (firma, publicar_descarga(ruta, nombre_descarga))
+        st.session_state[clave] = publicada
+    url = publicada[1]
+
+    st.markdown(
+        f'<a href="{quote(url)}" download="{html.escape(nombre_descarga)}" target="_self">'
+        f"{html.escape(etiqueta)}</a>",
+        unsafe_allow_html=True,
+    )
+    if on_click:
+        st.button(
+            "✔ Ya descargué",
+            key=f"confirmar_{clave}::{firma}",
+            on_click=_confirmar_descarga,
+            args=(clave, on_click, args or ()),
+        )
+
+
+def _confirmar_descarga(clave, on_click, args):
+    """Retira la publicación ya descargada y ejecuta el callback original"""
+    publicada = st.session_state.pop(clave, None)
+    if publicada:
+        retirar_descarga(publicada[1])
+    on_click(*args)
+
+
 def mostrar_separador_paso():
     """Muestra un separador visual entre pasos"""
     st.markdown("---")
@@ -113,22 +181,98 @@ def mostrar_archivos_descarga_duo(archivo_izq, nombre_izq, titulo_izq,
     
     with col1:
         if archivo_izq:
-            with open(archivo_izq, "rb") as f:
-                st.download_button(
-                    titulo_izq,
-                    f,
-                    file_name=nombre_izq,
-                    use_container_width=True,
-                    on_click=callback_izq
-                )
+            boton_descarga(
+                archivo_izq,
+                titulo_izq,
+                nombre_izq,
+                use_container_width=True,
+                on_click=callback_izq
+            )
     
     with col2:
         if archivo_der:
-            with open(archivo_der, "rb") as f:
-                st.download_button(
-                    titulo_der,
-                    f,
-                    file_name=nombre_der,
-                    use_container_width=True,
-                    on_click=callback_der
-                )
+            boton_descarga(
+                archivo_der,
+                titulo_der,
+                nombre_der,
+                use_container_width=True,
+                on_click=callback_der
+            )
+
+
+def recordar_trabajo(clave, trabajo_id):
+    """
+    Recuerda el trabajo en segundo plano de una sección.
+
+    Se guarda en la URL (query params) y no en session_state, así un refresco
+    del navegador sigue mostrando el progreso y el resultado del mismo trabajo.
+    """
+    st.query_params[clave] = trabajo_id
+
+
+def trabajo_recordado(clave):
+    """Id del trabajo recordado para la sección, o None"""
+    return st.query_params.get(clave)
+
+
+def olvidar_trabajo(clave):
+    """Deja de seguir el trabajo de la sección (no lo cancela)"""
+    if clave in st.query_params:
+        del st.query_params[clave]
+
+
+def seguir_trabajo(clave, mensaje):
+    """
+    Muestra el progreso del trabajo recordado y lo consulta periódicamente.
+
+    Args:
+        clave: Clave con la que se recordó el trabajo
+        mensaje: Texto a mostrar mientras el trabajo corre
+
+    Returns:
+        dict: El trabajo si ya terminó (completado o con error); None si no hay
+        trabajo o si todavía está en curso
+    """
+    trabajo_id = trabajo_recordado(clave)
+    if not trabajo_id:
+        return None
+
+    trabajo = obtener_trabajo(trabajo_id)
+    if trabajo is None:
+        olvidar_trabajo(clave)
+        return None
+    if trabajo["estado"] in (COMPLETADO, ERROR):
+        return trabajo
+
+    _mostrar_progreso_trabajo(trabajo_id, mensaje)
+    return None
+
+
+@st.fragment(run_every=INTERVALO_CONSULTA_SEGUNDOS)
+def _mostrar_progreso_trabajo(trabajo_id, mensaje):
+    """Barra de progreso que se refresca sola; al terminar el trabajo recarga la página"""
+    trabajo = obtener_trabajo(trabajo_id)
+    if trabajo is None or trabajo["estado"] in (COMPLETADO, ERROR):
+        st.rerun()
+
+    etapa = trabajo["etapa"] or "En cola..."
+    st.progress(trabajo["progreso"] or 0.0, text=f"⏳ {mensaje} {etapa}")
+    if trabajo["mensaje"]:
+        st.caption(trabajo["mensaje"])
+
+
+def mostrar_error_trabajo(trabajo, tipo_error):
+    """
+    Muestra el error de un trabajo terminado sin resultado.
+
+    Args:
+        trabajo: dict retornado por seguir_trabajo
+        tipo_error: Tipo de mensaje para formatear_mensaje_error
+    """
+    st.error(formatear_mensaje_error(tipo_error))
+    detalle = "\n\n".join(
+        texto for texto in (trabajo.get("salida"), trabajo.get("error")) if texto
+    )
+    if detalle:
+        with st.expander("Ver detalle del proceso"):
+            st.code(detalle, language=None)
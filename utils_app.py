@@ -7,6 +7,48 @@ import gc
 import os
 import shutil
 import tempfile
+import time
+import uuid
+import zipfile
+
+from cache_lib import asegurar_carpeta_privada, carpeta_privada, hash_bytes, podar_cache
+
+# --- CONFIGURACIÓN SUBIDAS ---
+# True = los procesos leen el archivo subido directamente desde su buffer en
+# memoria (los trabajos corren en hilos del mismo proceso); False = se guarda
+# primero en el almacén de subidas y se procesa desde disco
+LEER_SUBIDAS_EN_MEMORIA = True
+# Almacén de archivos subidos por hash de contenido: cada archivo se escribe una
+# sola vez y lo comparten reruns, pestañas y sesiones. Es privado del usuario:
+# las entradas existentes se reutilizan tal cual, así que nadie más debe poder
+# escribir en él
+CARPETA_SUBIDAS = carpeta_privada("rcv_subidas")
+LIMITE_SUBIDAS_MB = 4096
+EDAD_MAXIMA_SUBIDAS_HORAS = 24
+# Directorios de trabajo de las pestañas (tempfile.mkdtemp con estos prefijos):
+# se eliminan pasadas EDAD_MAXIMA_TEMPORALES_HORAS aunque nadie haya descargado
+PREFIJOS_TEMPORALES = ("copia_", "limpieza_", "validacion_")
+EDAD_MAXIMA_TEMPORALES_HORAS = 24
+INTERVALO_LIMPIEZA_MINUTOS = 30
+
+_ultima_limpieza = 0.0
+
+# --- CONFIGURACIÓN ZIP ---
+# Nivel de compresión deflate (1 = más rápido ... 9 = más pequeño)
+NIVEL_COMPRESION_ZIP = 6
+# True = sin compresión (ZIP_STORED): lo más rápido, el ZIP ocupa lo mismo que los archivos
+SOLO_ALMACENAR_ZIP = False
+
+# --- CONFIGURACIÓN DESCARGAS ---
+# Archivos más grandes que esto no se cargan en memoria para st.download_button:
+# se publican en la carpeta de archivos estáticos de Streamlit (servidos desde
+# disco por partes) y se descargan con un enlace
+LIMITE_DESCARGA_EN_MEMORIA_MB = 50
+CARPETA_ESTATICOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+SUBCARPETA_DESCARGAS = "descargas"
+# Red de seguridad: las publicaciones se retiran al reemplazarlas o al
+# confirmar la descarga; las que queden se borran pasado este tiempo
+EDAD_MAXIMA_DESCARGAS_HORAS = 1
 
 
 def guardar_temporal(archivo_subido, prefijo):
@@ -27,6 +69,165 @@ def guardar_temporal(archivo_subido, prefijo):
     return temp_dir, ruta_temp
 
 
+def guardar_subida(archivo_subido, carpeta=CARPETA_SUBIDAS):
+    """
+    Guarda un archivo subido en el almacén de subidas (por hash de contenido).
+
+    Si el mismo contenido ya está guardado no se vuelve a escribir; con otro
+    nombre se agrega un enlace al mismo archivo. Cada uso renueva la entrada
+    (las menos usadas se eliminan primero al superar LIMITE_SUBIDAS_MB).
+
+    Si la carpeta no pasa asegurar_carpeta_privada (otro dueño, enlace
+    simbólico, permisos que no se pueden cerrar) no se usa el almacén.
+
+    Args:
+        archivo_subido: Objeto UploadedFile de Streamlit
+
+    Returns:
+        str | None: Ruta del archivo guardado, o None si el almacén no es seguro
+    """
+    if not asegurar_carpeta_privada(carpeta):
+        print(f"Almacén de subidas no disponible, se guarda una copia aparte: {carpeta}")
+        return None
+
+    datos = archivo_subido.getbuffer()
+    carpeta_entrada = os.path.join(carpeta, hash_bytes(datos))
+    ruta = os.path.join(carpeta_entrada, os.path.basename(archivo_subido.name))
+    if os.path.exists(ruta):
+        os.utime(carpeta_entrada)
+        return ruta
+
+    os.makedirs(carpeta_entrada, exist_ok=True)
+    existentes = [
+        os.path.join(carpeta_entrada, nombre)
+        for nombre in os.listdir(carpeta_entrada)
+        if not nombre.endswith(".tmp")
+    ]
+    try:
+        if existentes:
+            os.link(existentes[0], ruta)
+            return ruta
+    except OSError:
+        pass
+
+    # Escritura atómica: nunca queda un archivo a medias con el nombre final
+    fd, ruta_tmp = tempfile.mkstemp(dir=carpeta_entrada, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+    podar_cache(
+        carpeta,
+        max_bytes=LIMITE_SUBIDAS_MB * 1024 * 1024,
+        max_edad_segundos=EDAD_MAXIMA_SUBIDAS_HORAS * 3600,
+    )
+    return ruta
+
+
+def guardar_temporal_reutilizable(
+    archivo_subido, prefijo, estado, clave_estado, en_memoria=LEER_SUBIDAS_EN_MEMORIA
+):
+    """
+    Guarda el archivo subido una sola vez y lo reutiliza entre reruns, pestañas y sesiones.
+
+    Streamlit vuelve a ejecutar la página en cada interacción. El archivo va al
+    almacén de subidas (guardar_subida) y la sesión recuerda su ruta, así que un
+    rerun no lo vuelve a escribir ni a hashear. Las salidas van a un directorio
+    de trabajo propio de la pestaña, que se puede borrar sin afectar la subida.
+
+    Con en_memoria=True el archivo no se escribe a disco: se devuelve el propio
+    UploadedFile y los procesos lo leen desde su memoryview (lectura_lib.abrir_origen).
+
+    Args:
+        archivo_subido: Objeto UploadedFile de Streamlit
+        prefijo: Prefijo del directorio de trabajo (ver PREFIJOS_TEMPORALES)
+        estado: Diccionario persistente entre reruns (st.session_state)
+        clave_estado: Clave de estado donde se recuerda el archivo guardado
+        en_memoria: Procesar desde el buffer de la subida en vez de desde disco
+
+    Returns:
+        tuple: (directorio_de_trabajo, origen) donde origen es la ruta del archivo
+        guardado o, con en_memoria, el propio archivo subido
+    """
+    limpiar_temporales_huerfanos()
+
+    identificador = (
+        getattr(archivo_subido, "file_id", None),
+        archivo_subido.name,
+        archivo_subido.size,
+    )
+    previo = estado.get(clave_estado)
+    mismo_archivo = previo and previo["identificador"] == identificador
+
+    if mismo_archivo and os.path.isdir(previo["temp_dir"]):
+        temp_dir = previo["temp_dir"]
+    else:
+        temp_dir = tempfile.mkdtemp(prefix=prefijo)
+
+    if en_memoria:
+        ruta = None
+    elif mismo_archivo and previo["ruta"] and os.path.exists(previo["ruta"]):
+        ruta = previo["ruta"]
+    else:
+        ruta = guardar_subida(archivo_subido)
+        if ruta is None:
+            # Almacén no disponible: copia dentro del directorio de trabajo
+            ruta = os.path.join(temp_dir, os.path.basename(archivo_subido.name))
+            with open(ruta, "wb") as f:
+                f.write(archivo_subido.getbuffer())
+
+    estado[clave_estado] = {
+        "identificador": identificador,
+        "temp_dir": temp_dir,
+        "ruta": ruta,
+    }
+    return temp_dir, archivo_subido if en_memoria else ruta
+
+
+def limpiar_temporales_huerfanos(forzar=False):
+    """
+    Elimina directorios de trabajo abandonados y poda el almacén de subidas.
+
+    Se ejecuta como máximo una vez cada INTERVALO_LIMPIEZA_MINUTOS por proceso
+    (salvo forzar=True).
+
+    Returns:
+        int: cantidad de entradas eliminadas
+    """
+    global _ultima_limpieza
+    ahora = time.time()
+    if not forzar and ahora - _ultima_limpieza < INTERVALO_LIMPIEZA_MINUTOS * 60:
+        return 0
+    _ultima_limpieza = ahora
+
+    raiz = tempfile.gettempdir()
+    limite = ahora - EDAD_MAXIMA_TEMPORALES_HORAS * 3600
+    eliminados = 0
+    for nombre in os.listdir(raiz):
+        ruta = os.path.join(raiz, nombre)
+        if not nombre.startswith(PREFIJOS_TEMPORALES) or not os.path.isdir(ruta):
+            continue
+        try:
+            if os.path.getmtime(ruta) < limite:
+                shutil.rmtree(ruta)
+                eliminados += 1
+        except OSError as e:
+            print(f"Error al limpiar {ruta}: {e}")
+
+    if os.path.isdir(CARPETA_SUBIDAS) and asegurar_carpeta_privada(CARPETA_SUBIDAS):
+        eliminados += podar_cache(
+            CARPETA_SUBIDAS,
+            max_bytes=LIMITE_SUBIDAS_MB * 1024 * 1024,
+            max_edad_segundos=EDAD_MAXIMA_SUBIDAS_HORAS * 3600,
+        )
+    return eliminados
+
+
 def limpiar_directorio(directorio):
     """
     Limpia un directorio temporal de forma segura.
@@ -42,19 +243,133 @@ def limpiar_directorio(directorio):
         print(f"Error al limpiar {directorio}: {e}")
 
 
-def crear_zip(carpeta, salida_zip):
+class EmpaquetadorZip:
+    """
+    Arma un ZIP de forma incremental: cada archivo se agrega apenas se genera y
+    se copia por partes, sin tener el ZIP ni los archivos completos en memoria.
+
+    Uso:
+        with EmpaquetadorZip("salida.zip", solo_almacenar=True) as zip_salida:
+            zip_salida.agregar_bytes("noviembre/IPS.csv", datos)
+            zip_salida.agregar_archivo("Reporte.csv")
+    """
+
+    def __init__(self, salida_zip, nivel_compresion=NIVEL_COMPRESION_ZIP,
+                 solo_almacenar=SOLO_ALMACENAR_ZIP):
+        self.ruta = salida_zip
+        if solo_almacenar:
+            self._zip = zipfile.ZipFile(salida_zip, "w", zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            self._zip = zipfile.ZipFile(
+                salida_zip, "w", zipfile.ZIP_DEFLATED, allowZip64=True,
+                compresslevel=nivel_compresion,
+            )
+
+    def agregar_archivo(self, ruta, nombre_en_zip=None):
+        """Agrega un archivo del disco (se lee por partes)"""
+        self._zip.write(ruta, nombre_en_zip or os.path.basename(ruta))
+
+    def agregar_bytes(self, nombre_en_zip, datos):
+        """Agrega un archivo ya generado en memoria"""
+        self._zip.writestr(nombre_en_zip, datos)
+
+    def abrir_entrada(self, nombre_en_zip):
+        """Archivo binario para escribir una entrada por partes (ej. to_csv en streaming)"""
+        return self._zip.open(nombre_en_zip, "w", force_zip64=True)
+
+    def agregar_carpeta(self, carpeta):
+        """Agrega todos los archivos de una carpeta, con rutas relativas a ella"""
+        for raiz, _dirs, archivos in os.walk(carpeta):
+            for nombre in sorted(archivos):
+                ruta = os.path.join(raiz, nombre)
+                self.agregar_archivo(ruta, os.path.relpath(ruta, carpeta).replace(os.sep, "/"))
+
+    def cerrar(self):
+        """Escribe el índice del ZIP y retorna su ruta"""
+        self._zip.close()
+        return self.ruta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_excepcion):
+        self.cerrar()
+
+
+def crear_zip(carpeta, salida_zip, nivel_compresion=NIVEL_COMPRESION_ZIP,
+              solo_almacenar=SOLO_ALMACENAR_ZIP):
     """
     Crea un archivo ZIP de una carpeta.
     
     Args:
         carpeta: Ruta de la carpeta a comprimir
         salida_zip: Ruta del archivo ZIP de salida
+        nivel_compresion: Nivel deflate (1-9)
+        solo_almacenar: True = sin compresión (más rápido)
         
     Returns:
         str: Ruta del archivo ZIP creado
     """
-    base_name, _ = os.path.splitext(salida_zip)
-    return shutil.make_archive(base_name, "zip", carpeta)
+    with EmpaquetadorZip(salida_zip, nivel_compresion, solo_almacenar) as zip_salida:
+        zip_salida.agregar_carpeta(carpeta)
+    return salida_zip
+
+
+def es_descarga_grande(ruta):
+    """True si el archivo supera LIMITE_DESCARGA_EN_MEMORIA_MB"""
+    return os.path.getsize(ruta) > LIMITE_DESCARGA_EN_MEMORIA_MB * 1024 * 1024
+
+
+def publicar_descarga(ruta, nombre_descarga):
+    """
+    Publica un archivo en la carpeta de estáticos de Streamlit para descargarlo
+    con un enlace (servido desde disco, sin pasar por la memoria de la sesión).
+
+    Se publica una copia: el archivo de trabajo se puede reescribir en su sitio
+    (ej. el ZIP por IPS al exportar de nuevo) sin afectar los enlaces ya
+    entregados. Cada publicación va en una subcarpeta con nombre aleatorio (el
+    enlace no se puede adivinar); se elimina con retirar_descarga o, si quedó
+    huérfana, pasadas EDAD_MAXIMA_DESCARGAS_HORAS.
+    Requiere server.enableStaticServing = true (.streamlit/config.toml).
+
+    Returns:
+        str: URL relativa del archivo (app/static/...)
+    """
+    carpeta_descargas = os.path.join(CARPETA_ESTATICOS, SUBCARPETA_DESCARGAS)
+    _limpiar_descargas_antiguas(carpeta_descargas)
+
+    token = uuid.uuid4().hex
+    destino = os.path.join(carpeta_descargas, token, nombre_descarga)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    shutil.copyfile(ruta, destino)
+    return f"app/static/{SUBCARPETA_DESCARGAS}/{token}/{nombre_descarga}"
+
+
+def retirar_descarga(url):
+    """Elimina de los estáticos la publicación de una URL devuelta por publicar_descarga"""
+    prefijo = f"app/static/{SUBCARPETA_DESCARGAS}/"
+    if not url or not url.startswith(prefijo):
+        return
+    token = url[len(prefijo):].split("/", 1)[0]
+    # Solo subcarpetas creadas por publicar_descarga (uuid4 en hexadecimal)
+    if len(token) != 32 or any(c not in "0123456789abcdef" for c in token):
+        return
+    shutil.rmtree(
+        os.path.join(CARPETA_ESTATICOS, SUBCARPETA_DESCARGAS, token), ignore_errors=True
+    )
+
+
+def _limpiar_descargas_antiguas(carpeta_descargas):
+    if not os.path.isdir(carpeta_descargas):
+        return
+    limite = time.time() - EDAD_MAXIMA_DESCARGAS_HORAS * 3600
+    for nombre in os.listdir(carpeta_descargas):
+        ruta = os.path.join(carpeta_descargas, nombre)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                shutil.rmtree(ruta, ignore_errors=True)
+        except OSError:
+            pass
 
 
 def formatear_mensaje_exito(nombre_archivo):
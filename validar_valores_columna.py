@@ -1,9 +1,14 @@
 import json
 import os
 import sys
+import numpy as np
 import pandas as pd
 import re
-import unicodedata
+
+from lectura_lib import leer_libro, nombre_origen
+from texto_lib import (
+    plegar_texto, plegar_serie, VALORES_VACIOS, VARIANTES_SIN_DATO, VARIANTES,
+)
 
 # --- CONFIGURACION ---
 ARCHIVO_EXCEL = "./noviembre/copia_nov_con_encabezados.xlsx"
@@ -13,47 +18,6 @@ NUM_FILAS_A_SALTEAR = 1
 CONFIG_JSON = "validaciones_config.json"
 
 
-def detectar_engine(archivo):
-    ext = os.path.splitext(archivo)[1].lower()
-    if ext == ".xlsb":
-        try:
-            import pyxlsb  # noqa: F401
-            return "pyxlsb"
-        except ImportError:
-            print("Falta pyxlsb. Instalar con: pip install pyxlsb")
-            return None
-    if ext == ".xlsx":
-        return "openpyxl"
-    return None
-
-
-def leer_encabezados(archivo):
-    engine = detectar_engine(archivo)
-    if not engine:
-        return []
-    try:
-        df_headers = pd.read_excel(
-            archivo, header=None, skiprows=0, nrows=1, engine=engine
-        )
-        return df_headers.iloc[0].tolist()
-    except Exception as e:
-        print(f"Error al leer encabezados: {e}")
-        return []
-
-
-def leer_datos(archivo, filas_a_saltar):
-    engine = detectar_engine(archivo)
-    if not engine:
-        return None
-    try:
-        return pd.read_excel(
-            archivo, header=None, skiprows=filas_a_saltar, engine=engine
-        )
-    except Exception as e:
-        print(f"Error al leer datos: {e}")
-        return None
-
-
 def cargar_configuracion(ruta_json):
     if not os.path.exists(ruta_json):
         print(f"No se encontro el archivo de configuracion: {ruta_json}")
@@ -87,13 +51,9 @@ def cargar_configuracion(ruta_json):
 
 def _normalizar_base(valor):
     """Normaliza texto para comparaciones: sin tildes, mayusculas, espacios compactos"""
-    if not isinstance(valor, str):
-        return ""
-    texto = unicodedata.normalize("NFKD", valor)
-    texto = "".join([c for c in texto if not unicodedata.combining(c)])
-    texto = texto.upper()
-    texto = re.sub(r"\s+", " ", texto).strip()
-    texto = re.sub(r"\s*,\s*", ", ", texto)
+    texto = plegar_texto(valor, mayusculas=True)
+    if "," in texto:
+        texto = re.sub(r"\s*,\s*", ", ", texto)
     return texto
 
 
@@ -109,23 +69,17 @@ def normalizar_valor(valor):
     if val in ("SIN DATO", "SIN DATOS", "SINDATO", "SIN_DATO"):
         return "SINDATO"
 
-    # Mapear variantes conocidas a un valor canonico
-    variantes = {
-        "NINGUNA DE LAS ANTERIORES": "NINGUNAS DE LAS ANTERIORES",
-        "NINGUNAS DE LAS ANTERIORES": "NINGUNAS DE LAS ANTERIORES",
-        "NEGRO(A), MULATO(A), AFROCOLOMBIANO O AFRODECENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "NEGRO(A), MULATO(A), AFROCOLOMBIANO O AFRODESCENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "NEGRO (A), MULATO (A), AFROCOLOMBIANO O AFRODECENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "NEGRO (A), MULATO (A), AFROCOLOMBIANO O AFRODESCENDIENTE": "NEGRO (A), MULATO, AFROAMERICANO",
-        "COMUNIDADES INDIGENAS": "COMUNIDADES INDIGINAS",
-        "VICTIMA DEL CONFLICTO ARMADO INTERNO": "VICTIMAS DEL CONFLICTO ARMADO",
-        "AFROCOLOMBIANO O AFRODECENDIENTE": "OTRO GRUPO POBLACIONAL",
-        "POBLACION RURAL NO MIGRATORIA": "OTRO GRUPO POBLACIONAL",
-    }
-    if val in variantes:
-        return variantes[val]
+    return VARIANTES.get(val, val)
 
-    return val
+
+def _normalizar_serie(col):
+    """Versión para una columna completa de normalizar_valor"""
+    textos = col.astype(object).astype(str).where(col.notna(), "")
+    val = plegar_serie(textos, mayusculas=True)
+    con_coma = val.str.contains(",", regex=False).to_numpy(dtype=bool)
+    if con_coma.any():
+        val[con_coma] = val[con_coma].str.replace(r"\s*,\s*", ", ", regex=True)
+    return val.replace({**VALORES_VACIOS, **VARIANTES_SIN_DATO, **VARIANTES})
 
 
 def normalizar_lista_validos(validos):
@@ -133,62 +87,75 @@ def normalizar_lista_validos(validos):
     return {normalizar_valor(v) for v in validos}
 
 
+COLUMNAS_ERRORES = [
+    "fila",
+    "columna_idx",
+    "columna_nombre",
+    "valor_original",
+    "valor_normalizado",
+    "validos_esperados",
+]
+
+
 def validar_columna(df, encabezados, indice_json, config, log, num_filas_saltadas):
-    """Valida una columna y retorna lista de errores detallados
+    """Valida una columna y retorna la tabla de errores detallados
     
     Args:
         indice_json: Índice desde JSON (1-based, número de columna Excel)
+
+    Returns:
+        DataFrame con COLUMNAS_ERRORES (vacío si no hay errores)
     """
     # Convertir índice de JSON (1-based) a índice pandas (0-based)
     indice = indice_json - 1
     
     if indice < 0 or indice >= len(df.columns):
         log.write(f"Índice {indice_json} (pandas: {indice}) fuera de rango.\n")
-        return []
+        return pd.DataFrame(columns=COLUMNAS_ERRORES)
 
     nombre_columna = config.get("nombre", "")
     if not nombre_columna and indice < len(encabezados):
         nombre_columna = str(encabezados[indice]).strip()
 
     col = df.iloc[:, indice]
-    col_norm = col.apply(normalizar_valor)
-
-    # Excluir vacios
-    col_norm_no_vacio = col_norm[col_norm != ""]
+    col_norm = _normalizar_serie(col)
 
     validos = normalizar_lista_validos(config.get("validos", set()))
-    invalidos = col_norm_no_vacio[~col_norm_no_vacio.isin(validos)]
-    conteo_invalidos = invalidos.value_counts()
+
+    # Máscaras por fila: no vacío y fuera de la lista de válidos
+    no_vacio = (col_norm != "").to_numpy()
+    invalidos_mask = no_vacio & ~col_norm.isin(validos).to_numpy()
+    conteo_invalidos = col_norm[invalidos_mask].value_counts()
 
     log.write("-" * 80 + "\n")
     log.write(f"Índice JSON (columna Excel): {indice_json}\n")
     log.write(f"Índice pandas (0-based): {indice}\n")
     log.write(f"Nombre: {nombre_columna}\n")
     log.write(f"Total registros: {len(col)}\n")
-    log.write(f"Total no vacios: {len(col_norm_no_vacio)}\n")
-    log.write(f"Total invalidos: {len(invalidos)}\n")
+    log.write(f"Total no vacios: {int(no_vacio.sum())}\n")
+    log.write(f"Total invalidos: {int(invalidos_mask.sum())}\n")
 
-    errores = []
     if conteo_invalidos.empty:
         log.write("No se encontraron valores invalidos.\n")
-    else:
-        log.write("Valores invalidos encontrados:\n")
-        for valor, cantidad in conteo_invalidos.items():
-            log.write(f"  - '{valor}': {cantidad}\n")
-        
-        # Generar lista detallada de errores (fila, columna, valor original, valor normalizado)
-        for fila_idx, val_norm in enumerate(col_norm):
-            if val_norm != "" and val_norm not in validos:
-                errores.append({
-                    "fila": fila_idx + num_filas_saltadas + 1,  # +1 para header original
-                    "columna_idx": indice_json,
-                    "columna_nombre": nombre_columna,
-                    "valor_original": col.iloc[fila_idx],
-                    "valor_normalizado": val_norm,
-                    "validos_esperados": ", ".join(sorted(validos))
-                })
-    
-    return errores
+        return pd.DataFrame(columns=COLUMNAS_ERRORES)
+
+    log.write("Valores invalidos encontrados:\n")
+    for valor, cantidad in conteo_invalidos.items():
+        log.write(f"  - '{valor}': {cantidad}\n")
+
+    # Tabla detallada de errores (fila, columna, valor original, valor normalizado)
+    posiciones = np.flatnonzero(invalidos_mask)
+    return pd.DataFrame(
+        {
+            "fila": posiciones + num_filas_saltadas + 1,  # +1 para header original
+            "columna_idx": indice_json,
+            "columna_nombre": nombre_columna,
+            "valor_original": col.to_numpy(dtype=object)[posiciones],
+            "valor_normalizado": col_norm.to_numpy(dtype=object)[posiciones],
+            "validos_esperados": ", ".join(sorted(validos)),
+        },
+        columns=COLUMNAS_ERRORES,
+    )
 
 
 def ejecutar_validacion(
@@ -198,27 +165,26 @@ def ejecutar_validacion(
     config_json=CONFIG_JSON,
     csv_salida=None,
 ):
-    print(f"Leyendo archivo: {archivo_excel}")
+    print(f"Leyendo archivo: {nombre_origen(archivo_excel)}")
 
     configuracion = cargar_configuracion(config_json)
     if not configuracion:
         print("No hay columnas configuradas para validar.")
         return None
 
-    encabezados = leer_encabezados(archivo_excel)
+    encabezados, df = leer_libro(archivo_excel, num_filas_a_saltar)
     if not encabezados:
         print("No se pudieron leer los encabezados.")
         return None
 
-    df = leer_datos(archivo_excel, num_filas_a_saltar)
     if df is None:
         return None
 
-    todos_los_errores = []
+    tablas_errores = []
 
     with open(log_salida, "w", encoding="utf-8") as log:
         log.write("VALIDACION DE VALORES - COLUMNAS\n")
-        log.write(f"Archivo: {archivo_excel}\n")
+        log.write(f"Archivo: {nombre_origen(archivo_excel)}\n")
         log.write(f"Columnas configuradas: {len(configuracion)}\n")
 
         for item in configuracion:
@@ -230,13 +196,19 @@ def ejecutar_validacion(
                 log,
                 num_filas_a_saltar,
             )
-            todos_los_errores.extend(errores)
+            if not errores.empty:
+                tablas_errores.append(errores)
 
     print(f"Log generado: {log_salida}")
 
+    if tablas_errores:
+        todos_los_errores = pd.concat(tablas_errores, ignore_index=True).infer_objects()
+    else:
+        todos_los_errores = pd.DataFrame(columns=COLUMNAS_ERRORES)
+
     archivo_errores_csv = None
-    if todos_los_errores:
-        df_errores = pd.DataFrame(todos_los_errores)
+    if not todos_los_errores.empty:
+        df_errores = todos_los_errores
         archivo_errores_csv = csv_salida or "Validacion_Errores.csv"
         df_errores.to_csv(archivo_errores_csv, index=False, encoding="utf-8-sig", sep=";")
         print(